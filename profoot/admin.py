@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 # Assurez-vous que tous vos modèles utilisés sont importés ici
-from .models import Pronostic, Comment, BookmakerOffer, Follow, Notification, UserProfile
+from .models import Pronostic, Comment, BookmakerOffer, Follow, Notification, UserProfile, Match
 
 # Enregistrement des modèles existants avec la syntaxe @admin.register
 # Remplacez votre "admin.site.register(Pronostic)" par ce bloc pour Pronostic
@@ -34,3 +34,11 @@ class BookmakerOfferAdmin(admin.ModelAdmin):
     list_filter = ('is_active',)
     search_fields = ('name', 'bonus_description')
     ordering = ('order',)
+
+# Matchs : le filtre "À régler manuellement" liste ceux mis de côté par run_settlement_daemon.
+@admin.register(Match)
+class MatchAdmin(admin.ModelAdmin):
+    list_display = ('equipe_domicile', 'equipe_exterieur', 'date_match', 'ligue', 'status_api', 'score_final_domicile', 'score_final_exterieur', 'settlement_parked')
+    list_filter = ('settlement_parked', 'status_api')
+    search_fields = ('equipe_domicile', 'equipe_exterieur', 'ligue')
+    date_hierarchy = 'date_match'
@@ -1,22 +1,35 @@
 # profoot/api_integrations.py
 
-import requests
-import os
+import hashlib
+import json
 import logging
+import time
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta, datetime  # Assurez-vous que datetime est importé
 
 # Assurez-vous que Match est bien importé
-from .models import Pronostic, Match
+from .models import Pronostic, Match, SyncState
+# Client HTTP partagé (pool de connexions, nouvelles tentatives, délais séparés)
+from .sportmonks_client import (
+    SPORTMONKS_API_TOKEN, sportmonks_get, sportmonks_stream, get_request_count, map_concurrently,
+)
+# Règlement des paris à partir de leur spécification structurée
+from .bet_spec import AUTO_SETTLED_TYPES, settle_bet
+# Moteur de règlement en lot (colonnes chargées par values_list, un UPDATE par résultat)
+from .settlement import (
+    CANCELLED_STATE_IDS, FINAL_STATE_IDS, settle_finished_matches, split_locally_final_matches,
+    is_final_status, is_cancelled_status,
+)
+# Cache des noms de ligues et de stades (LRU en mémoire + tables League/Venue)
+from .reference_cache import NOT_AVAILABLE, get_league_name, get_venue_name, prefetch_references
+from .search import reindex_pronostics
 
 # Initialisation du logger
 logger = logging.getLogger( __name__ )
 
-# --- Configuration Sportmonks API ---
-SPORTMONKS_API_TOKEN = os.environ.get( 'SPORTMONKS_API_TOKEN' )
-SPORTMONKS_BASE_URL = "https://api.sportmonks.com/v3/football"
-
 if not SPORTMONKS_API_TOKEN:
     logger.error( "SPORTMONKS_API_TOKEN non trouvé. Veuillez le définir comme variable d'environnement." )
 
@@ -24,40 +37,11 @@ if not SPORTMONKS_API_TOKEN:
 def _make_sportmonks_request(endpoint, params=None):
     """
     Fonction interne générique pour faire des requêtes à l'API Sportmonks.
-    Gère l'authentification et les erreurs de base.
+    Délègue au client partagé (sportmonks_client), qui réutilise les connexions
+    et gère les nouvelles tentatives sur les erreurs transitoires.
     Retourne la réponse JSON complète ou None en cas d'erreur.
     """
-    if not SPORTMONKS_API_TOKEN:
-        logger.error( f"Requête API Sportmonks échouée pour l'endpoint {endpoint}: Clé API manquante." )
-        return None
-
-    full_url = f"{SPORTMONKS_BASE_URL}/{endpoint}"
-
-    all_params = {'api_token': SPORTMONKS_API_TOKEN}
-    if params:
-        all_params.update( params )
-
-    try:
-        response = requests.get( full_url, params=all_params, timeout=10 )
-        response.raise_for_status()
-        data = response.json()
-        return data  # Retourne la réponse JSON complète
-    except requests.exceptions.HTTPError as e:
-        logger.error(
-            f"Erreur HTTP lors de l'appel à Sportmonks ({full_url}) : {e.response.status_code} - {e.response.text}" )
-        return None
-    except requests.exceptions.ConnectionError as e:
-        logger.error( f"Erreur de connexion à Sportmonks ({full_url}) : {e}" )
-        return None
-    except requests.exceptions.Timeout as e:
-        logger.error( f"Délai d'attente expiré lors de l'appel à Sportmonks ({full_url}) : {e}" )
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.error( f"Erreur inattendue lors de l'appel à Sportmonks ({full_url}) : {e}" )
-        return None
-    except Exception as e:
-        logger.error( f"Erreur générale lors du traitement de la requête Sportmonks ({full_url}) : {e}" )
-        return None
+    return sportmonks_get( endpoint, params=params )
 
 
 def fetch_match_data_from_api(event_id):
@@ -72,6 +56,39 @@ def fetch_match_data_from_api(event_id):
     return None
 
 
+# Nombre maximal d'IDs par appel à l'endpoint multi-fixtures de Sportmonks.
+SPORTMONKS_MULTI_FIXTURES_LIMIT = getattr( settings, 'SPORTMONKS_MULTI_FIXTURES_LIMIT', 50 )
+
+
+def _fetch_fixtures_chunk(event_ids):
+    full_response = _make_sportmonks_request( f"fixtures/multi/{','.join( str( event_id ) for event_id in event_ids )}" )
+    if full_response:
+        return full_response.get( 'data' ) or []
+    return None
+
+
+def fetch_matches_data_from_api(event_ids, workers=None):
+    """
+    Récupère plusieurs fixtures en lot via 'fixtures/multi/{ids}', par paquets de
+    SPORTMONKS_MULTI_FIXTURES_LIMIT IDs (les paquets sont demandés en parallèle).
+    Retourne un dictionnaire {event_id: données du match} ; les IDs absents de la
+    réponse ou dont le paquet a échoué valent None.
+    """
+    unique_ids = list( dict.fromkeys( int( event_id ) for event_id in event_ids ) )
+    chunks = [tuple( unique_ids[i:i + SPORTMONKS_MULTI_FIXTURES_LIMIT] )
+              for i in range( 0, len( unique_ids ), SPORTMONKS_MULTI_FIXTURES_LIMIT )]
+
+    results = dict.fromkeys( unique_ids )
+    for chunk, fixtures in map_concurrently( _fetch_fixtures_chunk, chunks, workers=workers ):
+        if fixtures is None:
+            logger.warning( f"Échec de la récupération groupée des fixtures {list( chunk )}." )
+            continue
+        for fixture in fixtures:
+            if fixture.get( 'id' ) in results:
+                results[fixture['id']] = fixture
+    return results
+
+
 def fetch_league_name_from_api(league_id):
     """
     Récupère le nom d'une ligue à partir de son ID.
@@ -96,165 +113,114 @@ def fetch_venue_name_from_api(venue_id):
     return "N/A"
 
 
-def update_pronostic_from_api_data(pronostic: Pronostic):
+def _apply_fixture_to_match(match: Match, match_data):
     """
-    Met à jour un objet Pronostic avec les données de score et de statut
-    récupérées de l'API Sportmonks.
+    Reporte sur le Match le score final et le statut d'une fixture Sportmonks terminée
+    ou annulée, en une seule sauvegarde.
+    Retourne (home_score, away_score, annulé) ou None si le match ne peut pas encore être réglé.
     """
-    if not pronostic.match:
-        logger.warning( f"Le pronostic ID {pronostic.pk} n'a pas de match associé. Impossible de mettre à jour." )
-        return False
-
-    match_data = fetch_match_data_from_api( pronostic.match.api_event_id )
-
-    if not match_data:
-        logger.warning(
-            f"Aucune donnée trouvée de Sportmonks pour l'ID d'événement API {pronostic.match.api_event_id}." )
-        return False
-
-    is_finished = match_data.get( 'finished' )
+    # L'API v3 ne fournit pas de booléen 'finished' : la finalité se lit sur state_id,
+    # comme pour les matchs réglés localement (split_locally_final_matches).
     sportmonks_status_id = match_data.get( 'state_id' )
 
-    FINAL_STATE_IDS = [3, 4, 5]
-    CANCELLED_STATE_IDS = [6, 7, 8, 9, 10]
-
-    if not is_finished and sportmonks_status_id not in CANCELLED_STATE_IDS:
+    if sportmonks_status_id not in FINAL_STATE_IDS and sportmonks_status_id not in CANCELLED_STATE_IDS:
         logger.info(
-            f"Le match ID {pronostic.match.api_event_id} n'est pas terminé ou son statut est incertain (Sportmonks state_id: {sportmonks_status_id})." )
-        return False
+            f"Le match ID {match.api_event_id} n'est pas terminé ou son statut est incertain (Sportmonks state_id: {sportmonks_status_id})." )
+        return None
 
-    scores_data = match_data.get( 'scores', {} )
-    fulltime_scores = scores_data.get( 'fulltime', {} )
+    # Les sous-objets peuvent être présents mais nuls (null) dans la réponse.
+    scores_data = match_data.get( 'scores' ) or {}
+    fulltime_scores = scores_data.get( 'fulltime' ) or {}
     home_score = fulltime_scores.get( 'home' )
     away_score = fulltime_scores.get( 'away' )
 
-    if home_score is None or away_score is None:
+    cancelled = sportmonks_status_id in CANCELLED_STATE_IDS
+    # Un match annulé avant son terme n'a pas forcément de score : ses pronostics sont annulés.
+    if not cancelled and (home_score is None or away_score is None):
         logger.warning(
-            f"Scores finaux non disponibles de Sportmonks pour l'ID d'événement API {pronostic.match.api_event_id}." )
-        return False
+            f"Scores finaux non disponibles de Sportmonks pour l'ID d'événement API {match.api_event_id}." )
+        return None
 
-    pronostic.match.score_final_domicile = home_score
-    pronostic.match.score_final_exterieur = away_score
-    status_api_name = match_data.get( 'state', {} ).get( 'name' )
-    status_api_id = match_data.get( 'state_id' )
-    pronostic.match.status_api = status_api_name or str( status_api_id )
-    pronostic.match.save()
+    match.score_final_domicile = home_score
+    match.score_final_exterieur = away_score
+    status_api_name = (match_data.get( 'state' ) or {}).get( 'name' )
+    match.status_api = status_api_name or str( sportmonks_status_id )
+    match.save()
 
-    new_resultat = pronostic.resultat
+    return home_score, away_score, cancelled
 
-    if sportmonks_status_id in CANCELLED_STATE_IDS:
-        new_resultat = 'ANNULE'
-    else:
-        total_goals = home_score + away_score
-
-        if pronostic.type_pari == '1N2':
-            if home_score > away_score:
-                real_outcome = '1'
-            elif away_score > home_score:
-                real_outcome = '2'
-            else:
-                real_outcome = 'N'
-
-            if real_outcome in pronostic.prediction_details.upper():
-                new_resultat = 'GAGNANT'
-            else:
-                new_resultat = 'PERDANT'
-
-        elif pronostic.type_pari == 'OVER_UNDER':
-            try:
-                parts = pronostic.prediction_details.split( ' ' )
-                if len( parts ) >= 2:
-                    direction = parts[0].strip().upper()
-                    line = float( parts[1].strip() )
-
-                    if direction == 'OVER':
-                        if total_goals > line:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    elif direction == 'UNDER':
-                        if total_goals < line:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    else:
-                        logger.warning(
-                            f"Type OVER_UNDER mal formaté pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                        new_resultat = pronostic.resultat
-                else:
-                    logger.warning(
-                        f"Format de prédiction OVER_UNDER insuffisant pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                    new_resultat = pronostic.resultat
-            except (ValueError, IndexError):
-                logger.error(
-                    f"Impossible de parser la ligne OVER_UNDER pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                new_resultat = pronostic.resultat
-
-        elif pronostic.type_pari == 'BUTEUR':
+
+def _compute_resultat(pronostic: Pronostic, home_score, away_score, cancelled):
+    """
+    Détermine le nouveau statut d'un pronostic à partir du score final de son match
+    et de sa spécification structurée (colonnes pari_*, renseignées par PronosticForm).
+    Retourne le statut actuel si le pari ne peut pas être réglé automatiquement.
+    """
+    if cancelled:
+        return 'ANNULE'
+
+    new_resultat = settle_bet(
+        pronostic.type_pari,
+        pronostic.pari_selection,
+        pronostic.pari_ligne,
+        pronostic.pari_camp,
+        pronostic.pari_handicap,
+        pronostic.pari_score_domicile,
+        pronostic.pari_score_exterieur,
+        home_score,
+        away_score,
+    )
+    if new_resultat is None:
+        if pronostic.type_pari in AUTO_SETTLED_TYPES:
+            logger.warning(
+                f"Spécification de pari manquante pour le pronostic {pronostic.pk} ({pronostic.type_pari}) : règlement manuel nécessaire." )
+        else:
             logger.info(
-                f"Le type de pari 'BUTEUR' pour le pronostic {pronostic.pk} nécessite une vérification manuelle ou une logique API plus complexe." )
-            new_resultat = pronostic.resultat
-
-        elif pronostic.type_pari == 'HANDICAP':
-            try:
-                if 'handicap' in pronostic.prediction_details.lower():
-                    if pronostic.equipe_domicile in pronostic.prediction_details and '-' in pronostic.prediction_details:
-                        handicap_val = float( pronostic.prediction_details.split( '-' )[1].split( ' ' )[0] )
-                        if (home_score - handicap_val) > away_score:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    elif pronostic.equipe_exterieur in pronostic.prediction_details and '-' in pronostic.prediction_details:
-                        handicap_val = float( pronostic.prediction_details.split( '-' )[1].split( ' ' )[0] )
-                        if (away_score - handicap_val) > home_score:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    elif pronostic.equipe_domicile in pronostic.prediction_details and '+' in pronostic.prediction_details:
-                        handicap_val = float( pronostic.prediction_details.split( '+' )[1].split( ' ' )[0] )
-                        if (home_score + handicap_val) > away_score:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    elif pronostic.equipe_exterieur in pronostic.prediction_details and '+' in pronostic.prediction_details:
-                        handicap_val = float( pronostic.prediction_details.split( '+' )[1].split( ' ' )[0] )
-                        if (away_score + handicap_val) > home_score:
-                            new_resultat = 'GAGNANT'
-                        else:
-                            new_resultat = 'PERDANT'
-                    else:
-                        logger.warning(
-                            f"Format de prédiction HANDICAP inconnu pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                        new_resultat = pronostic.resultat
-                else:
-                    logger.warning(
-                        f"Le type de pari 'HANDICAP' pour le pronostic {pronostic.pk} est mal formaté ou non géré automatiquement." )
-                    new_resultat = pronostic.resultat
-            except (ValueError, IndexError):
-                logger.error(
-                    f"Erreur de parsing HANDICAP pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                new_resultat = pronostic.resultat
-
-        elif pronostic.type_pari == 'DOUBLE_CHANCE':
-            if "1N" in pronostic.prediction_details.upper():
-                if home_score >= away_score:
-                    new_resultat = 'GAGNANT'
-                else:
-                    new_resultat = 'PERDANT'
-            elif "12" in pronostic.prediction_details.upper():
-                if home_score != away_score:
-                    new_resultat = 'GAGNANT'
-                else:
-                    new_resultat = 'PERDANT'
-            elif "N2" in pronostic.prediction_details.upper():
-                if away_score >= home_score:
-                    new_resultat = 'GAGNANT'
-                else:
-                    new_resultat = 'PERDANT'
-            else:
-                logger.warning(
-                    f"Format de prédiction DOUBLE_CHANCE inconnu pour le pronostic {pronostic.pk}: {pronostic.prediction_details}" )
-                new_resultat = pronostic.resultat
+                f"Le type de pari '{pronostic.type_pari}' pour le pronostic {pronostic.pk} nécessite une vérification manuelle." )
+        return pronostic.resultat
+    return new_resultat
+
+
+def _local_final_score(match: Match):
+    """
+    Retourne (home_score, away_score, annulé) si le Match est déjà finalisé en base,
+    None s'il faut interroger l'API.
+    """
+    if is_cancelled_status( match.status_api ):
+        return match.score_final_domicile, match.score_final_exterieur, True
+    if is_final_status( match.status_api ) and match.score_final_domicile is not None \
+            and match.score_final_exterieur is not None:
+        return match.score_final_domicile, match.score_final_exterieur, False
+    return None
+
+
+def update_pronostic_from_api_data(pronostic: Pronostic, refresh_finished=False):
+    """
+    Met à jour un objet Pronostic avec les données de score et de statut
+    récupérées de l'API Sportmonks.
+    Un match déjà finalisé en base fait foi et n'est pas redemandé à l'API, sauf
+    avec refresh_finished=True (vérification d'une correction de score).
+    Pour régler de nombreux pronostics, préférer settle_pending_pronostics,
+    qui ne récupère chaque match qu'une seule fois.
+    """
+    if not pronostic.match:
+        logger.warning( f"Le pronostic ID {pronostic.pk} n'a pas de match associé. Impossible de mettre à jour." )
+        return False
+
+    final_score = None if refresh_finished else _local_final_score( pronostic.match )
+    if final_score is None:
+        match_data = fetch_match_data_from_api( pronostic.match.api_event_id )
+
+        if not match_data:
+            logger.warning(
+                f"Aucune donnée trouvée de Sportmonks pour l'ID d'événement API {pronostic.match.api_event_id}." )
+            return False
+
+        final_score = _apply_fixture_to_match( pronostic.match, match_data )
+        if final_score is None:
+            return False
+
+    new_resultat = _compute_resultat( pronostic, *final_score )
 
     if new_resultat != pronostic.resultat:
         pronostic.resultat = new_resultat
@@ -268,147 +234,733 @@ def update_pronostic_from_api_data(pronostic: Pronostic):
         return False
 
 
-def fetch_and_store_upcoming_matches(days_in_advance=7):
+def settle_pending_pronostics(pronostics, workers=None, refresh_finished=False):
     """
-    Récupère les matchs à venir depuis l'API Sportmonks pour les jours spécifiés
-    et les stocke/met à jour dans le modèle Match.
+    Règle un ensemble de pronostics en les regroupant par match.
+    Les matchs déjà finalisés en base (statut final et scores connus) font foi et
+    sont réglés sans appel réseau ; seuls les autres sont récupérés en lot via
+    l'endpoint multi-fixtures, chaque Match étant sauvegardé une seule fois.
+    refresh_finished=True redemande aussi les matchs finalisés, pour prendre en
+    compte une éventuelle correction de score.
+    Les pronostics des matchs terminés sont ensuite réglés par le moteur en lot
+    (settlement.settle_finished_matches).
+
+    Retourne un dictionnaire de compteurs par match et par pronostic.
+    """
+    stats = {
+        'matches_settled': 0,
+        'matches_settled_locally': 0,
+        'matches_pending': 0,
+        'matches_missing': 0,
+        'matches_failed': 0,
+        'pronostics_updated': 0,
+        'pronostics_unchanged': 0,
+        'pronostics_skipped': 0,
+    }
+
+    pronostics_per_match = dict(
+        pronostics.order_by().values_list( 'match_id' ).annotate( total=Count( 'pk' ) )
+    )
+    match_ids = [pk for pk in pronostics_per_match if pk]
+
+    if refresh_finished:
+        finished_match_ids, cancelled_match_ids, remote_match_ids = [], [], match_ids
+    else:
+        finished_match_ids, cancelled_match_ids, remote_match_ids = split_locally_final_matches( match_ids )
+        stats['matches_settled_locally'] = len( finished_match_ids )
+        if finished_match_ids:
+            logger.info( f"{len( finished_match_ids )} match(s) déjà finalisé(s) en base : réglés sans appel API." )
+
+    matches = {match.api_event_id: match for match in Match.objects.filter( pk__in=remote_match_ids )}
+    fixtures_data = fetch_matches_data_from_api( list( matches ), workers=workers ) if matches else {}
+    for api_event_id, match_data in fixtures_data.items():
+        match = matches[api_event_id]
+
+        if not match_data:
+            logger.warning( f"Aucune donnée trouvée de Sportmonks pour l'ID d'événement API {api_event_id}." )
+            stats['matches_missing'] += 1
+            stats['pronostics_skipped'] += pronostics_per_match[match.pk]
+            continue
+
+        try:
+            final_score = _apply_fixture_to_match( match, match_data )
+        except Exception as e:
+            # Une réponse inattendue pour un match ne bloque pas le règlement des autres.
+            logger.error( f"Erreur lors du traitement de la fixture Sportmonks {api_event_id} : {e}", exc_info=True )
+            stats['matches_failed'] += 1
+            stats['pronostics_skipped'] += pronostics_per_match[match.pk]
+            continue
+        if final_score is None:
+            stats['matches_pending'] += 1
+            stats['pronostics_skipped'] += pronostics_per_match[match.pk]
+            continue
+
+        finished_match_ids.append( match.pk )
+        if final_score[2]:
+            cancelled_match_ids.append( match.pk )
+
+    stats['matches_settled'] = len( finished_match_ids )
+    if finished_match_ids:
+        settlement = settle_finished_matches( finished_match_ids, cancelled_match_ids, pronostics=pronostics )
+        stats['pronostics_updated'] = settlement['settled']
+        stats['pronostics_unchanged'] = sum(
+            pronostics_per_match[match_pk] for match_pk in finished_match_ids ) - settlement['settled']
+    return stats
+
+
+# Champs que la réponse de liste 'fixtures/between' fournit déjà pour chaque match.
+# Si l'un d'eux est absent de la ligne de liste, on retombe sur l'appel de détail.
+LIST_PAYLOAD_FIELDS = ('id', 'name', 'starting_at', 'league_id', 'venue_id', 'state_id')
+
+
+def _fixture_has_list_fields(fixture):
+    """
+    Indique si une fixture issue de la liste paginée contient tous les champs
+    nécessaires pour construire un Match sans appel de détail.
+    """
+    return all( field in fixture for field in LIST_PAYLOAD_FIELDS )
+
+
+# Champs Sportmonks pris en compte dans l'empreinte de contenu d'un Match.
+HASHED_FIXTURE_FIELDS = LIST_PAYLOAD_FIELDS + ('scores', 'state')
+
+
+def _fixture_content_hash(fixture):
+    """
+    Calcule une empreinte compacte (32 caractères hexadécimaux) des champs Sportmonks
+    utilisés pour construire un Match. La ligne de liste et la réponse de détail
+    d'une même fixture inchangée produisent la même empreinte.
+    """
+    normalized = {field: fixture.get( field ) or None for field in HASHED_FIXTURE_FIELDS}
+    encoded = json.dumps( normalized, sort_keys=True, separators=(',', ':'), default=str )
+    return hashlib.blake2b( encoded.encode( 'utf-8' ), digest_size=16 ).hexdigest()
+
+
+def _parse_fixture_datetime(date_match_str):
+    """
+    Convertit le champ 'starting_at' de Sportmonks en datetime timezone-aware.
+    """
+    try:
+        # Tente de parser avec le format exact de votre exemple "YYYY-MM-DD HH:MM:SS"
+        naive_datetime = datetime.strptime( date_match_str, "%Y-%m-%d %H:%M:%S" )
+        return timezone.make_aware( naive_datetime, timezone.get_current_timezone() )
+    except ValueError:
+        # Si le format n'est pas le même (ex: contient 'Z' ou décalage), tente fromisoformat
+        parsed = datetime.fromisoformat( date_match_str.replace( 'Z', '+00:00' ) )
+        if timezone.is_aware( parsed ):
+            return parsed
+        return timezone.make_aware( parsed )
+
+
+def _build_match_defaults(fixture):
+    """
+    Construit le dictionnaire 'defaults' d'un Match à partir d'une fixture Sportmonks
+    (ligne de liste ou réponse de détail, les deux ont la même forme).
+    """
+    sportmonks_id = fixture.get( 'id' )
+    date_match = _parse_fixture_datetime( fixture.get( 'starting_at' ) )
+
+    home_team_name = "N/A"
+    away_team_name = "N/A"
+
+    # --- EXTRACTION DES DONNÉES BASÉE SUR VOTRE EXEMPLE JSON ---
+    # Noms des équipes : extraire de la chaîne 'name'
+    fixture_name = fixture.get( 'name', '' )
+    if ' vs ' in fixture_name:
+        parts = fixture_name.split( ' vs ' )
+        if len( parts ) == 2:
+            home_team_name = parts[0].strip()
+            away_team_name = parts[1].strip()
+    else:
+        home_team_name = fixture_name  # Fallback si pas de 'vs'
+        logger.warning( f"Format de nom de fixture inattendu pour ID {sportmonks_id}: {fixture_name}" )
+
+    # Noms de la ligue et du stade : servis par le cache de référence
+    league_name = get_league_name( fixture.get( 'league_id' ) )
+    stadium_name = get_venue_name( fixture.get( 'venue_id' ) )
+
+    return {
+        'discipline': 'FOOTBALL',
+        'equipe_domicile': home_team_name,
+        'equipe_exterieur': away_team_name,
+        'date_match': date_match,
+        'ligue': league_name,
+        'stade': stadium_name,
+        **_fixture_live_fields( fixture ),
+    }
+
+
+# Champs d'un Match qui évoluent pendant la rencontre (score et statut).
+# Le score courant va dans score_live_* ; score_final_* n'est renseigné qu'à un état final
+# (FINAL_STATE_IDS), de sorte que le règlement local ne lise jamais un score en cours.
+LIVE_MATCH_FIELDS = (
+    'score_live_domicile', 'score_live_exterieur', 'score_final_domicile', 'score_final_exterieur', 'status_api',
+)
+
+
+def _fixture_live_fields(fixture):
+    """
+    Extrait d'une fixture Sportmonks le score courant, le score final (seulement si
+    l'état est final) et le statut à enregistrer sur le Match.
+    """
+    scores_data = fixture.get( 'scores' ) or {}
+    if isinstance( scores_data, dict ):
+        current_scores = scores_data.get( 'fulltime' ) or scores_data.get( 'current' ) or {}
+    else:
+        current_scores = {}
+
+    status_api_name = (fixture.get( 'state' ) or {}).get( 'name' )
+    status_api_id = fixture.get( 'state_id' )
+    final_scores = current_scores if status_api_id in FINAL_STATE_IDS else {}
+
+    return {
+        'score_live_domicile': current_scores.get( 'home' ),
+        'score_live_exterieur': current_scores.get( 'away' ),
+        'score_final_domicile': final_scores.get( 'home' ),
+        'score_final_exterieur': final_scores.get( 'away' ),
+        'status_api': status_api_name or str( status_api_id ),
+    }
+
+
+# Champs réécrits lorsqu'un Match existant est retrouvé lors de l'upsert en lot.
+MATCH_UPSERT_FIELDS = [
+    'discipline', 'equipe_domicile', 'equipe_exterieur', 'date_match', 'ligue', 'stade',
+    *LIVE_MATCH_FIELDS, 'payload_hash', 'date_derniere_synchro',
+    'date_mise_a_jour',
+]
+
+
+def _upsert_matches(rows):
+    """
+    Insère ou met à jour en lot les Match d'une page, dans une seule transaction.
+    `rows` associe chaque api_event_id à son dictionnaire 'defaults'.
     Retourne le nombre de matchs ajoutés et mis à jour.
     """
+    if not rows:
+        return 0, 0
+
+    with transaction.atomic():
+        existing_ids = set( Match.objects.filter( api_event_id__in=rows.keys() ).values_list( 'api_event_id', flat=True ) )
+        Match.objects.bulk_create(
+            [Match( api_event_id=api_event_id, **defaults ) for api_event_id, defaults in rows.items()],
+            update_conflicts=True,
+            unique_fields=['api_event_id'],
+            update_fields=MATCH_UPSERT_FIELDS,
+        )
+
+    # bulk_create ne déclenche pas post_save : les pronostics des matchs réécrits
+    # (équipes, ligue) sont réindexés ici.
+    if existing_ids:
+        reindex_pronostics( Pronostic.objects.filter( match__api_event_id__in=existing_ids ) )
+
+    for api_event_id, defaults in rows.items():
+        if api_event_id in existing_ids:
+            logger.info(
+                f"Match mis à jour : {defaults['equipe_domicile']} vs {defaults['equipe_exterieur']} ({defaults['ligue']})" )
+        else:
+            logger.info(
+                f"Match ajouté : {defaults['equipe_domicile']} vs {defaults['equipe_exterieur']} ({defaults['ligue']})" )
+
+    return len( rows ) - len( existing_ids ), len( existing_ids )
+
+
+def _in_date_window(fixture, date_window):
+    """
+    Vrai si la fixture commence dans `date_window` (date de début, date de fin incluses),
+    comparé comme 'fixtures/between' sur la date de 'starting_at'. Sans fenêtre, ou si la
+    date n'est pas connue (ligne de liste incomplète), la fixture est conservée.
+    """
+    if date_window is None or not fixture.get( 'starting_at' ):
+        return True
+    start_date, end_date = date_window
+    return start_date.isoformat() <= str( fixture['starting_at'] )[:10] <= end_date.isoformat()
+
+
+def _store_fixtures_page(fixtures_list_data, fetch_details=False, workers=None, date_window=None):
+    """
+    Traite une page de fixtures Sportmonks : récupère les détails manquants, écarte
+    les fixtures inchangées, résout ligues et stades puis écrit la page en lot.
+    Avec `date_window`, les fixtures qui commencent hors de la fenêtre sont ignorées.
+    Retourne (ajoutés, mis à jour, inchangés, détails récupérés).
+    """
+    if date_window is not None:
+        fixtures_list_data = [fixture for fixture in fixtures_list_data if _in_date_window( fixture, date_window )]
+    # Deuxième étape (uniquement si nécessaire) : Récupérer les détails complets des fixtures
+    # incomplètes, en lot via l'endpoint multi-fixtures.
+    detail_ids = [
+        basic_fixture_info['id'] for basic_fixture_info in fixtures_list_data
+        if basic_fixture_info.get( 'id' ) and (fetch_details or not _fixture_has_list_fields( basic_fixture_info ))
+    ]
+    detailed_fixtures = fetch_matches_data_from_api( detail_ids, workers=workers ) if detail_ids else {}
+
+    # Fixtures à traiter, dans l'ordre de la page (détail si récupéré, sinon ligne de liste)
+    page_fixtures = []
+    for basic_fixture_info in fixtures_list_data:
+        fixture_id = basic_fixture_info.get( 'id' )
+        if not fixture_id:
+            logger.warning( f"Fixture sans ID trouvée. Ignorée : {basic_fixture_info}" )
+            continue
+
+        if fixture_id in detailed_fixtures:
+            fixture = detailed_fixtures[fixture_id]
+            if not fixture:
+                logger.warning( f"Impossible de récupérer les détails pour la fixture ID {fixture_id}. Ignorée." )
+                continue
+        else:
+            fixture = basic_fixture_info
+        if not _in_date_window( fixture, date_window ):
+            continue
+        page_fixtures.append( fixture )
+
+    # Détection des changements : les fixtures dont l'empreinte est identique à celle
+    # stockée ne sont ni résolues (ligue, stade) ni réécrites.
+    stored_hashes = dict( Match.objects.filter(
+        api_event_id__in=[fixture.get( 'id' ) for fixture in page_fixtures]
+    ).values_list( 'api_event_id', 'payload_hash' ) )
+    unchanged_ids = []
+    changed_fixtures = []
+    for fixture in page_fixtures:
+        content_hash = _fixture_content_hash( fixture )
+        if stored_hashes.get( fixture.get( 'id' ) ) == content_hash:
+            unchanged_ids.append( fixture.get( 'id' ) )
+            continue
+        changed_fixtures.append( (fixture, content_hash) )
+    unchanged_count = len( unchanged_ids )
+
+    # Les lignes inchangées ne sont pas réécrites, mais leur dernier passage est noté
+    # (un seul UPDATE, date_mise_a_jour intacte) : elles restent fraîches pour resolve_match.
+    synced_at = timezone.now()
+    if unchanged_ids:
+        Match.objects.filter( api_event_id__in=unchanged_ids ).update( date_derniere_synchro=synced_at )
+
+    # Résout en lot les ligues et stades des fixtures modifiées (LRU, puis base, puis API)
+    prefetch_references( [fixture for fixture, content_hash in changed_fixtures] )
+
+    # Construction des lignes de la page sur le thread principal, dans l'ordre de la page.
+    page_rows = {}
+    for fixture, content_hash in changed_fixtures:
+        logger.debug( f"Traitement de la fixture: {fixture}" )
+
+        try:
+            defaults = _build_match_defaults( fixture )
+            # L'empreinte ne couvre pas les noms résolus : une ligue ou un stade non résolu
+            # (API en erreur, cache négatif) n'enregistre pas d'empreinte, pour que la
+            # prochaine synchronisation réécrive la ligne au lieu de garder « N/A ».
+            unresolved = (fixture.get( 'league_id' ) and defaults['ligue'] == NOT_AVAILABLE) or \
+                         (fixture.get( 'venue_id' ) and defaults['stade'] == NOT_AVAILABLE)
+            defaults['payload_hash'] = '' if unresolved else content_hash
+            defaults['date_derniere_synchro'] = synced_at
+            page_rows[fixture.get( 'id' )] = defaults
+        except Exception as e:
+            logger.error( f"Erreur lors du traitement d'une fixture Sportmonks (ID: {fixture.get( 'id' )}): {e}",
+                          exc_info=True )
+
+    # Écriture de toute la page en une seule transaction
+    db_started_at = time.monotonic()
+    added_count, updated_count = _upsert_matches( page_rows )
+    logger.debug( f"Écriture en base de {len( page_rows )} match(s) en {(time.monotonic() - db_started_at) * 1000:.0f}ms" )
+    return added_count, updated_count, unchanged_count, len( detail_ids )
+
+
+# Lecture en flux des pages de liste : les fixtures sont décodées une à une et
+# enregistrées par lots de SPORTMONKS_STREAM_BATCH_SIZE, sans charger la page entière.
+SPORTMONKS_STREAM_PAGES = getattr( settings, 'SPORTMONKS_STREAM_PAGES', False )
+SPORTMONKS_STREAM_BATCH_SIZE = getattr( settings, 'SPORTMONKS_STREAM_BATCH_SIZE', 50 )
+# Une fois last_page connu (après la page 1), les pages suivantes sont récupérées en
+# parallèle sous le limiteur de débit, puis enregistrées dans l'ordre.
+SPORTMONKS_PREFETCH_PAGES = getattr( settings, 'SPORTMONKS_PREFETCH_PAGES', True )
+# Nouvelles tentatives d'une page de liste en échec, sans reprendre toute la fenêtre.
+SPORTMONKS_PAGE_RETRIES = getattr( settings, 'SPORTMONKS_PAGE_RETRIES', 2 )
+SPORTMONKS_PAGE_RETRY_DELAY = getattr( settings, 'SPORTMONKS_PAGE_RETRY_DELAY', 2 )
+
+
+def _iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append( item )
+        if len( batch ) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _retry_page(fetch, url_endpoint, page):
+    """
+    Appelle fetch() tant qu'il retourne None, au plus 1 + SPORTMONKS_PAGE_RETRIES fois,
+    avec une attente doublée à chaque tentative.
+    """
+    for attempt in range( SPORTMONKS_PAGE_RETRIES + 1 ):
+        result = fetch()
+        if result is not None:
+            return result
+        if attempt < SPORTMONKS_PAGE_RETRIES:
+            delay = SPORTMONKS_PAGE_RETRY_DELAY * 2 ** attempt
+            logger.warning( f"Page {page} de {url_endpoint} non récupérée : nouvelle tentative dans {delay}s "
+                            f"({attempt + 1}/{SPORTMONKS_PAGE_RETRIES})." )
+            time.sleep( delay )
+    return None
+
+
+def _fetch_list_page(url_endpoint, page):
+    """
+    Récupère une page de liste complète, avec nouvelles tentatives. Retourne la réponse JSON ou None.
+    """
+    # AUCUN INCLUDE ICI pour la liste, car 'fixtures/between' ne les supporte pas.
+    return _retry_page( lambda: _make_sportmonks_request( url_endpoint, params={'page': page} ), url_endpoint, page )
+
+
+def _store_batches(batches, fetch_details=False, workers=None, date_window=None):
+    """
+    Enregistre des lots de fixtures. Retourne [ajoutés, mis à jour, inchangés, détails récupérés, fixtures lues].
+    """
+    counts = [0, 0, 0, 0, 0]
+    for fixtures_batch in batches:
+        batch_counts = _store_fixtures_page( fixtures_batch, fetch_details=fetch_details, workers=workers,
+                                             date_window=date_window )
+        counts = [total + count for total, count in zip( counts, (*batch_counts, len( fixtures_batch )) )]
+    return counts
+
+
+def _store_list_response(full_api_response_list, fetch_details=False, workers=None, date_window=None):
+    """
+    Enregistre une page de liste déjà récupérée.
+    Retourne (ajoutés, mis à jour, inchangés, détails récupérés, fixtures lues, meta).
+    """
+    fixtures_list_data = full_api_response_list.get( 'data' )
+    counts = _store_batches( [fixtures_list_data] if fixtures_list_data else [], fetch_details=fetch_details,
+                             workers=workers, date_window=date_window )
+    return (*counts, full_api_response_list.get( 'meta', {} ))
+
+
+def _stream_list_page(url_endpoint, page, fetch_details=False, workers=None, date_window=None):
+    """
+    Lit une page de liste en flux et l'enregistre par lots au fil de la lecture.
+    Retourne le même tuple que _store_list_response, ou None si la lecture a échoué.
+    Une page interrompue est rejouée en entier : les fixtures déjà écrites sont alors
+    reconnues inchangées (payload_hash).
+    """
+    streamed_page = sportmonks_stream( url_endpoint, params={'page': page} )
+    if streamed_page is None:
+        return None
+    counts = _store_batches( _iter_batches( streamed_page, SPORTMONKS_STREAM_BATCH_SIZE ),
+                             fetch_details=fetch_details, workers=workers, date_window=date_window )
+    if streamed_page.error is not None:
+        return None
+    return (*counts, streamed_page.meta)
+
+
+def _iter_stored_pages(url_endpoint, first_page, last_page, fetch_details=False, workers=None, stream=False,
+                       prefetch=False, date_window=None):
+    """
+    Enregistre les pages first_page à last_page dans l'ordre et produit (page, résultat),
+    le résultat valant None pour une page irrécupérable.
+    Avec prefetch, les pages sont récupérées en parallèle (au plus deux fois `workers`
+    pages en avance) ; les écritures restent sur le thread appelant. Le mode flux lit
+    toujours une page à la fois, pour garder une mémoire constante.
+    """
+    pages = range( first_page, last_page + 1 )
+    if prefetch and not stream:
+        fetched_pages = map_concurrently( lambda page: _fetch_list_page( url_endpoint, page ), pages,
+                                          workers=workers )
+        for page, full_api_response_list in fetched_pages:
+            if full_api_response_list is None:
+                yield page, None
+                return
+            yield page, _store_list_response( full_api_response_list, fetch_details=fetch_details, workers=workers,
+                                              date_window=date_window )
+        return
+
+    for page in pages:
+        if stream:
+            stored_page = _retry_page(
+                lambda: _stream_list_page( url_endpoint, page, fetch_details=fetch_details, workers=workers,
+                                           date_window=date_window ),
+                url_endpoint, page )
+        else:
+            full_api_response_list = _fetch_list_page( url_endpoint, page )
+            stored_page = None if full_api_response_list is None else _store_list_response(
+                full_api_response_list, fetch_details=fetch_details, workers=workers, date_window=date_window )
+        yield page, stored_page
+        if stored_page is None:
+            return
+
+
+def _ingest_fixtures_endpoint(url_endpoint, fetch_details=False, workers=None, stream=None, prefetch=None,
+                              date_window=None):
+    """
+    Parcourt toutes les pages d'un endpoint de liste de fixtures et les enregistre.
+    La page 1 donne last_page ; avec prefetch=True (par défaut SPORTMONKS_PREFETCH_PAGES),
+    les pages suivantes sont alors récupérées en parallèle et enregistrées dans l'ordre.
+    Avec stream=True (par défaut SPORTMONKS_STREAM_PAGES), chaque page est décodée au
+    fil de la lecture : la mémoire reste constante quelle que soit la taille des pages.
+    Une page en échec est retentée seule (SPORTMONKS_PAGE_RETRIES).
+    Avec `date_window` (date de début, date de fin), seules les fixtures qui commencent
+    dans la fenêtre sont enregistrées.
+    Retourne (ajoutés, mis à jour, inchangés, terminé) ; `terminé` vaut False si
+    une page n'a pas pu être récupérée.
+    """
+    if stream is None:
+        stream = SPORTMONKS_STREAM_PAGES
+    if prefetch is None:
+        prefetch = SPORTMONKS_PREFETCH_PAGES
+
     added_count = 0
     updated_count = 0
+    unchanged_count = 0
+
+    first_page, last_page = 1, 1
+    while first_page <= last_page:
+        known_last_page = last_page
+        page_started_at = time.monotonic()
+        page_calls_before = get_request_count()
 
+        # Première étape : Récupérer la liste de base des fixtures (sans includes détaillés)
+        for page, stored_page in _iter_stored_pages(
+                url_endpoint, first_page, known_last_page, fetch_details=fetch_details, workers=workers,
+                stream=stream, prefetch=prefetch and first_page > 1, date_window=date_window ):
+            if stored_page is None:
+                logger.warning(
+                    f"Aucune réponse API reçue pour la page {page} de l'endpoint de liste. Cela peut indiquer une erreur ou la fin des pages." )
+                return added_count, updated_count, unchanged_count, False
+
+            page_added, page_updated, page_unchanged, page_details_fetched, page_size, meta_list = stored_page
+
+            if not page_size:
+                logger.warning(
+                    f"Aucun match trouvé dans la réponse API de liste pour la page {page}. Fin de la récupération." )
+                return added_count, updated_count, unchanged_count, True
+
+            added_count += page_added
+            updated_count += page_updated
+            unchanged_count += page_unchanged
+
+            logger.info(
+                f"Page {page} : {page_size} fixtures, "
+                f"{get_request_count() - page_calls_before} appels API, {page_details_fetched} détails demandés, "
+                f"{page_added} ajoutés / {page_updated} mis à jour / {page_unchanged} inchangés, "
+                f"{time.monotonic() - page_started_at:.2f}s" )
+            page_started_at = time.monotonic()
+            page_calls_before = get_request_count()
+
+            # Gérer la pagination pour la liste initiale des fixtures
+            if 'pagination' not in meta_list:
+                return added_count, updated_count, unchanged_count, True
+            last_page = max( last_page, meta_list['pagination'].get( 'last_page' ) or page )
+
+        first_page = known_last_page + 1
+        if first_page <= last_page:
+            logger.info( f"Pages {first_page} à {last_page} de la liste à récupérer"
+                         f"{' en parallèle' if prefetch and not stream else ''}." )
+
+    return added_count, updated_count, unchanged_count, True
+
+
+def _upcoming_date_window(days_in_advance):
     start_date = timezone.now().date()
-    end_date = start_date + timedelta( days=days_in_advance )
+    return start_date, start_date + timedelta( days=days_in_advance )
+
+
+def _fetch_upcoming_window(days_in_advance, fetch_details=False, workers=None, stream=None, prefetch=None):
+    """
+    Parcourt entièrement la fenêtre 'fixtures/between' d'aujourd'hui à aujourd'hui + days_in_advance.
+    """
+    start_date, end_date = _upcoming_date_window( days_in_advance )
 
     logger.info( f"Récupération des matchs Sportmonks entre {start_date} et {end_date}..." )
 
     url_endpoint = f"fixtures/between/{start_date.isoformat()}/{end_date.isoformat()}"
-    params = {
-        "page": 1,
-        # AUCUN INCLUDE ICI pour la liste, car 'fixtures/between' ne les supporte pas.
-    }
+    return _ingest_fixtures_endpoint( url_endpoint, fetch_details=fetch_details, workers=workers, stream=stream,
+                                      prefetch=prefetch )
 
-    while True:
-        # Première étape : Récupérer la liste de base des fixtures (sans includes détaillés)
-        full_api_response_list = _make_sportmonks_request( url_endpoint, params=params )
 
-        if not full_api_response_list:
-            logger.warning(
-                f"Aucune réponse API reçue pour la page {params['page']} de l'endpoint de liste. Cela peut indiquer une erreur ou la fin des pages." )
-            break
+def fetch_and_store_upcoming_matches(days_in_advance=7, fetch_details=False, workers=None, stream=None,
+                                     prefetch=None):
+    """
+    Récupère les matchs à venir depuis l'API Sportmonks pour les jours spécifiés
+    et les stocke/met à jour dans le modèle Match.
 
-        fixtures_list_data = full_api_response_list.get( 'data' )
-        meta_list = full_api_response_list.get( 'meta', {} )
+    Par défaut, les Match sont construits directement à partir de la liste paginée
+    'fixtures/between' : l'appel de détail 'fixtures/{id}' n'est fait que si un champ
+    de LIST_PAYLOAD_FIELDS manque dans la ligne de liste. Avec fetch_details=True,
+    chaque fixture est redemandée individuellement (ancien comportement).
+    Les appels de détail et de référence sont faits sur `workers` threads
+    (par défaut SPORTMONKS_WORKERS), sous le limiteur de débit partagé.
+    Avec stream=True (par défaut SPORTMONKS_STREAM_PAGES), les pages de liste sont
+    décodées au fil de la lecture et enregistrées par lots. Avec prefetch=True (par
+    défaut SPORTMONKS_PREFETCH_PAGES), les pages 2 et suivantes sont récupérées en
+    parallèle dès que la page 1 a donné leur nombre.
+
+    Les fixtures dont l'empreinte de contenu (payload_hash) n'a pas changé depuis
+    la dernière ingestion sont ignorées sans écriture.
+
+    Retourne le nombre de matchs ajoutés (nouveaux), mis à jour (modifiés) et inchangés.
+    """
+    added_count, updated_count, unchanged_count, completed = _fetch_upcoming_window(
+        days_in_advance, fetch_details=fetch_details, workers=workers, stream=stream, prefetch=prefetch )
+    return added_count, updated_count, unchanged_count
 
-        if not fixtures_list_data:
-            logger.warning(
-                f"Aucun match trouvé dans la réponse API de liste pour la page {params['page']}. Fin de la récupération." )
-            break
 
-        for basic_fixture_info in fixtures_list_data:
-            fixture_id = basic_fixture_info.get( 'id' )
-            if not fixture_id:
-                logger.warning( f"Fixture sans ID trouvée. Ignorée : {basic_fixture_info}" )
-                continue
+# --- Synchronisation incrémentale ---
+# Endpoint Sportmonks listant les fixtures récemment modifiées.
+SPORTMONKS_UPDATED_FIXTURES_ENDPOINT = getattr( settings, 'SPORTMONKS_UPDATED_FIXTURES_ENDPOINT', 'fixtures/latest' )
+# Période couverte par un appel au flux des fixtures modifiées.
+# 'fixtures/latest' ne prend pas de date de départ et ne renvoie que les fixtures modifiées
+# dans les 10 dernières secondes environ : deux passages espacés de plus que cela laissent
+# un trou dans lequel des modifications ont pu sortir du flux.
+SPORTMONKS_UPDATES_HORIZON = timedelta( seconds=getattr( settings, 'SPORTMONKS_UPDATES_HORIZON', 10 ) )
+# Intervalle maximal entre deux parcours complets de la fenêtre, même en mode incrémental.
+SPORTMONKS_FULL_SYNC_INTERVAL = timedelta( seconds=getattr( settings, 'SPORTMONKS_FULL_SYNC_INTERVAL', 6 * 60 * 60 ) )
 
-            # Deuxième étape : Récupérer les détails complets de chaque fixture
-            # Cette fonction 'fetch_match_data_from_api' n'a plus d'includes
-            detailed_fixture = fetch_match_data_from_api( fixture_id )
+FIXTURES_SYNC_KEY = 'fixtures'
+# Watermark du flux des fixtures modifiées, tenu à jour par poll_fixture_updates.
+FIXTURE_UPDATES_SYNC_KEY = 'fixture_updates'
 
-            if not detailed_fixture:
-                logger.warning( f"Impossible de récupérer les détails pour la fixture ID {fixture_id}. Ignorée." )
-                continue
 
-            # --- AJOUT DU LOG DE DÉBOGAGE ICI ---
-            # Cela imprimera la structure JSON de chaque fixture détaillée
-            logger.debug( f"Traitement de la fixture détaillée: {detailed_fixture}" )
-
-            try:
-                sportmonks_id = detailed_fixture.get( 'id' )
-                date_match_str = detailed_fixture.get( 'starting_at' )
-
-                # Correction : Rendre la date et l'heure timezone-aware
-                try:
-                    # Tente de parser avec le format exact de votre exemple "YYYY-MM-DD HH:MM:SS"
-                    naive_datetime = datetime.strptime( date_match_str, "%Y-%m-%d %H:%M:%S" )
-                    date_match = timezone.make_aware( naive_datetime, timezone.get_current_timezone() )
-                except ValueError:
-                    # Si le format n'est pas le même (ex: contient 'Z' ou décalage), tente fromisoformat
-                    date_match = timezone.make_aware(
-                        datetime.fromisoformat( date_match_str.replace( 'Z', '+00:00' ) ) )
-
-                home_team_name = "N/A"
-                away_team_name = "N/A"
-                league_name = "N/A"
-                stadium_name = "N/A"
-
-                # --- EXTRACTION DES DONNÉES BASÉE SUR VOTRE EXEMPLE JSON ---
-                # Noms des équipes : extraire de la chaîne 'name'
-                fixture_name = detailed_fixture.get( 'name', '' )
-                if ' vs ' in fixture_name:
-                    parts = fixture_name.split( ' vs ' )
-                    if len( parts ) == 2:
-                        home_team_name = parts[0].strip()
-                        away_team_name = parts[1].strip()
-                else:
-                    home_team_name = fixture_name  # Fallback si pas de 'vs'
-                    logger.warning( f"Format de nom de fixture inattendu pour ID {sportmonks_id}: {fixture_name}" )
-
-                # Nom de la ligue : faire un appel API séparé
-                league_id = detailed_fixture.get( 'league_id' )
-                league_name = fetch_league_name_from_api( league_id )
-
-                # Nom du stade : faire un appel API séparé
-                venue_id = detailed_fixture.get( 'venue_id' )
-                stadium_name = fetch_venue_name_from_api( venue_id )
-
-                scores_data = detailed_fixture.get( 'scores', {} )
-                fulltime_scores = scores_data.get( 'fulltime', {} )
-                score_final_domicile = fulltime_scores.get( 'home' )
-                score_final_exterieur = fulltime_scores.get( 'away' )
-
-                status_api_name = detailed_fixture.get( 'state', {} ).get( 'name' )
-                status_api_id = detailed_fixture.get( 'state_id' )
-                status_api = status_api_name or str( status_api_id )
-
-                match, created = Match.objects.update_or_create(  # CORRECTION APPLIQUÉE
-                    api_event_id=sportmonks_id,
-                    defaults={
-                        'discipline': 'FOOTBALL',
-                        'equipe_domicile': home_team_name,
-                        'equipe_exterieur': away_team_name,
-                        'date_match': date_match,
-                        'ligue': league_name,
-                        'stade': stadium_name,
-                        'score_final_domicile': score_final_domicile,
-                        'score_final_exterieur': score_final_exterieur,
-                        'status_api': status_api,
-                    }
-                )
-
-                if created:
-                    added_count += 1
-                    logger.info( f"Match ajouté : {home_team_name} vs {away_team_name} ({league_name})" )
-                else:
-                    updated_count += 1
-                    logger.info( f"Match mis à jour : {home_team_name} vs {away_team_name} ({league_name})" )
-
-            except Exception as e:
-                logger.error( f"Erreur lors du traitement d'une fixture Sportmonks (ID: {fixture_id}): {e}",
-                              exc_info=True )
-
-        # Gérer la pagination pour la liste initiale des fixtures
-        if 'pagination' in meta_list:
-            pagination_info = meta_list['pagination']
-            current_page = pagination_info.get( 'current_page' )
-            last_page = pagination_info.get( 'last_page' )
-
-            if current_page < last_page:
-                params['page'] = current_page + 1
-                logger.info( f"Passage à la page suivante de la liste: {params['page']}/{last_page}" )
-            else:
-                break
-        else:
-            break
+def _record_updates_poll(polled_at):
+    """
+    Enregistre un passage réussi sur le flux des fixtures modifiées, commencé à `polled_at`.
+    Si le passage précédent date de moins de SPORTMONKS_UPDATES_HORIZON, la série continue
+    est prolongée ; sinon, une nouvelle série commence à polled_at - SPORTMONKS_UPDATES_HORIZON.
+    """
+    with transaction.atomic():
+        feed_state, _ = SyncState.objects.select_for_update().get_or_create( key=FIXTURE_UPDATES_SYNC_KEY )
+        if feed_state.last_synced_at is not None and polled_at <= feed_state.last_synced_at:
+            return
+        if (feed_state.last_synced_at is None or feed_state.covered_since is None
+                or polled_at - feed_state.last_synced_at > SPORTMONKS_UPDATES_HORIZON):
+            feed_state.covered_since = polled_at - SPORTMONKS_UPDATES_HORIZON
+        feed_state.last_synced_at = polled_at
+        feed_state.save()
+
+
+def _updates_feed_covers(since, now):
+    """
+    Indique si le flux des fixtures modifiées a été suivi sans trou depuis `since` et si un
+    appel fait à `now` prolonge encore la série : toutes les modifications depuis `since`
+    sont alors déjà en base ou dans le prochain appel.
+    """
+    feed_state = SyncState.objects.filter( key=FIXTURE_UPDATES_SYNC_KEY ).first()
+    return (
+            since is not None
+            and feed_state is not None
+            and feed_state.covered_since is not None
+            and feed_state.last_synced_at is not None
+            and feed_state.covered_since <= since
+            and now - feed_state.last_synced_at <= SPORTMONKS_UPDATES_HORIZON
+    )
+
+
+def poll_fixture_updates(days_in_advance=7, fetch_details=False, workers=None):
+    """
+    Un passage sur le flux des fixtures modifiées (SPORTMONKS_UPDATED_FIXTURES_ENDPOINT) :
+    les fixtures qui commencent dans la fenêtre des days_in_advance prochains jours sont
+    enregistrées, puis le watermark du flux est avancé.
+    Appelé plus souvent que SPORTMONKS_UPDATES_HORIZON (commande poll_fixture_updates), il
+    maintient la série continue qui permet à sync_upcoming_matches de se passer du
+    parcours complet.
+
+    Retourne (ajoutés, mis à jour, inchangés), ou None si l'appel a échoué.
+    """
+    polled_at = timezone.now()
+    added_count, updated_count, unchanged_count, completed = _ingest_fixtures_endpoint(
+        SPORTMONKS_UPDATED_FIXTURES_ENDPOINT, fetch_details=fetch_details, workers=workers,
+        date_window=_upcoming_date_window( days_in_advance ) )
+    if not completed:
+        logger.warning( "Flux des fixtures modifiées incomplet : le watermark du flux n'a pas été avancé." )
+        return None
+    _record_updates_poll( polled_at )
+    return added_count, updated_count, unchanged_count
+
+
+def sync_upcoming_matches(days_in_advance=7, full=False, fetch_details=False, workers=None, stream=None):
+    """
+    Synchronise les Match avec Sportmonks à partir d'un watermark persistant (SyncState).
+
+    Le flux des fixtures modifiées ne couvre que SPORTMONKS_UPDATES_HORIZON : une
+    synchronisation planifiée toutes les quelques minutes ne peut pas s'en contenter seule.
+    Le mode incrémental n'est donc retenu que si poll_fixture_updates a suivi ce flux sans
+    trou depuis le début du dernier parcours complet ; seules les fixtures modifiées depuis
+    sont alors redemandées, et celles qui ne commencent pas dans la fenêtre des
+    days_in_advance prochains jours sont ignorées. Sinon (pas de suiveur, suiveur
+    interrompu), la fenêtre 'fixtures/between' est parcourue en entier, comme au premier
+    passage, avec full=True ou quand le dernier parcours complet date de plus de
+    SPORTMONKS_FULL_SYNC_INTERVAL.
+    Le watermark n'avance que si tout le parcours a réussi.
+
+    Retourne (ajoutés, mis à jour, inchangés, parcours_complet).
+    """
+    sync_state, _ = SyncState.objects.get_or_create( key=FIXTURES_SYNC_KEY )
+    sync_started_at = timezone.now()
+
+    full_scan = (
+            full
+            or sync_state.last_synced_at is None
+            or sync_state.last_full_sync_at is None
+            or sync_started_at - sync_state.last_full_sync_at > SPORTMONKS_FULL_SYNC_INTERVAL
+            or not _updates_feed_covers( sync_state.last_full_sync_at, sync_started_at )
+    )
+
+    if full_scan:
+        added_count, updated_count, unchanged_count, completed = _fetch_upcoming_window(
+            days_in_advance, fetch_details=fetch_details, workers=workers, stream=stream )
+    else:
+        logger.info( f"Synchronisation incrémentale des fixtures modifiées depuis {sync_state.last_synced_at}..." )
+        result = poll_fixture_updates( days_in_advance, fetch_details=fetch_details, workers=workers )
+        completed = result is not None
+        added_count, updated_count, unchanged_count = result or (0, 0, 0)
+
+    if completed:
+        sync_state.last_synced_at = sync_started_at
+        if full_scan:
+            sync_state.last_full_sync_at = sync_started_at
+        sync_state.save()
+    else:
+        logger.warning( "Synchronisation incomplète : le watermark n'a pas été avancé." )
+
+    return added_count, updated_count, unchanged_count, full_scan
+
+
+# --- Scores en direct ---
+# Flux Sportmonks renvoyant en une seule réponse toutes les fixtures en cours.
+SPORTMONKS_LIVESCORES_ENDPOINT = getattr( settings, 'SPORTMONKS_LIVESCORES_ENDPOINT', 'livescores/inplay' )
+
+
+def poll_livescores():
+    """
+    Met à jour le score et le statut de tous les matchs en cours en un seul appel au
+    flux livescores. Le flux est comparé aux Match en base et seules les lignes dont
+    le score ou le statut a changé sont écrites, en un seul bulk_update.
+    Les fixtures du flux absentes de la base sont ignorées (elles seront créées par
+    la synchronisation des matchs).
+
+    Retourne (fixtures en direct, matchs mis à jour, fixtures inconnues),
+    ou None si l'appel a échoué.
+    """
+    full_response = _make_sportmonks_request( SPORTMONKS_LIVESCORES_ENDPOINT )
+    if full_response is None:
+        logger.warning( "Flux livescores indisponible : aucun score en direct mis à jour." )
+        return None
 
-    return added_count, updated_count
+    live_fields = {fixture['id']: _fixture_live_fields( fixture )
+                   for fixture in full_response.get( 'data' ) or [] if fixture.get( 'id' )}
+
+    now = timezone.now()
+    changed = []
+    matches = Match.objects.filter( api_event_id__in=list( live_fields ) ).only( 'pk', 'api_event_id', *LIVE_MATCH_FIELDS )
+    for match in matches:
+        fields = live_fields[match.api_event_id]
+        if any( getattr( match, field ) != value for field, value in fields.items() ):
+            for field, value in fields.items():
+                setattr( match, field, value )
+            # bulk_update ne renseigne pas les champs auto_now.
+            match.date_mise_a_jour = now
+            changed.append( match )
+
+    if changed:
+        Match.objects.bulk_update( changed, [*LIVE_MATCH_FIELDS, 'date_mise_a_jour'], batch_size=500 )
+
+    unknown_count = len( live_fields ) - len( matches )
+    logger.info(
+        f"Livescores : {len( live_fields )} fixtures en direct, {len( changed )} matchs mis à jour, {unknown_count} inconnues." )
+    return len( live_fields ), len( changed ), unknown_count
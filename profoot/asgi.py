@@ -5,6 +5,13 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Le flux des scores en direct (vue live_scores_stream, Server-Sent Events) garde
+une connexion ouverte par page : il doit être servi par ce point d'entrée ASGI,
+par exemple avec un worker uvicorn sous gunicorn :
+    gunicorn profoot.asgi:application -k uvicorn.workers.UvicornWorker
+Sous WSGI, le flux n'est pas ouvert : les pages interrogent périodiquement
+la vue live_scores_poll.
 """
 
 import os
@@ -0,0 +1,254 @@
+# profoot/bet_spec.py
+
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+# Spécification structurée d'un pari, extraite une seule fois du texte libre
+# (prediction_details / prediction_score) lors de l'enregistrement du pronostic.
+# Le règlement travaille ensuite uniquement sur ces colonnes et sur les scores entiers.
+
+SELECTION_1N2 = ('1', 'N', '2')
+SELECTION_DOUBLE_CHANCE = ('1N', '12', 'N2')
+SELECTION_OVER_UNDER = ('OVER', 'UNDER')
+CAMP_DOMICILE = 'DOMICILE'
+CAMP_EXTERIEUR = 'EXTERIEUR'
+
+# Types de pari réglés automatiquement à partir du score final.
+AUTO_SETTLED_TYPES = ('1N2', 'OVER_UNDER', 'HANDICAP', 'DOUBLE_CHANCE', 'SCORE_EXACT')
+
+BET_SPEC_FIELDS = ('pari_selection', 'pari_ligne', 'pari_camp', 'pari_handicap',
+                   'pari_score_domicile', 'pari_score_exterieur')
+
+# La sélection n'est lue qu'à un endroit explicite : une ligne « Pari : ... » de l'analyse
+# (ou « Sélection : », « Choix : »), ou l'analyse entière lorsqu'elle se réduit à la
+# sélection (« 1 », « PSG -1.5 »). Chaque forme est ancrée sur toute la sélection : le
+# reste du texte libre n'est jamais interprété. Pour un type réglé automatiquement, une
+# sélection absente, ambiguë ou inexploitable est refusée (BetSpecError) : le formulaire
+# demande alors la ligne « Pari : ... » au lieu de laisser le pronostic sans règlement.
+_MARKER_RE = re.compile( r'^(?:PARI|SELECTION|CHOIX)\s*:\s*(.*)$', re.MULTILINE )
+_SELECTION_1N2_RE = re.compile( r'(1|N|X|2|NUL|MATCH NUL)' )
+_DOUBLE_CHANCE_RE = re.compile( r'(1N|N1|12|21|N2|2N|1X|X1|X2|2X)' )
+_TEAM_VICTORY_RE = re.compile( r"(?:VICTOIRE\s+(?:DE\s+|D')?)?(.+)" )
+_TEAM_DOUBLE_CHANCE_RE = re.compile( r'(?:DOUBLE\s+CHANCE\s+)?(.+)' )
+_OVER_UNDER_RE = re.compile( r'(OVER|UNDER|PLUS|MOINS)\s*(?:DE\s+)?(\d+(?:[.,]\d+)?)(?:\s*BUTS?)?' )
+_HANDICAP_RE = re.compile( r'(.+?)\s*([+-])\s*(\d+(?:[.,]\d+)?)' )
+_SCORE_RE = re.compile( r'(\d{1,2})\s*[-:]\s*(\d{1,2})' )
+
+_SELECTION_1N2_ALIASES = {'1': '1', 'N': 'N', 'X': 'N', 'NUL': 'N', 'MATCH NUL': 'N', '2': '2'}
+_DOUBLE_CHANCE_ALIASES = {
+    '1N': '1N', 'N1': '1N', '1X': '1N', 'X1': '1N',
+    '12': '12', '21': '12',
+    'N2': 'N2', '2N': 'N2', 'X2': 'N2', '2X': 'N2',
+}
+
+
+class BetSpecError( ValueError ):
+    """
+    Le texte du pronostic ne permet pas de déterminer le pari à régler.
+    `field` indique le champ du formulaire concerné.
+    """
+
+    def __init__(self, message, field='prediction_details'):
+        super().__init__( message )
+        self.field = field
+
+
+def empty_bet_spec():
+    return dict.fromkeys( BET_SPEC_FIELDS )
+
+
+def _normalize(text):
+    """
+    Majuscules sans accents, espaces réduits ligne par ligne : « Sélection :  Lens » -> « SELECTION : LENS ».
+    """
+    decomposed = unicodedata.normalize( 'NFKD', text or '' )
+    text = ''.join( char for char in decomposed if not unicodedata.combining( char ) ).upper()
+    lines = (' '.join( line.split() ) for line in text.splitlines())
+    return '\n'.join( line for line in lines if line )
+
+
+def _selection_text(details):
+    """
+    Sélection explicite de l'analyse, normalisée : (texte, True) pour une ligne marquée,
+    (texte, False) pour une analyse d'une seule ligne, (None, False) sinon.
+    """
+    text = _normalize( details )
+    markers = set( _MARKER_RE.findall( text ) )
+    if len( markers ) > 1:
+        raise BetSpecError( "Plusieurs sélections différentes sont indiquées : gardez une seule ligne « Pari : … »." )
+    if markers:
+        return markers.pop(), True
+    if text and '\n' not in text:
+        return text, False
+    return None, False
+
+
+def _team_side(text, equipe_domicile, equipe_exterieur):
+    """
+    Camp de l'équipe dont le nom complet est exactement `text` (None si aucune, ou si les
+    deux équipes portent le même nom).
+    """
+    sides = [side for side, equipe in ((CAMP_DOMICILE, equipe_domicile), (CAMP_EXTERIEUR, equipe_exterieur))
+             if equipe and _normalize( equipe ) == text]
+    return sides[0] if len( sides ) == 1 else None
+
+
+def _to_decimal(value):
+    try:
+        return Decimal( value.replace( ',', '.' ) )
+    except InvalidOperation:
+        raise BetSpecError( f"Valeur numérique invalide : {value}" )
+
+
+def _parse_selection(type_pari, selection, equipe_domicile, equipe_exterieur):
+    """
+    Spécification du pari décrit par `selection` (texte normalisé), ou None si la
+    sélection ne correspond exactement à aucune forme reconnue pour ce type de pari.
+    """
+    spec = empty_bet_spec()
+
+    if type_pari == '1N2':
+        code = _SELECTION_1N2_RE.fullmatch( selection )
+        team = _TEAM_VICTORY_RE.fullmatch( selection )
+        side = _team_side( team.group( 1 ), equipe_domicile, equipe_exterieur ) if team else None
+        if code:
+            spec['pari_selection'] = _SELECTION_1N2_ALIASES[code.group( 1 )]
+        elif side:
+            spec['pari_selection'] = '1' if side == CAMP_DOMICILE else '2'
+        else:
+            return None
+
+    elif type_pari == 'DOUBLE_CHANCE':
+        code = _DOUBLE_CHANCE_RE.fullmatch( selection )
+        # Sans code, « Double chance <équipe> » couvre la victoire de l'équipe ou le nul.
+        team = _TEAM_DOUBLE_CHANCE_RE.fullmatch( selection )
+        side = _team_side( team.group( 1 ), equipe_domicile, equipe_exterieur ) if team else None
+        if code:
+            spec['pari_selection'] = _DOUBLE_CHANCE_ALIASES[code.group( 1 )]
+        elif side:
+            spec['pari_selection'] = '1N' if side == CAMP_DOMICILE else 'N2'
+        else:
+            return None
+
+    elif type_pari == 'OVER_UNDER':
+        match = _OVER_UNDER_RE.fullmatch( selection )
+        if not match:
+            return None
+        spec['pari_selection'] = 'OVER' if match.group( 1 ) in ('OVER', 'PLUS') else 'UNDER'
+        spec['pari_ligne'] = _to_decimal( match.group( 2 ) )
+
+    elif type_pari == 'HANDICAP':
+        match = _HANDICAP_RE.fullmatch( selection )
+        side = _team_side( match.group( 1 ), equipe_domicile, equipe_exterieur ) if match else None
+        if not side:
+            return None
+        handicap = _to_decimal( match.group( 3 ) )
+        spec['pari_camp'] = side
+        spec['pari_handicap'] = -handicap if match.group( 2 ) == '-' else handicap
+
+    elif type_pari == 'SCORE_EXACT':
+        match = _SCORE_RE.fullmatch( selection )
+        if not match:
+            return None
+        spec['pari_score_domicile'] = int( match.group( 1 ) )
+        spec['pari_score_exterieur'] = int( match.group( 2 ) )
+
+    return spec
+
+
+_FORMAT_HINTS = {
+    '1N2': "Pari 1N2 : indiquez « Pari : 1 », « Pari : N » ou « Pari : 2 » (ou le nom exact de l'équipe choisie).",
+    'DOUBLE_CHANCE': "Pari Double Chance : indiquez « Pari : 1N », « Pari : 12 » ou « Pari : N2 » "
+                     "(ou le nom exact de l'équipe couverte).",
+    'OVER_UNDER': "Pari Over/Under : indiquez par exemple « Pari : OVER 2.5 » ou « Pari : UNDER 3.5 ».",
+    'HANDICAP': "Pari Handicap : indiquez le nom exact de l'équipe et le handicap, par exemple « Pari : PSG -1.5 ».",
+    'SCORE_EXACT': "Pari Score Exact : indiquez le score prédit, par exemple « 2-1 ».",
+}
+
+
+def parse_bet_spec(type_pari, prediction_details, prediction_score=None, equipe_domicile=None, equipe_exterieur=None):
+    """
+    Extrait la spécification structurée d'un pari de sa sélection explicite (ligne
+    « Pari : ... », analyse réduite à la sélection, ou score prédit pour un score exact).
+    Retourne un dictionnaire des champs BET_SPEC_FIELDS (None pour ceux qui ne
+    s'appliquent pas) ; la spécification est vide pour les types non réglés automatiquement.
+    Lève BetSpecError si la sélection d'un type réglé automatiquement est absente ou inexploitable.
+    """
+    if type_pari not in AUTO_SETTLED_TYPES:
+        return empty_bet_spec()
+
+    if type_pari == 'SCORE_EXACT' and (prediction_score or '').strip():
+        spec = _parse_selection( type_pari, _normalize( prediction_score ), equipe_domicile, equipe_exterieur )
+        if spec is None:
+            raise BetSpecError( _FORMAT_HINTS[type_pari], field='prediction_score' )
+        return spec
+
+    selection, explicit = _selection_text( prediction_details )
+    spec = _parse_selection( type_pari, selection, equipe_domicile, equipe_exterieur ) if selection else None
+    if spec is None:
+        raise BetSpecError( _FORMAT_HINTS[type_pari] if explicit or type_pari == 'SCORE_EXACT'
+                            else f"Sélection introuvable : ajoutez une ligne « Pari : … » à l'analyse. "
+                                 f"{_FORMAT_HINTS[type_pari]}",
+                            field='prediction_score' if type_pari == 'SCORE_EXACT' else 'prediction_details' )
+    return spec
+
+
+def settle_bet(type_pari, selection, ligne, camp, handicap, score_domicile_predit, score_exterieur_predit,
+               home_score, away_score):
+    """
+    Règle un pari à partir de sa spécification structurée et du score final.
+    Fonction pure : retourne 'GAGNANT', 'PERDANT', ou None si le pari ne peut pas
+    être réglé automatiquement (type non géré ou spécification absente).
+    """
+    if type_pari == '1N2':
+        if selection not in SELECTION_1N2:
+            return None
+        if home_score > away_score:
+            real_outcome = '1'
+        elif away_score > home_score:
+            real_outcome = '2'
+        else:
+            real_outcome = 'N'
+        won = selection == real_outcome
+
+    elif type_pari == 'DOUBLE_CHANCE':
+        if selection == '1N':
+            won = home_score >= away_score
+        elif selection == '12':
+            won = home_score != away_score
+        elif selection == 'N2':
+            won = away_score >= home_score
+        else:
+            return None
+
+    elif type_pari == 'OVER_UNDER':
+        if ligne is None:
+            return None
+        total_goals = home_score + away_score
+        if selection == 'OVER':
+            won = total_goals > ligne
+        elif selection == 'UNDER':
+            won = total_goals < ligne
+        else:
+            return None
+
+    elif type_pari == 'HANDICAP':
+        if handicap is None:
+            return None
+        if camp == CAMP_DOMICILE:
+            won = (home_score + handicap) > away_score
+        elif camp == CAMP_EXTERIEUR:
+            won = (away_score + handicap) > home_score
+        else:
+            return None
+
+    elif type_pari == 'SCORE_EXACT':
+        if score_domicile_predit is None or score_exterieur_predit is None:
+            return None
+        won = home_score == score_domicile_predit and away_score == score_exterieur_predit
+
+    else:
+        return None
+
+    return 'GAGNANT' if won else 'PERDANT'
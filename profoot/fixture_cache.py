@@ -0,0 +1,162 @@
+# profoot/fixture_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from .sportmonks_client import CircuitBreaker, CircuitOpenError, SportmonksClientError, sportmonks_get
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Cache « stale-while-revalidate » des fixtures Sportmonks demandées par les vues
+# (pré-remplissage du formulaire de pronostic) :
+#   - entrée fraîche (moins de EVENT_DETAILS_CACHE_TTL s) : servie telle quelle ;
+#   - entrée périmée (moins de EVENT_DETAILS_STALE_TTL s) : servie immédiatement,
+#     et rafraîchie en arrière-plan ;
+#   - absente : chargée en arrière-plan, la requête n'attend qu'EVENT_DETAILS_WAIT s.
+# Les appels passent par un disjoncteur : en cas de panne, les vues échouent vite
+# au lieu d'occuper un worker pendant les délais et nouvelles tentatives. Les réponses
+# 4xx (fixture inconnue...) ne comptent pas comme des pannes. Les noms de ligue et de
+# stade demandés par les vues passent par un second disjoncteur (references_breaker).
+# Ces appels puisent dans le budget de débit des vues (SPORTMONKS_INTERACTIVE_SHARE) :
+# budget épuisé, ils échouent aussitôt au lieu d'attendre derrière les traitements en lot.
+EVENT_DETAILS_CACHE_TTL = getattr( settings, 'EVENT_DETAILS_CACHE_TTL', 60 )
+EVENT_DETAILS_STALE_TTL = getattr( settings, 'EVENT_DETAILS_STALE_TTL', 24 * 60 * 60 )
+EVENT_DETAILS_WAIT = getattr( settings, 'EVENT_DETAILS_WAIT', 3 )
+EVENT_DETAILS_CACHE_MAX_SIZE = getattr( settings, 'EVENT_DETAILS_CACHE_MAX_SIZE', 1024 )
+
+fixtures_breaker = CircuitBreaker( 'fixtures' )
+references_breaker = CircuitBreaker( 'references' )
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache LRU thread-safe qui sert une valeur périmée pendant son rafraîchissement
+    en arrière-plan. Un seul rafraîchissement est en cours par clé.
+    Le chargeur renvoie None en cas d'échec : la dernière bonne valeur est conservée.
+    """
+
+    def __init__(self, loader, ttl, stale_ttl, maxsize, workers=2):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # clé -> (valeur, chargée_à)
+        self._in_flight = {}  # clé -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor( max_workers=workers, thread_name_prefix='sportmonks-refresh' )
+        self.hits = self.stale_hits = self.misses = 0
+
+    def _load(self, key):
+        try:
+            value = self.loader( key )
+        except Exception as e:
+            logger.error( f"Erreur lors du rafraîchissement de la fixture {key} : {e}" )
+            value = None
+        with self._lock:
+            self._in_flight.pop( key, None )
+            if value is not None:
+                self._data[key] = (value, time.monotonic())
+                self._data.move_to_end( key )
+                while len( self._data ) > self.maxsize:
+                    self._data.popitem( last=False )
+        return value
+
+    def _refresh(self, key):
+        # Appelé sous self._lock.
+        future = self._in_flight.get( key )
+        if future is None:
+            future = self._executor.submit( self._load, key )
+            self._in_flight[key] = future
+        return future
+
+    def get(self, key, wait):
+        """
+        Retourne la valeur de `key`, éventuellement périmée, ou None si elle n'est
+        pas disponible dans les `wait` secondes.
+        """
+        with self._lock:
+            entry = self._data.get( key )
+            if entry is not None:
+                value, loaded_at = entry
+                age = time.monotonic() - loaded_at
+                if age < self.ttl:
+                    self.hits += 1
+                    self._data.move_to_end( key )
+                    return value
+                if age < self.stale_ttl:
+                    self.stale_hits += 1
+                    self._refresh( key )
+                    return value
+                del self._data[key]
+            self.misses += 1
+            future = self._refresh( key )
+        try:
+            return future.result( timeout=wait )
+        except FutureTimeoutError:
+            logger.warning( f"Fixture {key} non disponible après {wait} s : chargement poursuivi en arrière-plan." )
+            return None
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop( key, None )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len( self._data ),
+                'refreshing': len( self._in_flight ),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+            }
+
+
+def _load_fixture(event_id):
+    """
+    Récupère une fixture via le disjoncteur. Retourne le dictionnaire 'data' ou None.
+    """
+    try:
+        full_response = fixtures_breaker.call( sportmonks_get, f'fixtures/{event_id}', raise_client_errors=True,
+                                              interactive=True )
+    except CircuitOpenError as e:
+        logger.warning( f"{e} Fixture {event_id} non rafraîchie." )
+        return None
+    except SportmonksClientError as e:
+        logger.warning( f"{e} Fixture {event_id} introuvable." )
+        return None
+    if not full_response:
+        # Erreur réseau ou serveur, déjà journalisée et comptée par le disjoncteur.
+        return None
+    if not full_response.get( 'data' ):
+        logger.warning( f"API Sportmonks: Aucun résultat trouvé pour l'ID {event_id}. Réponse: {full_response}" )
+        return None
+    return full_response['data']
+
+
+fixtures_cache = StaleWhileRevalidateCache(
+    _load_fixture, EVENT_DETAILS_CACHE_TTL, EVENT_DETAILS_STALE_TTL, EVENT_DETAILS_CACHE_MAX_SIZE,
+)
+
+
+def get_fixture_payload(event_id, wait=EVENT_DETAILS_WAIT):
+    """
+    Retourne la dernière fixture Sportmonks connue pour `event_id` (éventuellement
+    périmée, rafraîchie en arrière-plan), ou None si elle n'est pas disponible à temps.
+    """
+    return fixtures_cache.get( str( event_id ), wait )
+
+
+def get_sportmonks_health():
+    """
+    État des disjoncteurs et du cache des fixtures, pour la supervision.
+    """
+    return {
+        'breakers': [fixtures_breaker.snapshot(), references_breaker.snapshot()],
+        'fixtures_cache': fixtures_cache.stats(),
+    }
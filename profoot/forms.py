@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django.contrib.auth import get_user_model
 from .models import Pronostic, Comment, BookmakerOffer, Match # <-- AJOUTEZ Match ici
+from .bet_spec import BetSpecError, parse_bet_spec
 from django.utils import timezone
 
 class CustomUserCreationForm(UserCreationForm):
@@ -83,6 +84,11 @@ class PronosticForm(forms.ModelForm):
             'bookmaker_recommande': "Bookmaker Recommandé",
             'lien_pari': "Lien Direct Vers le Pari",
         }
+        help_texts = {
+            'prediction_details': "Pour les paris 1N2, Over/Under, Handicap et Double Chance, indiquez votre "
+                                  "sélection sur une ligne « Pari : … » (ex. « Pari : 1 », « Pari : OVER 2.5 », "
+                                  "« Pari : <équipe> -1.5 ») ; pour un score exact, renseignez la prédiction de score.",
+        }
 
     # Méthode __init__ pour filtrer les options du champ 'match'
     def __init__(self, *args, **kwargs):
@@ -96,6 +102,32 @@ class PronosticForm(forms.ModelForm):
         #     Q(date_match__gte=timezone.now()) | Q(status_api='Live') # Adaptez 'Live' au statut Sportmonks
         # ).order_by('date_match')
 
+    def clean(self):
+        """
+        Extrait une seule fois la spécification structurée du pari (sélection, ligne,
+        équipe, handicap, score exact) de la sélection explicite saisie. Pour un type de
+        pari réglé automatiquement, une sélection absente ou inexploitable est refusée.
+        """
+        cleaned_data = super().clean()
+        match = cleaned_data.get('match')
+        try:
+            spec = parse_bet_spec(
+                cleaned_data.get('type_pari'),
+                cleaned_data.get('prediction_details'),
+                prediction_score=cleaned_data.get('prediction_score'),
+                equipe_domicile=match.equipe_domicile if match else cleaned_data.get('equipe_domicile'),
+                equipe_exterieur=match.equipe_exterieur if match else cleaned_data.get('equipe_exterieur'),
+            )
+        except BetSpecError as e:
+            self.add_error(e.field, str(e))
+            return cleaned_data
+
+        # Les colonnes pari_* ne font pas partie des champs du formulaire :
+        # elles sont posées directement sur l'instance enregistrée par save().
+        for field, value in spec.items():
+            setattr(self.instance, field, value)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
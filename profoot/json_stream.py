@@ -0,0 +1,129 @@
+# profoot/json_stream.py
+
+import codecs
+import json
+
+# Décodage JSON incrémental d'une réponse de liste Sportmonks ({"data": [...], "meta": {...}}).
+# Les éléments du tableau "data" sont décodés un par un (json.JSONDecoder.raw_decode)
+# au fil des morceaux reçus : seuls l'élément en cours et le morceau courant sont en
+# mémoire, quelle que soit la taille de la page ou la profondeur des includes.
+# Les autres clés de premier niveau (meta, pagination...) sont conservées dans `envelope`.
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789+-.eE'
+
+
+class _ChunkBuffer:
+    """
+    Tampon de texte alimenté à la demande par un itérable de morceaux (bytes ou str).
+    La partie déjà décodée est abandonnée à chaque remplissage.
+    """
+
+    def __init__(self, chunks, encoding='utf-8'):
+        self._chunks = iter( chunks )
+        self._decoder = codecs.getincrementaldecoder( encoding )()
+        self._json_decoder = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self):
+        """
+        Ajoute le morceau suivant au tampon. Retourne False si le flux est épuisé.
+        """
+        while not self.exhausted:
+            try:
+                chunk = next( self._chunks )
+            except StopIteration:
+                self.exhausted = True
+                chunk = self._decoder.decode( b'', final=True )
+            else:
+                if isinstance( chunk, bytes ):
+                    chunk = self._decoder.decode( chunk )
+            if chunk:
+                self.text = self.text[self.pos:] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """
+        Retourne le prochain caractère significatif (sans le consommer), ou '' en fin de flux.
+        """
+        while True:
+            while self.pos < len( self.text ) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len( self.text ):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def take(self, expected):
+        char = self.peek()
+        if not char or char not in expected:
+            raise ValueError( f"JSON invalide : {expected!r} attendu, {char or 'fin du flux'!r} trouvé." )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Décode la valeur JSON suivante, en lisant autant de morceaux que nécessaire.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode( self.text, self.pos )
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Un nombre en fin de tampon peut être tronqué (« 12 » de « 12.5 ») : on relit
+            # avec le morceau suivant.
+            if (isinstance( value, (int, float) ) and not isinstance( value, bool )
+                    and not self.text[end:].lstrip( _NUMBER_CHARS ) and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+class StreamedJSONObject:
+    """
+    Objet JSON de premier niveau dont le tableau `array_key` est décodé élément par élément.
+    L'itération ne peut être faite qu'une fois ; `envelope` (les autres clés) n'est complet
+    qu'une fois l'itération terminée.
+    """
+
+    def __init__(self, chunks, array_key='data', encoding='utf-8'):
+        self.array_key = array_key
+        self.envelope = {}
+        self._buffer = _ChunkBuffer( chunks, encoding=encoding )
+
+    def __iter__(self):
+        buffer = self._buffer
+        buffer.take( '{' )
+        if buffer.peek() == '}':
+            buffer.pos += 1
+            return
+        while True:
+            key = buffer.value()
+            if not isinstance( key, str ):
+                raise ValueError( f"JSON invalide : clé attendue, {key!r} trouvé." )
+            buffer.take( ':' )
+            if key == self.array_key and buffer.peek() == '[':
+                buffer.pos += 1
+                if buffer.peek() == ']':
+                    buffer.pos += 1
+                else:
+                    while True:
+                        yield buffer.value()
+                        if buffer.take( ',]' ) == ']':
+                            break
+            elif key == self.array_key:
+                # Réponse de détail ('data' est un objet) ou vide (null).
+                value = buffer.value()
+                if value is not None:
+                    yield value
+            else:
+                self.envelope[key] = buffer.value()
+            if buffer.take( ',}' ) == '}':
+                return
@@ -0,0 +1,137 @@
+# profoot/leaderboard.py
+
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Pronostic, TipsterRanking
+from .pagination import KeysetPage, page_number
+from .stats import COMPLETED_RESULTS, pronostic_stats_annotations
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Classement des tipsters (vue leaderboard), recalculé périodiquement par refresh_leaderboard :
+# pour chaque fenêtre, une requête GROUP BY (auteur, discipline, type de pari) sur les
+# pronostics réglés, puis cumul en Python pour les combinaisons « toutes disciplines » /
+# « tous types », classement par ROI, taux de réussite et profit, et réécriture de la
+# fenêtre dans TipsterRanking en une transaction. Une page du classement lit ensuite un
+# intervalle de rangs sur l'index (fenêtre, discipline, type_pari, rang).
+LEADERBOARD_WINDOWS = {'7': 7, '30': 30, '90': 90, 'all': None}
+LEADERBOARD_DEFAULT_WINDOW = '30'
+# Pronostics réglés nécessaires pour figurer au classement d'une fenêtre.
+LEADERBOARD_MIN_PRONOSTICS = getattr( settings, 'LEADERBOARD_MIN_PRONOSTICS', 5 )
+LEADERBOARD_PAGE_SIZE = getattr( settings, 'LEADERBOARD_PAGE_SIZE', 50 )
+
+# Critère de tri -> champ de rang
+RANKING_CRITERIA = {
+    'roi': 'rank_roi',
+    'taux_reussite': 'rank_taux_reussite',
+    'profit': 'rank_profit',
+}
+
+_TOTAL_FIELDS = ('total_completes', 'total_gagnants', 'mise_totale', 'profit_total')
+_CENT = Decimal( '0.01' )
+
+
+def _window_totals(cutoff):
+    """
+    Totaux des pronostics réglés depuis `cutoff` (None : depuis toujours), par
+    (discipline, type_pari, user_id) ; '' désigne toutes les disciplines / tous les types.
+    """
+    pronostics = Pronostic.objects.filter( resultat__in=COMPLETED_RESULTS, utilisateur__isnull=False )
+    if cutoff is not None:
+        pronostics = pronostics.filter( date_match__gte=cutoff )
+    annotations = pronostic_stats_annotations( prefix='' )
+    # order_by() vide : le tri par défaut de Pronostic ne doit pas entrer dans le GROUP BY.
+    rows = pronostics.values( 'utilisateur_id', 'discipline', 'type_pari' ).annotate(
+        **{field: annotations[field] for field in _TOTAL_FIELDS} ).order_by()
+
+    totals = {}
+    for row in rows.iterator():
+        for discipline in ('', row['discipline']):
+            for type_pari in ('', row['type_pari']):
+                key = (discipline, type_pari, row['utilisateur_id'])
+                current = totals.setdefault( key, dict.fromkeys( _TOTAL_FIELDS, 0 ) )
+                for field in _TOTAL_FIELDS:
+                    current[field] += row[field]
+    return totals
+
+
+def _rankings(window, totals, computed_at):
+    """
+    Lignes TipsterRanking de la fenêtre, rangs calculés par (discipline, type_pari).
+    À égalité, le tipster ayant le plus de pronostics réglés passe devant.
+    """
+    groups = {}
+    for (discipline, type_pari, user_id), values in totals.items():
+        if values['total_completes'] < LEADERBOARD_MIN_PRONOSTICS:
+            continue
+        mise, profit = Decimal( values['mise_totale'] ), Decimal( values['profit_total'] )
+        groups.setdefault( (discipline, type_pari), [] ).append( TipsterRanking(
+            window=window, discipline=discipline, type_pari=type_pari, user_id=user_id,
+            total_completes=values['total_completes'], total_gagnants=values['total_gagnants'],
+            mise_totale=mise, profit_total=profit,
+            roi=(profit / mise * 100).quantize( _CENT ) if mise else None,
+            taux_reussite=(Decimal( values['total_gagnants'] * 100 ) / values['total_completes']).quantize( _CENT ),
+            rank_roi=0, rank_taux_reussite=0, rank_profit=0, computed_at=computed_at,
+        ) )
+
+    sort_keys = {
+        # ROI indéfini (aucune mise renseignée) : en fin de classement.
+        'rank_roi': lambda entry: (entry.roi is None, -(entry.roi or 0)),
+        'rank_taux_reussite': lambda entry: (-entry.taux_reussite,),
+        'rank_profit': lambda entry: (-entry.profit_total,),
+    }
+    rankings = []
+    for entries in groups.values():
+        for rank_field, key in sort_keys.items():
+            ordered = sorted( entries, key=lambda entry: (*key( entry ), -entry.total_completes, entry.user_id) )
+            for rank, entry in enumerate( ordered, start=1 ):
+                setattr( entry, rank_field, rank )
+        rankings.extend( entries )
+    return rankings
+
+
+def refresh_leaderboard(windows=None, now=None):
+    """
+    Recalcule le classement des fenêtres demandées (par défaut, toutes).
+    Chaque fenêtre est remplacée en une transaction : les lecteurs voient l'ancien
+    classement ou le nouveau, jamais un mélange. Retourne {fenêtre: lignes écrites}.
+    """
+    now = now or timezone.now()
+    written = {}
+    for window in windows or LEADERBOARD_WINDOWS:
+        started_at = time.monotonic()
+        days = LEADERBOARD_WINDOWS[window]
+        totals = _window_totals( now - timedelta( days=days ) if days else None )
+        rankings = _rankings( window, totals, now )
+        with transaction.atomic():
+            TipsterRanking.objects.filter( window=window ).delete()
+            TipsterRanking.objects.bulk_create( rankings, batch_size=1000 )
+        written[window] = len( rankings )
+        logger.info( f"Classement '{window}' : {len( rankings )} ligne(s) écrite(s) en "
+                     f"{time.monotonic() - started_at:.2f} s." )
+    return written
+
+
+def leaderboard_page(params, window, discipline='', type_pari='', criterion='roi', per_page=LEADERBOARD_PAGE_SIZE):
+    """
+    Page ?page=N du classement : lecture des rangs ]offset, offset + per_page + 1] sur
+    l'index du critère (la ligne en plus indique s'il y a une page suivante).
+    """
+    rank_field = RANKING_CRITERIA[criterion]
+    number = page_number( params )
+    offset = (number - 1) * per_page
+    rows = list( TipsterRanking.objects.filter(
+        window=window, discipline=discipline, type_pari=type_pari, **{f'{rank_field}__gt': offset}
+    ).select_related( 'user' ).order_by( rank_field )[:per_page + 1] )
+    for row in rows:
+        row.rank = getattr( row, rank_field )
+    return KeysetPage( rows[:per_page], has_previous=number > 1, has_next=len( rows ) > per_page,
+                       number=number, max_page_number=None )
@@ -0,0 +1,182 @@
+# profoot/live_updates.py
+
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Match
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Diffusion des scores en direct par Server-Sent Events (vue live_scores_stream).
+# Un seul diffuseur par processus interroge la table Match à chaque intervalle pour
+# tous les clients connectés : une requête par tick, quel que soit le nombre de pages
+# ouvertes. Les Match sont tenus à jour par poll_livescores et par le règlement.
+# Le flux garde une connexion ouverte par page : il n'est servi que par le point d'entrée
+# ASGI (profoot/asgi.py). Sous WSGI, les pages interrogent à la place la vue
+# live_scores_poll toutes les LIVE_POLL_INTERVAL secondes.
+LIVE_STREAM_INTERVAL = getattr( settings, 'LIVE_STREAM_INTERVAL', 5 )  # secondes entre deux ticks
+LIVE_STREAM_KEEPALIVE = getattr( settings, 'LIVE_STREAM_KEEPALIVE', 15 )  # commentaire SSE anti-timeout
+LIVE_STREAM_MAX_MATCHES = getattr( settings, 'LIVE_STREAM_MAX_MATCHES', 50 )  # matchs suivis par connexion
+LIVE_POLL_INTERVAL = getattr( settings, 'LIVE_POLL_INTERVAL', 30 )  # secondes entre deux requêtes (repli WSGI)
+# Événements en attente par client ; au-delà, les plus récents sont perdus pour ce client lent.
+LIVE_STREAM_QUEUE_SIZE = 100
+
+# Score affiché : le score final une fois connu (règlement), sinon le score en direct.
+LIVE_FIELDS = ('score_final_domicile', 'score_final_exterieur', 'score_live_domicile', 'score_live_exterieur',
+               'status_api')
+
+
+def _score_event(match_id, final_home, final_away, live_home, live_away, status):
+    if final_home is not None and final_away is not None:
+        return {'match_id': match_id, 'home': final_home, 'away': final_away, 'status': status}
+    return {'match_id': match_id, 'home': live_home, 'away': live_away, 'status': status}
+
+
+class _Subscription:
+
+    def __init__(self, match_ids):
+        self.match_ids = frozenset( match_ids )
+        self.queue = asyncio.Queue( maxsize=LIVE_STREAM_QUEUE_SIZE )
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait( event )
+        except asyncio.QueueFull:
+            logger.debug( "File SSE pleine : événement ignoré pour un client lent." )
+
+
+class ScoreBroadcaster:
+    """
+    Diffuseur en mémoire des changements de score et de statut des Match.
+    La tâche d'interrogation démarre avec le premier abonné et s'arrête avec le dernier.
+    """
+
+    def __init__(self, interval=LIVE_STREAM_INTERVAL):
+        self.interval = interval
+        self._subscriptions = set()
+        self._snapshot = {}  # match_id -> événement (dernier état connu)
+        self._pending_ids = set()  # matchs suivis dont l'état n'a pas encore été lu
+        self._watermark = None
+        self._task = None
+
+    def subscribe(self, match_ids):
+        subscription = _Subscription( match_ids )
+        self._subscriptions.add( subscription )
+        for match_id in subscription.match_ids:
+            if match_id in self._snapshot:
+                subscription.push( self._snapshot[match_id] )
+            else:
+                self._pending_ids.add( match_id )
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task( self._run() )
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions.discard( subscription )
+        if not self._subscriptions:
+            self._snapshot.clear()
+            self._pending_ids.clear()
+            self._watermark = None
+
+    def _watched_ids(self):
+        watched = set()
+        for subscription in self._subscriptions:
+            watched |= subscription.match_ids
+        return watched
+
+    async def _fetch_changes(self, watched):
+        """
+        Une seule requête, limitée aux matchs suivis : ceux modifiés depuis le dernier
+        tick (index sur date_mise_a_jour), plus ceux nouvellement suivis dont l'état
+        n'est pas encore connu.
+        """
+        tick_started_at = timezone.now()
+        condition = Q( pk__in=list( self._pending_ids ) )
+        if self._watermark is not None:
+            condition |= Q( date_mise_a_jour__gte=self._watermark )
+        self._pending_ids = set()
+        rows = [row async for row in Match.objects.filter( condition, pk__in=list( watched ) )
+                .order_by().values_list( 'pk', *LIVE_FIELDS )]
+        self._watermark = tick_started_at
+        return rows
+
+    async def _tick(self):
+        watched = self._watched_ids()
+        if not watched:
+            return
+        for row in await self._fetch_changes( watched ):
+            event = _score_event( *row )
+            match_id = event['match_id']
+            if self._snapshot.get( match_id ) == event:
+                continue
+            self._snapshot[match_id] = event
+            for subscription in self._subscriptions:
+                if match_id in subscription.match_ids:
+                    subscription.push( event )
+
+    async def _run(self):
+        while self._subscriptions:
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.error( f"Erreur lors de la diffusion des scores en direct : {e}" )
+            await asyncio.sleep( self.interval )
+
+
+broadcaster = ScoreBroadcaster()
+
+
+def streaming_supported(request):
+    """
+    Indique si la requête est servie par le point d'entrée ASGI, seul capable de garder
+    le flux SSE ouvert sans bloquer un worker.
+    """
+    return isinstance( request, ASGIRequest )
+
+
+def parse_match_ids(raw_ids):
+    """
+    Convertit le paramètre ?matches=1,2,3 en liste d'IDs (au plus LIVE_STREAM_MAX_MATCHES).
+    """
+    match_ids = []
+    for raw_id in (raw_ids or '').split( ',' ):
+        raw_id = raw_id.strip()
+        if raw_id.isdigit():
+            match_ids.append( int( raw_id ) )
+    return match_ids[:LIVE_STREAM_MAX_MATCHES]
+
+
+async def stream_events(match_ids):
+    """
+    Générateur asynchrone des messages SSE d'une connexion, jusqu'à la déconnexion du client.
+    """
+    subscription = broadcaster.subscribe( match_ids )
+    try:
+        yield f"retry: {LIVE_STREAM_INTERVAL * 1000}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for( subscription.queue.get(), timeout=LIVE_STREAM_KEEPALIVE )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: score\ndata: {json.dumps( event )}\n\n"
+    finally:
+        broadcaster.unsubscribe( subscription )
+
+
+def current_scores(match_ids):
+    """
+    État courant des matchs demandés, au format des événements du flux (repli par
+    interrogation périodique, une requête par appel).
+    """
+    return [
+        _score_event( *row )
+        for row in Match.objects.filter( pk__in=match_ids ).order_by().values_list( 'pk', *LIVE_FIELDS )
+    ]
@@ -0,0 +1,177 @@
+# profoot/management/commands/benchmark_ingestion.py
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from profoot.models import Match, Pronostic
+from profoot.api_integrations import fetch_and_store_upcoming_matches, settle_pending_pronostics
+from profoot import sportmonks_client
+
+
+class Command(BaseCommand):
+    help = ('Mesure le débit de l\'ingestion des matchs et du règlement des pronostics (fixtures/s, appels API par fixture). '
+            'À lancer contre le serveur de rejeu (run_sportmonks_stub). Par défaut, la commande travaille dans une base de '
+            'test jetable, créée puis détruite comme par la suite de tests ; --in-place écrit dans la base configurée.')
+
+    # Part des matchs terminés présentés au règlement comme encore en cours en base :
+    # leur résultat doit être demandé à l'API (règlement distant).
+    REMOTE_SETTLEMENT_SHARE = 2
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help='URL de base Sportmonks à utiliser, par exemple http://127.0.0.1:8765/v3/football (défaut : SPORTMONKS_BASE_URL).',
+        )
+        parser.add_argument(
+            '--days-in-advance',
+            type=int,
+            default=7,
+            help='Nombre de jours de la fenêtre de fixtures ingérée.',
+        )
+        parser.add_argument(
+            '--fetch-details',
+            action='store_true',
+            help='Redemande le détail de chaque fixture (ancien mode d\'ingestion).',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            default=None,
+            help='Décode les pages de liste au fil de la lecture, à mémoire constante (défaut : SPORTMONKS_STREAM_PAGES).',
+        )
+        parser.add_argument(
+            '--no-prefetch',
+            action='store_false',
+            dest='prefetch',
+            default=None,
+            help='Récupère les pages de liste une à une au lieu de les précharger en parallèle (défaut : SPORTMONKS_PREFETCH_PAGES).',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=1,
+            help='Nombre de passages d\'ingestion ; les suivants mesurent le chemin des fixtures inchangées.',
+        )
+        parser.add_argument(
+            '--skip-settlement',
+            action='store_true',
+            help='Ne mesure que l\'ingestion.',
+        )
+        parser.add_argument(
+            '--refresh-finished',
+            action='store_true',
+            help='Redemande aussi les matchs déjà finalisés en base lors du règlement.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de threads pour les appels Sportmonks concurrents (défaut : SPORTMONKS_WORKERS).',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            default=1000,
+            help='Débit maximal de requêtes Sportmonks par seconde (défaut : 1000, le serveur de rejeu n\'a pas de quota).',
+        )
+        parser.add_argument(
+            '--in-place',
+            action='store_true',
+            help='Écrit dans la base configurée au lieu d\'une base de test jetable ; le règlement porte alors sur les pronostics existants.',
+        )
+        parser.add_argument(
+            '--i-know',
+            action='store_true',
+            help='Autorise --in-place quand DEBUG vaut False (base de production).',
+        )
+
+    def _report(self, label, items, unit, calls, elapsed):
+        rate = items / elapsed if elapsed else 0
+        calls_per_item = calls / items if items else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{label} : {items} {unit} en {elapsed:.2f} s ({rate:.1f} {unit}/s), '
+            f'{calls} appels API ({calls_per_item:.3f} par {unit[:-1]})'))
+
+    def handle(self, *args, **options):
+        if options['in_place']:
+            if not settings.DEBUG and not options['i_know']:
+                raise CommandError(
+                    'DEBUG vaut False : --in-place écrirait des fixtures de rejeu dans la base configurée. '
+                    'Ajoutez --i-know pour confirmer, ou lancez la commande sans --in-place (base jetable).')
+            self._run(options)
+            return
+
+        creation = connections[DEFAULT_DB_ALIAS].creation
+        old_name = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._run(options, seed_pronostics=True)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed_pronostics(self):
+        """
+        Base jetable : un pronostic 1N2 en attente par match ingéré. Un match terminé sur
+        REMOTE_SETTLEMENT_SHARE est remis dans l'état d'avant le coup de sifflet final (statut
+        de départ, sans score) : son résultat n'est connu que de l'API, comme pour un match
+        terminé depuis la dernière ingestion.
+        """
+        user, _ = User.objects.get_or_create(username='benchmark')
+        matches = list(Match.objects.order_by('pk').values_list('pk', 'score_final_domicile'))
+        Pronostic.objects.bulk_create(
+            [Pronostic(utilisateur=user, match_id=pk, type_pari='1N2', prediction_details='Pari : 1',
+                       pari_selection='1', cote='2.00', mise='10.00') for pk, _ in matches],
+            batch_size=500,
+        )
+        finished_ids = [pk for pk, home in matches if home is not None]
+        Match.objects.filter(pk__in=finished_ids[::self.REMOTE_SETTLEMENT_SHARE]).update(
+            status_api='1', score_final_domicile=None, score_final_exterieur=None)
+
+    def _run(self, options, seed_pronostics=False):
+        # Le serveur de rejeu accepte n'importe quelle clé : une clé fictive suffit hors ligne.
+        api_token = 'stub' if options['base_url'] and not sportmonks_client.SPORTMONKS_API_TOKEN else None
+        sportmonks_client.configure(
+            workers=options['workers'],
+            max_rps=options['max_rps'],
+            base_url=options['base_url'],
+            api_token=api_token,
+        )
+        self.stdout.write(f'Cible : {sportmonks_client.SPORTMONKS_BASE_URL}')
+
+        for round_number in range(1, options['rounds'] + 1):
+            calls_before = sportmonks_client.get_request_count()
+            started_at = time.monotonic()
+            added, updated, unchanged = fetch_and_store_upcoming_matches(
+                days_in_advance=options['days_in_advance'],
+                fetch_details=options['fetch_details'],
+                workers=options['workers'],
+                stream=options['stream'],
+                prefetch=options['prefetch'],
+            )
+            elapsed = time.monotonic() - started_at
+            self._report(
+                f'Ingestion (passage {round_number}, {added} nouveaux / {updated} modifiés / {unchanged} inchangés)',
+                added + updated + unchanged, 'fixtures', sportmonks_client.get_request_count() - calls_before, elapsed)
+
+        if options['skip_settlement']:
+            return
+
+        if seed_pronostics:
+            self._seed_pronostics()
+        pronostics = Pronostic.objects.filter(resultat='EN_COURS', match__isnull=False).exclude(match__settlement_parked=True)
+        pending = pronostics.count()
+        calls_before = sportmonks_client.get_request_count()
+        started_at = time.monotonic()
+        stats = settle_pending_pronostics(pronostics, workers=options['workers'], refresh_finished=options['refresh_finished'])
+        elapsed = time.monotonic() - started_at
+        calls = sportmonks_client.get_request_count() - calls_before
+        matches = stats['matches_settled'] + stats['matches_pending'] + stats['matches_missing'] + stats['matches_failed']
+        settled_remotely = stats['matches_settled'] - stats['matches_settled_locally']
+        self._report(
+            f"Règlement ({pending} pronostics en attente, {stats['pronostics_updated']} réglés ; "
+            f"matchs réglés : {stats['matches_settled_locally']} en base, {settled_remotely} via l'API)",
+            matches, 'matchs', calls, elapsed)
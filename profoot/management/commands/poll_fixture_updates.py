@@ -0,0 +1,85 @@
+# profoot/management/commands/poll_fixture_updates.py
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from profoot.api_integrations import poll_fixture_updates
+from profoot import sportmonks_client
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Suit en continu le flux Sportmonks des fixtures modifiées (~10 s de modifications par appel). '
+            'Lancé à un intervalle inférieur à SPORTMONKS_UPDATES_HORIZON, il permet à la synchronisation '
+            'planifiée (update_pronostics_results --fetch-matches) de rester incrémentale ; sans lui, '
+            'chaque synchronisation planifiée refait un parcours complet de la fenêtre.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'SPORTMONKS_UPDATES_INTERVAL', 5),
+            help='Secondes entre deux passages (défaut : SPORTMONKS_UPDATES_INTERVAL, à garder sous SPORTMONKS_UPDATES_HORIZON).',
+        )
+        parser.add_argument(
+            '--days-in-advance',
+            type=int,
+            default=7,
+            help='Fenêtre des matchs enregistrés, en jours (comme update_pronostics_results).',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exécute un seul passage puis s\'arrête.',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            default=None,
+            help='Débit maximal de requêtes Sportmonks par seconde (défaut : quota horaire de SPORTMONKS_MAX_RPS).',
+        )
+
+    def handle(self, *args, **options):
+        sportmonks_client.configure(max_rps=options['max_rps'])
+        horizon = getattr(settings, 'SPORTMONKS_UPDATES_HORIZON', 10)
+        if options['interval'] >= horizon:
+            self.stdout.write(self.style.WARNING(
+                f"Intervalle de {options['interval']} s ≥ horizon du flux ({horizon} s) : la série continue sera "
+                f"rompue et la synchronisation planifiée restera en parcours complet."))
+        error_backoff = getattr(settings, 'SPORTMONKS_POLL_ERROR_BACKOFF', 5)
+        error_backoff_max = getattr(settings, 'SPORTMONKS_POLL_ERROR_BACKOFF_MAX', 5 * 60)
+
+        if not options['once']:
+            self.stdout.write(self.style.SUCCESS(f"Suivi des fixtures modifiées toutes les {options['interval']} s (Ctrl+C pour arrêter)..."))
+        failures = 0
+        try:
+            while True:
+                started_at = time.monotonic()
+                try:
+                    result = poll_fixture_updates(days_in_advance=options['days_in_advance'])
+                except Exception as e:
+                    failures += 1
+                    backoff = min(error_backoff * 2 ** (failures - 1), error_backoff_max)
+                    logger.error(f"Erreur lors du suivi des fixtures modifiées ({failures} consécutive(s)), "
+                                 f"nouvel essai dans {backoff:.0f} s : {e}", exc_info=True)
+                    self.stdout.write(self.style.ERROR(f'Erreur : {e}'))
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(backoff)
+                    continue
+                failures = 0
+                if result is None:
+                    self.stdout.write(self.style.ERROR('Flux des fixtures modifiées indisponible.'))
+                else:
+                    added, updated, unchanged = result
+                    self.stdout.write(self.style.SUCCESS(f'Nouveaux : {added}, Modifiés : {updated}, Inchangés : {unchanged}'))
+                if options['once']:
+                    break
+                time.sleep(max(0, options['interval'] - (time.monotonic() - started_at)))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Arrêt du suivi des fixtures modifiées.'))
@@ -0,0 +1,73 @@
+# profoot/management/commands/poll_livescores.py
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from profoot.api_integrations import poll_livescores
+from profoot import sportmonks_client
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Met à jour en continu le score et le statut de tous les matchs en cours, avec un seul appel au flux livescores Sportmonks par cycle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'SPORTMONKS_LIVESCORES_INTERVAL', 30),
+            help='Secondes entre deux cycles (défaut : SPORTMONKS_LIVESCORES_INTERVAL).',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exécute un seul cycle puis s\'arrête.',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            default=None,
+            help='Débit maximal de requêtes Sportmonks par seconde (défaut : quota horaire de SPORTMONKS_MAX_RPS).',
+        )
+
+    def handle(self, *args, **options):
+        sportmonks_client.configure(max_rps=options['max_rps'])
+        error_backoff = getattr(settings, 'SPORTMONKS_POLL_ERROR_BACKOFF', 5)
+        error_backoff_max = getattr(settings, 'SPORTMONKS_POLL_ERROR_BACKOFF_MAX', 5 * 60)
+
+        if not options['once']:
+            self.stdout.write(self.style.SUCCESS(f"Suivi des scores en direct toutes les {options['interval']} s (Ctrl+C pour arrêter)..."))
+        failures = 0
+        try:
+            while True:
+                started_at = time.monotonic()
+                try:
+                    result = poll_livescores()
+                except Exception as e:
+                    # Une erreur de base ou d'API n'arrête pas le suivi : nouvel essai après
+                    # une pause doublée à chaque erreur consécutive.
+                    failures += 1
+                    backoff = min(error_backoff * 2 ** (failures - 1), error_backoff_max)
+                    logger.error(f"Erreur lors du suivi des scores en direct ({failures} consécutive(s)), "
+                                 f"nouvel essai dans {backoff:.0f} s : {e}", exc_info=True)
+                    self.stdout.write(self.style.ERROR(f'Erreur : {e}'))
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(backoff)
+                    continue
+                failures = 0
+                if result is None:
+                    self.stdout.write(self.style.ERROR('Flux livescores indisponible.'))
+                else:
+                    live_count, changed_count, unknown_count = result
+                    self.stdout.write(self.style.SUCCESS(f'Matchs en direct : {live_count}, Mis à jour : {changed_count}, Inconnus : {unknown_count}'))
+                if options['once']:
+                    break
+                time.sleep(max(0, options['interval'] - (time.monotonic() - started_at)))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Arrêt du suivi des scores en direct.'))
@@ -0,0 +1,17 @@
+# profoot/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from profoot.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche plein texte des pronostics (après des imports ou mises à jour en lot).'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Reconstruction de l\'index de recherche des pronostics...'))
+        indexed = rebuild_search_index()
+        if indexed is None:
+            self.stdout.write(self.style.WARNING(
+                'Index de recherche indisponible sur cette base : la recherche utilise icontains.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Reconstruction terminée. Pronostics indexés : {indexed}'))
@@ -0,0 +1,13 @@
+# profoot/management/commands/rebuild_user_stats.py
+
+from django.core.management.base import BaseCommand
+from profoot.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcule en une passe les statistiques dénormalisées (UserStats) de tous les utilisateurs.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Recalcul des statistiques des utilisateurs...'))
+        count = rebuild_user_stats()
+        self.stdout.write(self.style.SUCCESS(f'Recalcul terminé. Utilisateurs : {count}'))
@@ -0,0 +1,22 @@
+# profoot/management/commands/refresh_leaderboard.py
+
+from django.core.management.base import BaseCommand
+from profoot.leaderboard import LEADERBOARD_WINDOWS, refresh_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recalcule le classement des tipsters (ROI, taux de réussite, profit) sur les périodes glissantes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            action='append',
+            choices=list(LEADERBOARD_WINDOWS),
+            help='Période à recalculer (répétable). Par défaut, toutes les périodes.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Recalcul du classement des tipsters...'))
+        written = refresh_leaderboard(windows=options['window'])
+        summary = ', '.join(f'{window} : {count}' for window, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f'Recalcul terminé. Tipsters classés par période ({summary})'))
@@ -0,0 +1,46 @@
+# profoot/management/commands/run_settlement_daemon.py
+
+from django.core.management.base import BaseCommand
+from profoot.settlement_scheduler import SettlementScheduler
+from profoot import sportmonks_client
+
+
+class Command(BaseCommand):
+    help = 'Démon de règlement des pronostics : vérifie chaque match selon sa fin attendue (en direct, juste terminé, backoff), et met de côté les matchs jamais résolus.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exécute un seul lot de vérifications puis s\'arrête.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de threads pour les appels Sportmonks concurrents (défaut : SPORTMONKS_WORKERS).',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            default=None,
+            help='Débit maximal de requêtes Sportmonks par seconde (défaut : quota horaire de SPORTMONKS_MAX_RPS).',
+        )
+
+    def handle(self, *args, **options):
+        sportmonks_client.configure(workers=options['workers'], max_rps=options['max_rps'])
+        scheduler = SettlementScheduler(workers=options['workers'])
+
+        if options['once']:
+            stats = scheduler.run_once()
+            if stats is None:
+                self.stdout.write(self.style.WARNING('Aucun match à vérifier pour le moment.'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Matchs vérifiés : {stats['matches_checked']}, Pronostics réglés : {stats['pronostics_updated']}, Matchs mis de côté : {stats['matches_parked']}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Démarrage du démon de règlement des pronostics (Ctrl+C pour arrêter)...'))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Arrêt du démon de règlement.'))
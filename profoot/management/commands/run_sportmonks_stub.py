@@ -0,0 +1,81 @@
+# profoot/management/commands/run_sportmonks_stub.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from profoot.sportmonks_stub import RecordedResponses, StubStats, make_server, STUB_BASE_PATH
+
+
+class Command(BaseCommand):
+    help = 'Démarre un serveur Sportmonks local qui rejoue les réponses enregistrées (SPORTMONKS_RECORD_DIR) et/ou des fixtures synthétiques, pour les tests de charge hors ligne.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--record-dir',
+            default=None,
+            help='Répertoire des réponses enregistrées (défaut : SPORTMONKS_RECORD_DIR).',
+        )
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=0,
+            help='Nombre de fixtures synthétiques servies en complément (ou à la place) des enregistrements.',
+        )
+        parser.add_argument('--host', default='127.0.0.1', help='Adresse d\'écoute.')
+        parser.add_argument('--port', type=int, default=8765, help='Port d\'écoute.')
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Latence ajoutée à chaque réponse, en millisecondes.',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.0,
+            help='Latence aléatoire supplémentaire maximale, en millisecondes.',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Proportion de réponses 503 (entre 0 et 1), pour exercer les nouvelles tentatives du client.',
+        )
+        parser.add_argument(
+            '--per-page',
+            type=int,
+            default=None,
+            help='Repagine les listes à cette taille (défaut : pages telles qu\'enregistrées, 50 pour les fixtures synthétiques).',
+        )
+
+    def handle(self, *args, **options):
+        record_dir = options['record_dir'] or getattr(settings, 'SPORTMONKS_RECORD_DIR', None)
+        if not record_dir and not options['synthetic']:
+            raise CommandError('Indiquez --record-dir (ou SPORTMONKS_RECORD_DIR) et/ou --synthetic.')
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError('--error-rate doit être compris entre 0 et 1.')
+
+        responses = RecordedResponses(record_dir=record_dir, synthetic_fixtures=options['synthetic'])
+        stats = StubStats()
+        server = make_server(
+            responses,
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            per_page=options['per_page'],
+            stats=stats,
+        )
+
+        base_url = f"http://{options['host']}:{options['port']}{STUB_BASE_PATH.rstrip('/')}"
+        self.stdout.write(self.style.SUCCESS(
+            f'Serveur de rejeu Sportmonks démarré : {len(responses.responses)} réponse(s) enregistrée(s), '
+            f'{len(responses.fixtures)} fixture(s). Utilisez SPORTMONKS_BASE_URL={base_url} (Ctrl+C pour arrêter)...'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Arrêt du serveur de rejeu. Requêtes : {stats.requests}, Erreurs simulées : {stats.errors}, Introuvables : {stats.not_found}'))
@@ -4,7 +4,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from profoot.models import Pronostic, Match # <-- CORRECTION ICI : Importation absolue
-from profoot.api_integrations import update_pronostic_from_api_data, fetch_and_store_upcoming_matches
+from profoot.api_integrations import settle_pending_pronostics, sync_upcoming_matches
+from profoot import sportmonks_client
 
 class Command(BaseCommand):
     help = 'Gère la mise à jour des scores et statuts des pronostics terminés, et/ou la récupération des matchs à venir depuis Sportmonks.'
@@ -21,13 +22,50 @@ class Command(BaseCommand):
             default=7,
             help='Nombre de jours dans le futur pour la récupération des matchs (utilisé avec --fetch-matches).',
         )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Force un parcours complet de la fenêtre au lieu de la synchronisation incrémentale (utilisé avec --fetch-matches). '
+                 'Sans poll_fixture_updates lancé en continu, chaque synchronisation est de toute façon un parcours complet.',
+        )
+        parser.add_argument(
+            '--fetch-details',
+            action='store_true',
+            help='Redemande le détail de chaque fixture au lieu de se contenter de la liste paginée (utilisé avec --fetch-matches).',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            default=None,
+            help='Décode les pages de liste au fil de la lecture, à mémoire constante (défaut : SPORTMONKS_STREAM_PAGES ; utilisé avec --fetch-matches).',
+        )
         parser.add_argument(
             '--update-pronostics',
             action='store_true',
             help='Met à jour les scores et statuts des pronostics existants.',
         )
+        parser.add_argument(
+            '--refresh-finished',
+            action='store_true',
+            help='Redemande à Sportmonks les matchs déjà finalisés en base, pour prendre en compte une correction de score (utilisé avec --update-pronostics).',
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de threads pour les appels Sportmonks concurrents (défaut : SPORTMONKS_WORKERS).',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            default=None,
+            help='Débit maximal de requêtes Sportmonks par seconde (défaut : quota horaire de SPORTMONKS_MAX_RPS).',
+        )
 
     def handle(self, *args, **options):
+        sportmonks_client.configure(workers=options['workers'], max_rps=options['max_rps'])
+
         fetch_matches_enabled = options['fetch_matches']
         update_pronostics_enabled = options['update_pronostics']
 
@@ -38,8 +76,15 @@ class Command(BaseCommand):
         if fetch_matches_enabled:
             self.stdout.write(self.style.SUCCESS('Démarrage de la récupération et du stockage des matchs à venir depuis Sportmonks...'))
             days_in_advance = options['days_in_advance']
-            added, updated = fetch_and_store_upcoming_matches(days_in_advance=days_in_advance)
-            self.stdout.write(self.style.SUCCESS(f'Récupération des matchs terminée. Ajoutés : {added}, Mis à jour : {updated}'))
+            added, updated, unchanged, full_scan = sync_upcoming_matches(
+                days_in_advance=days_in_advance,
+                full=options['full'],
+                fetch_details=options['fetch_details'],
+                workers=options['workers'],
+                stream=options['stream'],
+            )
+            mode = 'parcours complet' if full_scan else 'incrémentale'
+            self.stdout.write(self.style.SUCCESS(f'Récupération des matchs terminée ({mode}). Nouveaux : {added}, Modifiés : {updated}, Inchangés : {unchanged}'))
 
         if update_pronostics_enabled:
             self.stdout.write(self.style.SUCCESS('Démarrage de la mise à jour des pronostics existants...'))
@@ -51,36 +96,30 @@ class Command(BaseCommand):
                 # Utiliser la date_match du modèle Match lié pour le filtrage
                 match__date_match__lte=timezone.now() + timedelta(hours=2),
                 resultat__in=['EN_COURS']
+            ).exclude(
+                # Matchs mis de côté par run_settlement_daemon : règlement manuel
+                match__settlement_parked=True
             ).order_by('match__date_match') # Trier par la date du match lié
 
             if not pronostics_to_update.exists():
                 self.stdout.write(self.style.WARNING('Aucun pronostic à mettre à jour pour le moment.'))
 
-            updated_count = 0
-            skipped_count = 0
-            error_count = 0
-
-            for pronostic in pronostics_to_update:
-                try:
-                    # Vérifiez si le pronostic a un match lié
-                    if not pronostic.match:
-                        self.stdout.write(self.style.WARNING(f"Pronostic ID {pronostic.pk} - Pas de match lié. Ignoré."))
-                        skipped_count += 1
-                        continue
-
-                    self.stdout.write(f"Traitement du pronostic ID {pronostic.pk} (Match: {pronostic.match.equipe_domicile} vs {pronostic.match.equipe_exterieur}, API ID: {pronostic.match.api_event_id})...")
-                    if update_pronostic_from_api_data(pronostic):
-                        updated_count += 1
-                    else:
-                        skipped_count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Erreur lors de la mise à jour du pronostic ID {pronostic.pk}: {e}"))
-                    error_count += 1
+            # Les pronostics sont regroupés par match : les matchs déjà finalisés en base sont
+            # réglés sans appel réseau, les autres sont récupérés en lot auprès de Sportmonks.
+            stats = settle_pending_pronostics(
+                pronostics_to_update,
+                workers=options['workers'],
+                refresh_finished=options['refresh_finished'],
+            )
 
             self.stdout.write(self.style.SUCCESS(f'Processus de mise à jour des pronostics terminé.'))
-            self.stdout.write(self.style.SUCCESS(f'Pronostics mis à jour : {updated_count}'))
-            self.stdout.write(self.style.WARNING(f'Pronostics ignorés (pas de résultat final ou match non lié) : {skipped_count}'))
-            self.stdout.write(self.style.ERROR(f'Erreurs rencontrées : {error_count}'))
+            self.stdout.write(self.style.SUCCESS(f"Matchs réglés : {stats['matches_settled']} (dont {stats['matches_settled_locally']} depuis la base, sans appel API)"))
+            self.stdout.write(self.style.WARNING(f"Matchs non terminés : {stats['matches_pending']}"))
+            self.stdout.write(self.style.ERROR(f"Matchs introuvables sur Sportmonks : {stats['matches_missing']}"))
+            self.stdout.write(self.style.ERROR(f"Matchs en erreur (réponse Sportmonks inexploitable) : {stats['matches_failed']}"))
+            self.stdout.write(self.style.SUCCESS(f"Pronostics mis à jour : {stats['pronostics_updated']}"))
+            self.stdout.write(self.style.WARNING(f"Pronostics inchangés (statut déjà final ou pari non géré) : {stats['pronostics_unchanged']}"))
+            self.stdout.write(self.style.WARNING(f"Pronostics ignorés (pas de résultat final) : {stats['pronostics_skipped']}"))
 
         self.stdout.write(self.style.SUCCESS('Opération de gestion des pronostics et matchs terminée.'))
 
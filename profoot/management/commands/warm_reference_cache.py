@@ -0,0 +1,13 @@
+# profoot/management/commands/warm_reference_cache.py
+
+from django.core.management.base import BaseCommand
+from profoot.reference_cache import warm_reference_cache
+
+
+class Command(BaseCommand):
+    help = 'Précharge toutes les ligues et tous les stades Sportmonks de l\'abonnement dans les tables de référence.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Préchargement des ligues et des stades depuis Sportmonks...'))
+        leagues_count, venues_count = warm_reference_cache()
+        self.stdout.write(self.style.SUCCESS(f'Préchargement terminé. Ligues : {leagues_count}, Stades : {venues_count}'))
@@ -0,0 +1,197 @@
+# profoot/match_resolution.py
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Match
+from .settlement import FINAL_STATE_IDS
+from .reference_cache import TTLCache, get_league_name, get_venue_name
+from .sportmonks_client import SPORTMONKS_API_TOKEN
+# Fixtures Sportmonks servies par un cache stale-while-revalidate protégé par un disjoncteur
+from .fixture_cache import get_fixture_payload, references_breaker
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Résolution d'un ID d'événement Sportmonks en Match, pour les vues d'ajout et de
+# modification de pronostic. La table Match fait foi tant que la ligne a été écrite,
+# ou vue inchangée par la synchronisation des matchs (date_derniere_synchro), il y a
+# moins de MATCH_RESOLUTION_MAX_AGE secondes ; l'API n'est consultée que si le match
+# est inconnu ou périmé.
+# Les Match résolus sont gardés dans un LRU par processus, indexé par api_event_id.
+MATCH_RESOLUTION_MAX_AGE = timedelta( seconds=getattr( settings, 'MATCH_RESOLUTION_MAX_AGE', 60 * 60 ) )
+MATCH_RESOLUTION_CACHE_SIZE = getattr( settings, 'MATCH_RESOLUTION_CACHE_SIZE', 1024 )
+MATCH_RESOLUTION_CACHE_TTL = getattr( settings, 'MATCH_RESOLUTION_CACHE_TTL', 5 * 60 )  # secondes
+
+_matches_cache = TTLCache( MATCH_RESOLUTION_CACHE_SIZE, MATCH_RESOLUTION_CACHE_TTL )
+
+
+def get_event_details_from_sportmonks(event_id):
+    """
+    Récupère les détails d'un match spécifique depuis l'API Sportmonks.
+    Cette fonction ne passe AUCUN include, car l'API semble les rejeter.
+    La fixture est servie par profoot/fixture_cache.py, éventuellement périmée
+    pendant son rafraîchissement en arrière-plan.
+    Retourne un dictionnaire avec les données du match formatées pour le formulaire ou None en cas d'erreur.
+    """
+    if not SPORTMONKS_API_TOKEN:
+        logger.error( "Impossible de récupérer les détails de l'événement Sportmonks : Clé API manquante." )
+        return None
+
+    # Dernière fixture connue (cache stale-while-revalidate, derrière un disjoncteur) :
+    # la requête n'attend jamais plus de EVENT_DETAILS_WAIT secondes.
+    fixture = get_fixture_payload( event_id )
+    if not fixture:
+        return None
+
+    # Extraction des noms d'équipes à partir du champ 'name'
+    home_team_name = "N/A"
+    away_team_name = "N/A"
+    fixture_name = fixture.get( 'name', '' )
+    if ' vs ' in fixture_name:
+        parts = fixture_name.split( ' vs ' )
+        if len( parts ) == 2:
+            home_team_name = parts[0].strip()
+            away_team_name = parts[1].strip()
+    else:
+        home_team_name = fixture_name  # Fallback si pas de 'vs'
+        logger.warning( f"Format de nom de fixture inattendu pour ID {fixture.get( 'id' )}: {fixture_name}" )
+
+    # Noms de la ligue et du stade : servis par le cache de référence (pas d'appel API s'ils sont connus),
+    # les appels restants passant par le disjoncteur des références
+    league_name = get_league_name( fixture.get( 'league_id' ), breaker=references_breaker )
+    stadium_name = get_venue_name( fixture.get( 'venue_id' ), breaker=references_breaker )
+
+    event_datetime_str = fixture.get( 'starting_at' )
+    event_datetime_obj = None
+    if event_datetime_str:
+        try:
+            # Tente de parser avec le format exact de votre exemple "YYYY-MM-DD HH:MM:SS"
+            naive_datetime = datetime.strptime( event_datetime_str, "%Y-%m-%d %H:%M:%S" )
+            # CORRECTION ICI : Rendre la date et l'heure timezone-aware
+            event_datetime_obj = timezone.make_aware( naive_datetime, timezone.get_current_timezone() )
+        except ValueError:
+            # Si le format n'est pas le même (ex: contient 'Z' ou décalage), tente fromisoformat
+            try:
+                # CORRECTION ICI : Rendre la date et l'heure timezone-aware
+                event_datetime_obj = timezone.make_aware(
+                    datetime.fromisoformat( event_datetime_str.replace( 'Z', '+00:00' ) ) )
+            except ValueError:
+                logger.warning( f"Erreur de format de date Sportmonks pour {event_datetime_str} (ID: {event_id})" )
+                pass
+
+    # Scores finaux (si le match est terminé) - souvent directement sur l'objet fixture
+    scores_data = fixture.get( 'scores', {} )
+    fulltime_scores = scores_data.get( 'fulltime', {} )
+    score_final_domicile = fulltime_scores.get( 'home' )
+    score_final_exterieur = fulltime_scores.get( 'away' )
+
+    # Statut du match (state_id Sportmonks v3)
+    status_event = "N/A"
+    if fixture.get( 'state_id' ) in FINAL_STATE_IDS:
+        status_event = "Terminé"
+    elif fixture.get( 'state_id' ) == 1:
+        status_event = "À venir"
+    elif fixture.get( 'state_id' ) == 2:
+        status_event = "En direct"
+    elif fixture.get( 'state', {} ).get( 'name' ):  # Tente d'obtenir le nom de l'état
+        status_event = fixture.get( 'state', {} ).get( 'name' )
+    elif fixture.get( 'state_id' ):  # Fallback à l'ID si pas de nom
+        status_event = str( fixture.get( 'state_id' ) )
+
+    return {
+        'api_event_id': fixture.get( 'id' ),  # L'ID Sportmonks
+        'discipline': 'FOOTBALL',  # Assumé, à modifier si l'API le fournit
+        'equipe_domicile': home_team_name,
+        'equipe_exterieur': away_team_name,
+        'ligue': league_name,
+        'date_match': event_datetime_obj.date() if event_datetime_obj else None,
+        'heure_match': event_datetime_obj.time() if event_datetime_obj else None,
+        'score_final_domicile': score_final_domicile,
+        'score_final_exterieur': score_final_exterieur,
+        'status_event': status_event,
+        'event_name': f"{home_team_name} vs {away_team_name}",
+        'stade': stadium_name,
+    }
+
+
+def _combine_event_datetime(event_details):
+    """
+    Combine la date et l'heure renvoyées par get_event_details_from_sportmonks en un
+    datetime timezone-aware (minuit si l'API ne donne pas l'heure).
+    """
+    if not event_details.get( 'date_match' ):
+        return None
+    naive_combined = datetime.combine( event_details['date_match'], event_details.get( 'heure_match' ) or time( 0, 0 ) )
+    return timezone.make_aware( naive_combined, timezone.get_current_timezone() )
+
+
+def _is_fresh(match):
+    seen_at = max( (value for value in (match.date_mise_a_jour, match.date_derniere_synchro) if value is not None),
+                   default=None )
+    return seen_at is not None and timezone.now() - seen_at < MATCH_RESOLUTION_MAX_AGE
+
+
+def resolve_match(api_event_id):
+    """
+    Retourne (match, depuis_api) pour un ID d'événement Sportmonks.
+    Le Match est servi par le LRU du processus ou par la base s'il est assez récent,
+    sans aucun appel réseau ; sinon il est (re)créé à partir de l'API. Si l'API ne
+    répond pas, une ligne périmée est tout de même renvoyée.
+    Retourne (None, False) si le match est introuvable.
+    """
+    try:
+        api_event_id = int( api_event_id )
+    except (TypeError, ValueError):
+        return None, False
+
+    match = _matches_cache.get( api_event_id )
+    if match is not None and _is_fresh( match ):
+        return match, False
+
+    match = Match.objects.filter( api_event_id=api_event_id ).first()
+    if match is not None and _is_fresh( match ):
+        _matches_cache.set( api_event_id, match )
+        return match, False
+
+    event_details = get_event_details_from_sportmonks( api_event_id )
+    if not event_details:
+        if match is not None:
+            logger.info( f"Match {api_event_id} servi depuis la base (données de plus de {MATCH_RESOLUTION_MAX_AGE}) : API indisponible." )
+        return match, False
+
+    match, _ = Match.objects.update_or_create(
+        api_event_id=event_details['api_event_id'],
+        defaults={
+            'discipline': event_details.get( 'discipline' ),
+            'equipe_domicile': event_details.get( 'equipe_domicile' ),
+            'equipe_exterieur': event_details.get( 'equipe_exterieur' ),
+            'date_match': _combine_event_datetime( event_details ),
+            'ligue': event_details.get( 'ligue' ),
+            'stade': event_details.get( 'stade' ),
+            'score_final_domicile': event_details.get( 'score_final_domicile' ),
+            'score_final_exterieur': event_details.get( 'score_final_exterieur' ),
+            'status_api': event_details.get( 'status_event' ),
+        }
+    )
+    _matches_cache.set( api_event_id, match )
+    return match, True
+
+
+def initial_from_match(match):
+    """
+    Valeurs initiales du formulaire de pronostic pour un Match.
+    """
+    local_datetime = timezone.localtime( match.date_match )
+    return {
+        'match': match.pk,
+        'discipline': match.discipline,
+        'equipe_domicile': match.equipe_domicile,
+        'equipe_exterieur': match.equipe_exterieur,
+        'ligue': match.ligue,
+        'date_match': local_datetime.date(),
+        'heure_match': local_datetime.time(),
+    }
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0010_match_remove_pronostic_api_event_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='League',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sportmonks_id', models.BigIntegerField(unique=True, verbose_name='ID Sportmonks de la ligue')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom de la ligue')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ligue',
+                'verbose_name_plural': 'Ligues',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Venue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sportmonks_id', models.BigIntegerField(unique=True, verbose_name='ID Sportmonks du stade')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom du stade')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Stade',
+                'verbose_name_plural': 'Stades',
+                'ordering': ['name'],
+            },
+        ),
+    ]
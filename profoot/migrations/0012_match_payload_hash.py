@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0011_league_venue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='Empreinte des données API'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0012_match_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True, verbose_name='Clé de synchronisation')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière synchronisation réussie')),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernier parcours complet réussi')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'État de synchronisation',
+                'verbose_name_plural': 'États de synchronisation',
+            },
+        ),
+    ]
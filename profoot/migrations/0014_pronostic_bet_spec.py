@@ -0,0 +1,184 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:30
+
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Copie figée de la lecture stricte de la sélection (profoot/bet_spec.py) : la
+# migration ne doit pas changer de comportement quand le module évolue.
+AUTO_SETTLED_TYPES = ('1N2', 'OVER_UNDER', 'HANDICAP', 'DOUBLE_CHANCE', 'SCORE_EXACT')
+BET_SPEC_FIELDS = ('pari_selection', 'pari_ligne', 'pari_camp', 'pari_handicap',
+                   'pari_score_domicile', 'pari_score_exterieur')
+CAMP_DOMICILE = 'DOMICILE'
+CAMP_EXTERIEUR = 'EXTERIEUR'
+
+_MARKER_RE = re.compile(r'^(?:PARI|SELECTION|CHOIX)\s*:\s*(.*)$', re.MULTILINE)
+_SELECTION_1N2_RE = re.compile(r'(1|N|X|2|NUL|MATCH NUL)')
+_DOUBLE_CHANCE_RE = re.compile(r'(1N|N1|12|21|N2|2N|1X|X1|X2|2X)')
+_TEAM_VICTORY_RE = re.compile(r"(?:VICTOIRE\s+(?:DE\s+|D')?)?(.+)")
+_TEAM_DOUBLE_CHANCE_RE = re.compile(r'(?:DOUBLE\s+CHANCE\s+)?(.+)')
+_OVER_UNDER_RE = re.compile(r'(OVER|UNDER|PLUS|MOINS)\s*(?:DE\s+)?(\d+(?:[.,]\d+)?)(?:\s*BUTS?)?')
+_HANDICAP_RE = re.compile(r'(.+?)\s*([+-])\s*(\d+(?:[.,]\d+)?)')
+_SCORE_RE = re.compile(r'(\d{1,2})\s*[-:]\s*(\d{1,2})')
+
+_SELECTION_1N2_ALIASES = {'1': '1', 'N': 'N', 'X': 'N', 'NUL': 'N', 'MATCH NUL': 'N', '2': '2'}
+_DOUBLE_CHANCE_ALIASES = {
+    '1N': '1N', 'N1': '1N', '1X': '1N', 'X1': '1N',
+    '12': '12', '21': '12',
+    'N2': 'N2', '2N': 'N2', 'X2': 'N2', '2X': 'N2',
+}
+
+
+def _normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in decomposed if not unicodedata.combining(char)).upper()
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _selection_text(details):
+    text = _normalize(details)
+    markers = set(_MARKER_RE.findall(text))
+    if len(markers) > 1:
+        return None
+    if markers:
+        return markers.pop()
+    if text and '\n' not in text:
+        return text
+    return None
+
+
+def _team_side(text, equipe_domicile, equipe_exterieur):
+    sides = [side for side, equipe in ((CAMP_DOMICILE, equipe_domicile), (CAMP_EXTERIEUR, equipe_exterieur))
+             if equipe and _normalize(equipe) == text]
+    return sides[0] if len(sides) == 1 else None
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(value.replace(',', '.'))
+    except InvalidOperation:
+        return None
+
+
+def _parse_selection(type_pari, selection, equipe_domicile, equipe_exterieur):
+    spec = dict.fromkeys(BET_SPEC_FIELDS)
+
+    if type_pari in ('1N2', 'DOUBLE_CHANCE'):
+        code_re, team_re, aliases = (
+            (_SELECTION_1N2_RE, _TEAM_VICTORY_RE, _SELECTION_1N2_ALIASES) if type_pari == '1N2'
+            else (_DOUBLE_CHANCE_RE, _TEAM_DOUBLE_CHANCE_RE, _DOUBLE_CHANCE_ALIASES))
+        code = code_re.fullmatch(selection)
+        team = team_re.fullmatch(selection)
+        side = _team_side(team.group(1), equipe_domicile, equipe_exterieur) if team else None
+        if code:
+            spec['pari_selection'] = aliases[code.group(1)]
+        elif side and type_pari == '1N2':
+            spec['pari_selection'] = '1' if side == CAMP_DOMICILE else '2'
+        elif side:
+            spec['pari_selection'] = '1N' if side == CAMP_DOMICILE else 'N2'
+        else:
+            return None
+
+    elif type_pari == 'OVER_UNDER':
+        match = _OVER_UNDER_RE.fullmatch(selection)
+        ligne = _to_decimal(match.group(2)) if match else None
+        if ligne is None:
+            return None
+        spec['pari_selection'] = 'OVER' if match.group(1) in ('OVER', 'PLUS') else 'UNDER'
+        spec['pari_ligne'] = ligne
+
+    elif type_pari == 'HANDICAP':
+        match = _HANDICAP_RE.fullmatch(selection)
+        side = _team_side(match.group(1), equipe_domicile, equipe_exterieur) if match else None
+        handicap = _to_decimal(match.group(3)) if side else None
+        if handicap is None:
+            return None
+        spec['pari_camp'] = side
+        spec['pari_handicap'] = -handicap if match.group(2) == '-' else handicap
+
+    elif type_pari == 'SCORE_EXACT':
+        match = _SCORE_RE.fullmatch(selection)
+        if not match:
+            return None
+        spec['pari_score_domicile'] = int(match.group(1))
+        spec['pari_score_exterieur'] = int(match.group(2))
+
+    return spec
+
+
+def parse_bet_spec(type_pari, prediction_details, prediction_score=None, equipe_domicile=None, equipe_exterieur=None):
+    """
+    Spécification d'un pari réglé automatiquement, lue sur sa sélection explicite ;
+    None si la sélection est absente ou inexploitable.
+    """
+    if type_pari == 'SCORE_EXACT' and (prediction_score or '').strip():
+        return _parse_selection(type_pari, _normalize(prediction_score), equipe_domicile, equipe_exterieur)
+    selection = _selection_text(prediction_details)
+    return _parse_selection(type_pari, selection, equipe_domicile, equipe_exterieur) if selection else None
+
+
+def backfill_bet_spec(apps, schema_editor):
+    """
+    Renseigne la spécification structurée des pronostics existants.
+    Les textes inexploitables sont laissés vides (règlement manuel).
+    """
+    Pronostic = apps.get_model('profoot', 'Pronostic')
+    to_update = []
+    for pronostic in Pronostic.objects.filter(type_pari__in=AUTO_SETTLED_TYPES).select_related('match').iterator():
+        spec = parse_bet_spec(
+            pronostic.type_pari,
+            pronostic.prediction_details,
+            prediction_score=pronostic.prediction_score,
+            equipe_domicile=pronostic.match.equipe_domicile if pronostic.match_id else pronostic.equipe_domicile,
+            equipe_exterieur=pronostic.match.equipe_exterieur if pronostic.match_id else pronostic.equipe_exterieur,
+        )
+        if spec is None:
+            continue
+        for field, value in spec.items():
+            setattr(pronostic, field, value)
+        to_update.append(pronostic)
+    Pronostic.objects.bulk_update(to_update, BET_SPEC_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0013_syncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_camp',
+            field=models.CharField(blank=True, choices=[('DOMICILE', 'Domicile'), ('EXTERIEUR', 'Extérieur')], max_length=10, null=True, verbose_name='Équipe choisie (handicap)'),
+        ),
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_handicap',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Handicap'),
+        ),
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_ligne',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Ligne Over/Under'),
+        ),
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_score_domicile',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Score exact prédit (domicile)'),
+        ),
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_score_exterieur',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Score exact prédit (extérieur)'),
+        ),
+        migrations.AddField(
+            model_name='pronostic',
+            name='pari_selection',
+            field=models.CharField(blank=True, max_length=10, null=True, verbose_name='Sélection (1, N, 2, 1N, 12, N2, OVER, UNDER)'),
+        ),
+        migrations.RunPython(backfill_bet_spec, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0014_pronostic_bet_spec'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='settlement_attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Vérifications sans résultat'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='settlement_next_check',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Prochaine vérification du résultat'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='settlement_parked',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='À régler manuellement'),
+        ),
+    ]
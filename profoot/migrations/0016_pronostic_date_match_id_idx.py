@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0015_match_settlement_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pronostic',
+            index=models.Index(fields=['date_match', 'id'], name='pronostic_date_match_id_idx'),
+        ),
+    ]
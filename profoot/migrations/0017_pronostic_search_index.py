@@ -0,0 +1,101 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:40
+
+import unicodedata
+
+from django.db import DatabaseError, migrations
+
+# Copie figée de l'index de profoot/search.py au moment de cette migration : la
+# migration ne doit pas changer de comportement quand le module évolue.
+SEARCH_TABLE = 'profoot_pronostic_search'
+TSVECTOR_WEIGHTS = ('A', 'B', 'C')
+
+
+def normalize_search_text(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def build_document(pronostic, match=None):
+    """
+    Colonnes indexées d'un pronostic : (équipes, ligue, analyse), normalisées.
+    """
+    teams = [pronostic.equipe_domicile, pronostic.equipe_exterieur]
+    leagues = [pronostic.ligue]
+    if match is not None:
+        teams += [match.equipe_domicile, match.equipe_exterieur]
+        leagues.append(match.ligue)
+    return (
+        normalize_search_text(' '.join(dict.fromkeys(value for value in teams if value))),
+        normalize_search_text(' '.join(dict.fromkeys(value for value in leagues if value))),
+        normalize_search_text(pronostic.prediction_details),
+    )
+
+
+def create_index_table(connection):
+    """
+    Crée la table d'index (FTS5 sous SQLite, tsvector sous PostgreSQL). Retourne False
+    si le moteur n'est pas pris en charge ou si SQLite n'a pas été compilé avec FTS5.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                    f"equipes, ligue, details, tokenize = 'unicode61 remove_diacritics 2')")
+            except DatabaseError:
+                return False
+            return True
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"pronostic_id bigint PRIMARY KEY REFERENCES profoot_pronostic (id) ON DELETE CASCADE "
+                f"DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)")
+            return True
+    return False
+
+
+def write_documents(rows, connection):
+    rows = list(rows)
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, equipes, ligue, details) VALUES (%s, %s, %s, %s)", rows)
+        else:
+            document = ' || '.join(f"setweight(to_tsvector('french', %s), '{weight}')" for weight in TSVECTOR_WEIGHTS)
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (pronostic_id, document) VALUES (%s, {document}) "
+                f"ON CONFLICT (pronostic_id) DO UPDATE SET document = EXCLUDED.document", rows)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if not create_index_table(connection):
+        return
+    Pronostic = apps.get_model('profoot', 'Pronostic')
+    pronostics = Pronostic.objects.using(connection.alias).select_related('match').order_by('pk')
+    write_documents(
+        ((pronostic.pk, *build_document(pronostic, pronostic.match)) for pronostic in pronostics.iterator()),
+        connection,
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0016_pronostic_date_match_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('profoot', '0017_pronostic_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('total_pronostics', models.IntegerField(default=0)),
+                ('total_gagnants', models.IntegerField(default=0)),
+                ('total_perdants', models.IntegerField(default=0)),
+                ('total_en_cours', models.IntegerField(default=0)),
+                ('total_annules', models.IntegerField(default=0)),
+                ('mise_totale', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit_total', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('followers_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Statistiques Utilisateur',
+                'verbose_name_plural': 'Statistiques Utilisateurs',
+            },
+        ),
+    ]
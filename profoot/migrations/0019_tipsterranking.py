@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0018_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TipsterRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('7', '7 derniers jours'), ('30', '30 derniers jours'), ('90', '90 derniers jours'), ('all', 'Depuis toujours')], max_length=3, verbose_name='Période')),
+                ('discipline', models.CharField(blank=True, default='', max_length=50, verbose_name='Discipline')),
+                ('type_pari', models.CharField(blank=True, default='', max_length=50, verbose_name='Type de pari')),
+                ('total_completes', models.IntegerField(default=0)),
+                ('total_gagnants', models.IntegerField(default=0)),
+                ('mise_totale', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit_total', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('roi', models.DecimalField(blank=True, decimal_places=2, help_text='Profit rapporté à la mise totale, en %', max_digits=9, null=True)),
+                ('taux_reussite', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('rank_roi', models.PositiveIntegerField()),
+                ('rank_taux_reussite', models.PositiveIntegerField()),
+                ('rank_profit', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Classement Tipster',
+                'verbose_name_plural': 'Classements Tipsters',
+                'indexes': [models.Index(fields=['window', 'discipline', 'type_pari', 'rank_roi'], name='ranking_roi_idx'), models.Index(fields=['window', 'discipline', 'type_pari', 'rank_taux_reussite'], name='ranking_taux_reussite_idx'), models.Index(fields=['window', 'discipline', 'type_pari', 'rank_profit'], name='ranking_profit_idx')],
+            },
+        ),
+    ]
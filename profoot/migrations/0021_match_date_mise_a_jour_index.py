@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0020_reparse_pending_bet_spec'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='match',
+            name='date_mise_a_jour',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
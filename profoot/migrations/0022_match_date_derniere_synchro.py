@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0021_match_date_mise_a_jour_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='date_derniere_synchro',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernière synchronisation avec Sportmonks'),
+        ),
+    ]
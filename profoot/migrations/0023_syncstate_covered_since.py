@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0022_match_date_derniere_synchro'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='covered_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Couverture continue depuis'),
+        ),
+    ]
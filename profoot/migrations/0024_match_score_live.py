@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_current_scores(apps, schema_editor):
+    """
+    Les scores en cours étaient jusqu'ici écrits dans score_final_* : ils servent de score
+    en direct initial. score_final_* n'est pas modifié (le règlement ne le lit qu'avec
+    un statut final) ; la prochaine synchronisation le vide pour les matchs non terminés.
+    """
+    Match = apps.get_model('profoot', 'Match')
+    Match.objects.update(score_live_domicile=F('score_final_domicile'), score_live_exterieur=F('score_final_exterieur'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profoot', '0023_syncstate_covered_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='score_live_domicile',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Score en direct domicile'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='score_live_exterieur',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Score en direct extérieur'),
+        ),
+        migrations.RunPython(copy_current_scores, migrations.RunPython.noop),
+    ]
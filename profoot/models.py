@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -24,16 +24,41 @@ class Match( models.Model ):
     stade = models.CharField( max_length=100, blank=True, null=True, verbose_name="Stade" )  # Nouveau champ potentiel
 
     # Scores finaux (peuvent être mis à jour par la commande de mise à jour)
+    # Renseignés seulement une fois le match dans un état final : ce sont eux que lit le règlement.
     score_final_domicile = models.IntegerField( null=True, blank=True, verbose_name="Score Final Domicile" )
     score_final_exterieur = models.IntegerField( null=True, blank=True, verbose_name="Score Final Extérieur" )
 
+    # Score courant pendant la rencontre (poll_livescores), pour l'affichage en direct uniquement.
+    score_live_domicile = models.IntegerField( null=True, blank=True, verbose_name="Score en direct domicile" )
+    score_live_exterieur = models.IntegerField( null=True, blank=True, verbose_name="Score en direct extérieur" )
+
     # Statut du match (ex: 'Not Started', 'Live', 'Finished', 'Cancelled', etc.)
     # Peut être utile pour l'affichage ou des logiques complexes.
     # Vous pouvez stocker l'ID numérique ou la chaîne de statut de Sportmonks.
     status_api = models.CharField( max_length=50, blank=True, null=True, verbose_name="Statut API du Match" )
 
+    # Empreinte du contenu Sportmonks normalisé lors de la dernière écriture par l'ingestion.
+    # Si elle n'a pas changé, la ligne n'est pas réécrite.
+    payload_hash = models.CharField( max_length=32, blank=True, default='', verbose_name="Empreinte des données API" )
+
+    # Planification du règlement par run_settlement_daemon : prochaine vérification prévue,
+    # nombre de vérifications infructueuses après la fin attendue (backoff exponentiel),
+    # et mise de côté pour vérification manuelle une fois ce nombre épuisé.
+    settlement_next_check = models.DateTimeField( null=True, blank=True,
+                                                  verbose_name="Prochaine vérification du résultat" )
+    settlement_attempts = models.PositiveIntegerField( default=0, verbose_name="Vérifications sans résultat" )
+    settlement_parked = models.BooleanField( default=False, db_index=True,
+                                             verbose_name="À régler manuellement" )
+
+    # Dernier passage de la synchronisation des matchs, y compris quand la fixture est
+    # inchangée (payload_hash identique, ligne non réécrite) : sert à juger la fraîcheur
+    # de la ligne dans resolve_match.
+    date_derniere_synchro = models.DateTimeField( null=True, blank=True,
+                                                  verbose_name="Dernière synchronisation avec Sportmonks" )
+
     date_creation = models.DateTimeField( auto_now_add=True )
-    date_mise_a_jour = models.DateTimeField( auto_now=True )
+    # Indexée : le diffuseur des scores en direct lit les matchs modifiés depuis son dernier tick.
+    date_mise_a_jour = models.DateTimeField( auto_now=True, db_index=True )
 
     class Meta:
         verbose_name = "Match Sportif"
@@ -44,6 +69,55 @@ class Match( models.Model ):
         return f"{self.equipe_domicile} vs {self.equipe_exterieur} ({self.ligue}) le {self.date_match.strftime( '%Y-%m-%d %H:%M' )}"
 
 
+# --- Tables de référence Sportmonks ---
+# Noms des ligues et des stades, indexés par leur ID Sportmonks.
+# Elles servent de second niveau au cache de profoot/reference_cache.py
+# et évitent un appel API par fixture lors de l'ingestion.
+class League( models.Model ):
+    sportmonks_id = models.BigIntegerField( unique=True, verbose_name="ID Sportmonks de la ligue" )
+    name = models.CharField( max_length=100, verbose_name="Nom de la ligue" )
+    date_mise_a_jour = models.DateTimeField( auto_now=True )
+
+    class Meta:
+        verbose_name = "Ligue"
+        verbose_name_plural = "Ligues"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Venue( models.Model ):
+    sportmonks_id = models.BigIntegerField( unique=True, verbose_name="ID Sportmonks du stade" )
+    name = models.CharField( max_length=100, verbose_name="Nom du stade" )
+    date_mise_a_jour = models.DateTimeField( auto_now=True )
+
+    class Meta:
+        verbose_name = "Stade"
+        verbose_name_plural = "Stades"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+# État des synchronisations avec Sportmonks (watermarks de la synchronisation incrémentale).
+class SyncState( models.Model ):
+    key = models.CharField( max_length=50, unique=True, verbose_name="Clé de synchronisation" )
+    last_synced_at = models.DateTimeField( null=True, blank=True, verbose_name="Dernière synchronisation réussie" )
+    last_full_sync_at = models.DateTimeField( null=True, blank=True, verbose_name="Dernier parcours complet réussi" )
+    # Flux des fixtures modifiées : début de la série de passages sans trou qui mène à last_synced_at.
+    covered_since = models.DateTimeField( null=True, blank=True, verbose_name="Couverture continue depuis" )
+    date_mise_a_jour = models.DateTimeField( auto_now=True )
+
+    class Meta:
+        verbose_name = "État de synchronisation"
+        verbose_name_plural = "États de synchronisation"
+
+    def __str__(self):
+        return f"{self.key} (dernière synchronisation : {self.last_synced_at})"
+
+
 # Modèle pour représenter un pronostic sportif
 class Pronostic( models.Model ):
     # Options prédéfinies pour les champs
@@ -106,6 +180,22 @@ class Pronostic( models.Model ):
     cote = models.DecimalField( max_digits=5, decimal_places=2, null=True, blank=True, verbose_name="Cote" )
     mise = models.DecimalField( max_digits=5, decimal_places=2, null=True, blank=True, verbose_name="Mise (€)" )
 
+    # Spécification structurée du pari, extraite de prediction_details / prediction_score
+    # par PronosticForm (voir profoot/bet_spec.py). Le règlement n'utilise que ces colonnes.
+    pari_selection = models.CharField( max_length=10, blank=True, null=True,
+                                       verbose_name="Sélection (1, N, 2, 1N, 12, N2, OVER, UNDER)" )
+    pari_ligne = models.DecimalField( max_digits=5, decimal_places=2, null=True, blank=True,
+                                      verbose_name="Ligne Over/Under" )
+    pari_camp = models.CharField( max_length=10, blank=True, null=True,
+                                  choices=[('DOMICILE', 'Domicile'), ('EXTERIEUR', 'Extérieur')],
+                                  verbose_name="Équipe choisie (handicap)" )
+    pari_handicap = models.DecimalField( max_digits=5, decimal_places=2, null=True, blank=True,
+                                         verbose_name="Handicap" )
+    pari_score_domicile = models.PositiveSmallIntegerField( null=True, blank=True,
+                                                            verbose_name="Score exact prédit (domicile)" )
+    pari_score_exterieur = models.PositiveSmallIntegerField( null=True, blank=True,
+                                                             verbose_name="Score exact prédit (extérieur)" )
+
     # Résultat et score final
     resultat = models.CharField( max_length=50, choices=STATUT_CHOICES, default='EN_COURS',
                                  verbose_name="Statut du pronostic" )
@@ -150,6 +240,12 @@ class Pronostic( models.Model ):
         else:
             return 0
 
+    def save(self, *args, **kwargs):
+        # Le signal post_save applique le delta des statistiques de l'auteur (UserStats) :
+        # l'écriture et son delta sont validés dans la même transaction (cf. profoot/stats.py).
+        with transaction.atomic():
+            super().save( *args, **kwargs )
+
     def __str__(self):
         # Utiliser les informations du match lié pour une meilleure description
         if self.match:
@@ -158,6 +254,10 @@ class Pronostic( models.Model ):
 
     class Meta:
         ordering = ['-date_match']  # Peut être ajusté pour trier par match.date_match
+        indexes = [
+            # Pagination par curseur de la liste des pronostics (profoot/pagination.py)
+            models.Index( fields=['date_match', 'id'], name='pronostic_date_match_id_idx' ),
+        ]
         verbose_name = "Pronostic Sportif"
         verbose_name_plural = "Pronostics Sportifs"
 
@@ -173,6 +273,11 @@ class Follow( models.Model ):
         verbose_name = "Suivi"
         verbose_name_plural = "Suivis"
 
+    def save(self, *args, **kwargs):
+        # Même transaction que le delta des compteurs d'abonnés (signal post_save).
+        with transaction.atomic():
+            super().save( *args, **kwargs )
+
     def __str__(self):
         return f"{self.follower.username} suit {self.following.username}"
 
@@ -246,6 +351,86 @@ class UserProfile( models.Model ):
         return f"Profil de {self.user.username}"
 
 
+# Statistiques de tipster dénormalisées (une ligne par utilisateur), tenues à jour par
+# deltas (expressions F) à chaque création, règlement, modification ou suppression de
+# Pronostic et à chaque Follow (profoot/stats.py). Les pages de profil lisent cette ligne ;
+# rebuild_user_stats la recalcule entièrement en cas de dérive.
+class UserStats( models.Model ):
+    user = models.OneToOneField( User, on_delete=models.CASCADE, primary_key=True, related_name='stats',
+                                 verbose_name="Utilisateur" )
+    total_pronostics = models.IntegerField( default=0 )
+    total_gagnants = models.IntegerField( default=0 )
+    total_perdants = models.IntegerField( default=0 )
+    total_en_cours = models.IntegerField( default=0 )
+    total_annules = models.IntegerField( default=0 )
+    # Mises et profit des pronostics réglés (GAGNANT / PERDANT), cf. Pronostic.gain_ou_perte.
+    mise_totale = models.DecimalField( max_digits=12, decimal_places=2, default=0 )
+    profit_total = models.DecimalField( max_digits=14, decimal_places=4, default=0 )
+    followers_count = models.IntegerField( default=0 )
+    following_count = models.IntegerField( default=0 )
+    date_mise_a_jour = models.DateTimeField( auto_now=True )
+
+    class Meta:
+        verbose_name = "Statistiques Utilisateur"
+        verbose_name_plural = "Statistiques Utilisateurs"
+
+    def __str__(self):
+        return f"Statistiques de {self.user.username}"
+
+    @property
+    def total_completes(self):
+        return self.total_gagnants + self.total_perdants
+
+    @property
+    def taux_reussite(self):
+        """Pourcentage de pronostics gagnants parmi les pronostics réglés."""
+        if not self.total_completes:
+            return 0
+        return round( self.total_gagnants / self.total_completes * 100, 2 )
+
+
+# Classement des tipsters précalculé par refresh_leaderboard (profoot/leaderboard.py) :
+# une ligne par (fenêtre, discipline, type de pari, utilisateur) ; discipline et type_pari
+# vides pour « tous ». Chaque critère a son rang et son index, de sorte qu'une page du
+# classement est une lecture d'intervalle (fenêtre, discipline, type_pari, rang).
+class TipsterRanking( models.Model ):
+    WINDOW_CHOICES = [
+        ('7', '7 derniers jours'),
+        ('30', '30 derniers jours'),
+        ('90', '90 derniers jours'),
+        ('all', 'Depuis toujours'),
+    ]
+
+    window = models.CharField( max_length=3, choices=WINDOW_CHOICES, verbose_name="Période" )
+    discipline = models.CharField( max_length=50, blank=True, default='', verbose_name="Discipline" )
+    type_pari = models.CharField( max_length=50, blank=True, default='', verbose_name="Type de pari" )
+    user = models.ForeignKey( User, on_delete=models.CASCADE, related_name='rankings', verbose_name="Utilisateur" )
+    total_completes = models.IntegerField( default=0 )
+    total_gagnants = models.IntegerField( default=0 )
+    mise_totale = models.DecimalField( max_digits=12, decimal_places=2, default=0 )
+    profit_total = models.DecimalField( max_digits=14, decimal_places=4, default=0 )
+    roi = models.DecimalField( max_digits=9, decimal_places=2, null=True, blank=True,
+                               help_text="Profit rapporté à la mise totale, en %" )
+    taux_reussite = models.DecimalField( max_digits=5, decimal_places=2, default=0 )
+    rank_roi = models.PositiveIntegerField()
+    rank_taux_reussite = models.PositiveIntegerField()
+    rank_profit = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index( fields=['window', 'discipline', 'type_pari', 'rank_roi'], name='ranking_roi_idx' ),
+            models.Index( fields=['window', 'discipline', 'type_pari', 'rank_taux_reussite'],
+                          name='ranking_taux_reussite_idx' ),
+            models.Index( fields=['window', 'discipline', 'type_pari', 'rank_profit'], name='ranking_profit_idx' ),
+        ]
+        verbose_name = "Classement Tipster"
+        verbose_name_plural = "Classements Tipsters"
+
+    def __str__(self):
+        return f"{self.user.username} ({self.get_window_display()}) : ROI {self.roi} %"
+
+
 # Modèle pour les offres des bookmakers (déjà existant et utilisé)
 class BookmakerOffer( models.Model ):
     name = models.CharField( max_length=100, verbose_name="Nom du Bookmaker" )
@@ -0,0 +1,210 @@
+# profoot/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import F, Q
+
+# Pagination par curseur (keyset) sur (date_match, id) pour la liste des pronostics.
+# Une page est lue avec LIMIT n + 1 (la ligne en plus indique s'il y a une suite),
+# sans COUNT(*) ni OFFSET : le coût d'une page profonde est celui de la première.
+# Les anciennes URL ?page=N restent servies (OFFSET) ; au-delà de
+# PRONOSTICS_MAX_PAGE_NUMBER, les liens générés passent aux curseurs ?after= / ?before=.
+# Les pronostics sans date_match sont placés en fin de liste, quel que soit le sens.
+PRONOSTICS_PER_PAGE = getattr( settings, 'PRONOSTICS_PER_PAGE', 5 )
+PRONOSTICS_MAX_PAGE_NUMBER = getattr( settings, 'PRONOSTICS_MAX_PAGE_NUMBER', 10 )
+# Nombre de liens numérotés affichés avant la page courante.
+PRONOSTICS_PAGE_LINKS = 4
+
+PAGINATION_PARAMS = ('page', 'after', 'before')
+
+
+def encode_cursor(pronostic):
+    date_match = pronostic.date_match.isoformat() if pronostic.date_match else None
+    raw = json.dumps( [date_match, pronostic.pk], separators=(',', ':') ).encode()
+    return base64.urlsafe_b64encode( raw ).decode().rstrip( '=' )
+
+
+def decode_cursor(cursor):
+    """
+    Retourne (date_match, pk) ou None si le curseur est invalide.
+    """
+    try:
+        raw = base64.urlsafe_b64decode( cursor + '=' * (-len( cursor ) % 4) )
+        date_match, pk = json.loads( raw )
+        return (datetime.fromisoformat( date_match ) if date_match else None), int( pk )
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def _ordering(descending, reverse=False):
+    """
+    Tri (date_match, pk) du sens demandé, dates nulles en dernier ; reverse=True donne
+    l'ordre exactement inverse (lecture à rebours depuis un curseur ou depuis la fin).
+    """
+    nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+    if descending != reverse:
+        return [F( 'date_match' ).desc( **nulls ), F( 'pk' ).desc()]
+    return [F( 'date_match' ).asc( **nulls ), F( 'pk' ).asc()]
+
+
+def _segments(cursor, descending, forward):
+    """
+    Conditions des lignes à lire après le curseur (forward) ou avant lui, dans l'ordre de
+    lecture. Les lignes datées et celles sans date forment deux segments lus séparément :
+    chaque condition reste un parcours d'intervalle de l'index (date_match, id).
+    Sans curseur (lecture à rebours depuis la fin), tous les segments sont lus.
+    """
+    past = 'lt' if descending == forward else 'gt'
+    if cursor is None:
+        dated, undated = Q( date_match__isnull=False ), Q( date_match__isnull=True )
+    else:
+        cursor_date, cursor_pk = cursor
+        if cursor_date is None:
+            dated = None if forward else Q( date_match__isnull=False )
+            undated = Q( date_match__isnull=True, **{f'pk__{past}': cursor_pk} )
+        else:
+            dated = Q( **{f'date_match__{past}e': cursor_date} ) & (
+                    Q( **{f'date_match__{past}': cursor_date} ) | Q( **{f'pk__{past}': cursor_pk} ))
+            undated = Q( date_match__isnull=True ) if forward else None
+    segments = [dated, undated] if forward else [undated, dated]
+    return [condition for condition in segments if condition is not None]
+
+
+def _read(queryset, cursor, descending, forward, limit):
+    """
+    Lit au plus `limit` lignes à partir du curseur, dans l'ordre de lecture.
+    """
+    ordering = _ordering( descending, reverse=not forward )
+    rows = []
+    for condition in _segments( cursor, descending, forward ):
+        if len( rows ) >= limit:
+            break
+        rows.extend( queryset.filter( condition ).order_by( *ordering )[:limit - len( rows )] )
+    return rows
+
+
+def _read_backwards(queryset, cursor, per_page, descending):
+    """
+    Lit à rebours les per_page lignes précédant le curseur (ou la fin de la liste).
+    Retourne (lignes dans l'ordre d'affichage, il existe des lignes avant).
+    """
+    rows = _read( queryset, cursor, descending, forward=False, limit=per_page + 1 )
+    has_previous = len( rows ) > per_page
+    rows = rows[:per_page]
+    rows.reverse()
+    return rows, has_previous
+
+
+class KeysetPage:
+    """
+    Page de pronostics : itérable comme une Page de Paginator, avec les paramètres
+    d'URL des pages précédente et suivante (previous_query, next_query).
+    `number` n'est connu qu'en navigation par numéro de page ; avec max_page_number=None,
+    la navigation reste numérotée jusqu'au bout (pas de curseur).
+    """
+
+    def __init__(self, object_list, has_previous, has_next, number=None, max_page_number=PRONOSTICS_MAX_PAGE_NUMBER):
+        self.object_list = object_list
+        self.has_previous = has_previous
+        self.has_next = has_next
+        self.number = number
+        self.max_page_number = max_page_number
+
+    def _numbered(self, number):
+        return self.max_page_number is None or number < self.max_page_number
+
+    def __iter__(self):
+        return iter( self.object_list )
+
+    def __len__(self):
+        return len( self.object_list )
+
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    @property
+    def previous_query(self):
+        if not self.has_previous:
+            return None
+        if self.number is not None:
+            return f'page={self.number - 1}'
+        return f'before={encode_cursor( self.object_list[0] )}'
+
+    @property
+    def next_query(self):
+        if not self.has_next:
+            return None
+        if self.number is not None and self._numbered( self.number ):
+            return f'page={self.number + 1}'
+        return f'after={encode_cursor( self.object_list[-1] )}'
+
+    @property
+    def page_numbers(self):
+        """
+        Numéros de page affichables sans COUNT(*) : quelques pages avant la courante,
+        et la suivante si elle existe et reste sous max_page_number.
+        """
+        if self.number is None:
+            return []
+        last = self.number + 1 if self.has_next and self._numbered( self.number ) else self.number
+        return list( range( max( 1, self.number - PRONOSTICS_PAGE_LINKS ), last + 1 ) )
+
+
+def page_number(params):
+    try:
+        return max( 1, int( params.get( 'page', 1 ) ) )
+    except (TypeError, ValueError):
+        return 1
+
+
+def paginate_pronostics(queryset, params, descending=True, per_page=PRONOSTICS_PER_PAGE):
+    """
+    Lit une page de `queryset` trié par (date_match, id) à partir des paramètres
+    GET `params` : ?after=<curseur>, ?before=<curseur> ou ?page=N (par défaut la page 1).
+    """
+    cursor = None
+    forward = True
+    if params.get( 'after' ):
+        cursor = decode_cursor( params['after'] )
+    elif params.get( 'before' ):
+        cursor = decode_cursor( params['before'] )
+        forward = False
+
+    if cursor is not None:
+        if forward:
+            rows = _read( queryset, cursor, descending, forward=True, limit=per_page + 1 )
+            return KeysetPage( rows[:per_page], has_previous=True, has_next=len( rows ) > per_page )
+        rows, has_previous = _read_backwards( queryset, cursor, per_page, descending )
+        # Revenu en début de liste : on repasse à la numérotation.
+        return KeysetPage( rows, has_previous=has_previous, has_next=True, number=None if has_previous else 1 )
+
+    number = page_number( params )
+    offset = (number - 1) * per_page
+    rows = list( queryset.order_by( *_ordering( descending ) )[offset:offset + per_page + 1] )
+    if not rows and number > 1:
+        # Page au-delà de la fin (ancien lien) : dernière page, comme Paginator.get_page.
+        rows, has_previous = _read_backwards( queryset, None, per_page, descending )
+        return KeysetPage( rows, has_previous=has_previous, has_next=False, number=None if has_previous else 1 )
+    return KeysetPage( rows[:per_page], has_previous=number > 1, has_next=len( rows ) > per_page, number=number )
+
+
+def paginate_ranked(queryset, ranked_ids, params, per_page=PRONOSTICS_PER_PAGE):
+    """
+    Page ?page=N des pronostics de `queryset` dans l'ordre de `ranked_ids` (résultats de
+    recherche classés par pertinence, filtres de la vue déjà appliqués). La liste d'IDs
+    étant bornée, la navigation reste numérotée.
+    """
+    number = page_number( params )
+    offset = (number - 1) * per_page
+    if offset >= len( ranked_ids ) and number > 1:
+        number = max( 1, -(-len( ranked_ids ) // per_page) )
+        offset = (number - 1) * per_page
+    page_ids = ranked_ids[offset:offset + per_page]
+    objects = queryset.in_bulk( page_ids )
+    rows = [objects[pk] for pk in page_ids if pk in objects]
+    return KeysetPage( rows, has_previous=number > 1, has_next=len( ranked_ids ) > offset + per_page,
+                       number=number, max_page_number=None )
@@ -0,0 +1,219 @@
+# profoot/reference_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import League, Venue
+from .sportmonks_client import CircuitOpenError, SportmonksClientError, sportmonks_get, map_concurrently
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Cache à deux niveaux pour les noms de ligues et de stades :
+#   1. un LRU en mémoire, propre au processus, avec une durée de vie (TTL) ;
+#   2. les tables League / Venue en base, indexées par ID Sportmonks.
+# L'API n'est consultée que pour les IDs absents des deux niveaux, et les
+# résultats sont alors écrits en base en un seul bulk_create.
+REFERENCE_CACHE_MAX_SIZE = getattr( settings, 'REFERENCE_CACHE_MAX_SIZE', 2048 )
+REFERENCE_CACHE_TTL = getattr( settings, 'REFERENCE_CACHE_TTL', 6 * 60 * 60 )  # secondes
+# Les IDs introuvables (ou en erreur) sont mémorisés comme absents pendant cette durée,
+# pour ne pas rappeler l'API à chaque fixture qui les référence.
+REFERENCE_NEGATIVE_CACHE_TTL = getattr( settings, 'REFERENCE_NEGATIVE_CACHE_TTL', 5 * 60 )  # secondes
+
+# Pagination utilisée pour le préchargement complet (warm_reference_cache).
+REFERENCE_WARM_PER_PAGE = 50
+
+NOT_AVAILABLE = "N/A"
+
+# Valeur du LRU pour un ID résolu sans succès (cache négatif).
+_UNKNOWN = object()
+
+
+class TTLCache:
+    """
+    Petit cache LRU thread-safe dont les entrées expirent après `ttl` secondes.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get( key )
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end( key )
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end( key )
+            while len( self._data ) > self.maxsize:
+                self._data.popitem( last=False )
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _ReferenceTable:
+    """
+    Associe un modèle de référence (League, Venue) à son endpoint Sportmonks
+    et à son LRU en mémoire.
+    """
+
+    def __init__(self, model, endpoint):
+        self.model = model
+        self.endpoint = endpoint
+        self.cache = TTLCache( REFERENCE_CACHE_MAX_SIZE, REFERENCE_CACHE_TTL )
+
+    def _fetch_name_from_api(self, sportmonks_id, breaker=None):
+        if breaker is None:
+            full_response = sportmonks_get( f'{self.endpoint}/{sportmonks_id}' )
+        else:
+            try:
+                full_response = breaker.call( sportmonks_get, f'{self.endpoint}/{sportmonks_id}',
+                                              raise_client_errors=True, interactive=True )
+            except (CircuitOpenError, SportmonksClientError) as e:
+                logger.warning( f"{e} Nom {self.endpoint}/{sportmonks_id} non récupéré." )
+                return None
+        if full_response and full_response.get( 'data' ):
+            return full_response['data'].get( 'name' )
+        return None
+
+    def store(self, names):
+        """
+        Écrit (ou met à jour) en base un lot {sportmonks_id: nom} et alimente le LRU.
+        """
+        if not names:
+            return
+        self.model.objects.bulk_create(
+            [self.model( sportmonks_id=sportmonks_id, name=name[:100] ) for sportmonks_id, name in names.items()],
+            update_conflicts=True,
+            unique_fields=['sportmonks_id'],
+            update_fields=['name', 'date_mise_a_jour'],
+        )
+        for sportmonks_id, name in names.items():
+            self.cache.set( sportmonks_id, name )
+
+    def get_names(self, ids, breaker=None):
+        """
+        Retourne {sportmonks_id: nom} pour tous les IDs demandés, en consultant
+        successivement le LRU, la base (une requête) puis l'API pour le reste.
+        Les IDs introuvables sont associés à "N/A", et ne sont pas redemandés à l'API
+        pendant REFERENCE_NEGATIVE_CACHE_TTL secondes.
+        `breaker` (appels depuis les vues) protège les appels API par un disjoncteur.
+        """
+        wanted = {int( sportmonks_id ) for sportmonks_id in ids if sportmonks_id}
+        names = {}
+
+        missing = set()
+        for sportmonks_id in wanted:
+            name = self.cache.get( sportmonks_id )
+            if name is None:
+                missing.add( sportmonks_id )
+            elif name is not _UNKNOWN:
+                names[sportmonks_id] = name
+
+        if missing:
+            for sportmonks_id, name in self.model.objects.filter( sportmonks_id__in=missing ).values_list(
+                    'sportmonks_id', 'name' ):
+                names[sportmonks_id] = name
+                self.cache.set( sportmonks_id, name )
+                missing.discard( sportmonks_id )
+
+        if missing:
+            logger.info( f"Cache {self.endpoint}: {len( missing )} ID(s) inconnus, récupération depuis Sportmonks." )
+            # Appels API en parallèle ; l'écriture en base reste sur le thread appelant.
+            fetched = {sportmonks_id: name
+                       for sportmonks_id, name in map_concurrently(
+                           lambda sportmonks_id: self._fetch_name_from_api( sportmonks_id, breaker ), sorted( missing ) )
+                       if name}
+            self.store( fetched )
+            names.update( fetched )
+            for sportmonks_id in missing.difference( fetched ):
+                self.cache.set( sportmonks_id, _UNKNOWN, ttl=REFERENCE_NEGATIVE_CACHE_TTL )
+
+        for sportmonks_id in wanted:
+            names.setdefault( sportmonks_id, NOT_AVAILABLE )
+        return names
+
+    def get_name(self, sportmonks_id, breaker=None):
+        if not sportmonks_id:
+            return NOT_AVAILABLE
+        return self.get_names( [sportmonks_id], breaker=breaker )[int( sportmonks_id )]
+
+    def warm(self):
+        """
+        Précharge toutes les entrées accessibles avec l'abonnement en parcourant
+        l'endpoint de liste paginé. Retourne le nombre d'entrées écrites.
+        """
+        stored = 0
+        params = {'page': 1, 'per_page': REFERENCE_WARM_PER_PAGE}
+        while True:
+            full_response = sportmonks_get( self.endpoint, params=params )
+            if not full_response or not full_response.get( 'data' ):
+                break
+
+            self.store( {item['id']: item.get( 'name' ) or NOT_AVAILABLE
+                         for item in full_response['data'] if item.get( 'id' )} )
+            stored += len( full_response['data'] )
+
+            # Sportmonks expose la pagination sous 'meta' ou à la racine selon les endpoints.
+            pagination_info = full_response.get( 'meta', {} ).get( 'pagination' ) or full_response.get( 'pagination' )
+            if not pagination_info:
+                break
+            has_more = pagination_info.get( 'has_more' )
+            if has_more is None:
+                has_more = pagination_info.get( 'current_page', 0 ) < pagination_info.get( 'last_page', 0 )
+            if not has_more:
+                break
+            params['page'] += 1
+        return stored
+
+
+leagues = _ReferenceTable( League, 'leagues' )
+venues = _ReferenceTable( Venue, 'venues' )
+
+
+def get_league_name(league_id, breaker=None):
+    """
+    Retourne le nom d'une ligue à partir de son ID Sportmonks, sans appel API si elle est connue.
+    """
+    return leagues.get_name( league_id, breaker=breaker )
+
+
+def get_venue_name(venue_id, breaker=None):
+    """
+    Retourne le nom d'un stade à partir de son ID Sportmonks, sans appel API s'il est connu.
+    """
+    return venues.get_name( venue_id, breaker=breaker )
+
+
+def prefetch_references(fixtures):
+    """
+    Résout en lot les ligues et stades d'une liste de fixtures (une page d'API).
+    Les appels suivants à get_league_name / get_venue_name sont alors servis par le LRU.
+    """
+    leagues.get_names( [fixture.get( 'league_id' ) for fixture in fixtures] )
+    venues.get_names( [fixture.get( 'venue_id' ) for fixture in fixtures] )
+
+
+def warm_reference_cache():
+    """
+    Précharge toutes les ligues et tous les stades de l'abonnement.
+    Retourne le nombre de ligues et de stades écrits.
+    """
+    return leagues.warm(), venues.warm()
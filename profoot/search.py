@@ -0,0 +1,257 @@
+# profoot/search.py
+
+import logging
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Index de recherche plein texte des pronostics (recherche ?q= de liste_pronostics).
+#   - SQLite : table virtuelle FTS5 (tokenizer unicode61, accents ignorés), classement bm25 ;
+#   - PostgreSQL : table de tsvector (configuration 'french') avec index GIN, classement ts_rank.
+# Un document par pronostic : équipes (celles du pronostic et du match lié), ligue, analyse,
+# par ordre de poids décroissant. Les accents sont retirés avant indexation et recherche.
+# L'index est tenu à jour par les signaux de Pronostic et Match (profoot/signals.py).
+# Les écritures en lot, qui ne déclenchent pas les signaux (upsert des Match, règlement),
+# réindexent explicitement les pronostics concernés avec reindex_pronostics ;
+# rebuild_search_index reconstruit tout l'index.
+# La recherche filtre le queryset de la vue par une sous-requête sur l'index : les autres
+# filtres et le tri par date s'appliquent à tous les résultats, sans limite. Seul le tri
+# par pertinence borne le classement, filtres déjà appliqués, à SEARCH_MAX_RESULTS.
+# Sur une autre base, ou si la table est absente, search_pronostics retourne None et
+# la vue revient à la recherche icontains.
+SEARCH_TABLE = 'profoot_pronostic_search'
+SEARCH_MAX_RESULTS = getattr( settings, 'SEARCH_MAX_RESULTS', 200 )
+SEARCH_BATCH_SIZE = 500
+
+# Poids des colonnes (équipes, ligue, analyse)
+_FTS5_WEIGHTS = (10.0, 5.0, 1.0)
+_TSVECTOR_WEIGHTS = ('A', 'B', 'C')
+
+_available = {}  # alias de connexion -> table d'index présente
+
+
+def normalize_search_text(text):
+    """
+    Minuscules sans accents : « Étoile Rouge » -> « etoile rouge ».
+    """
+    decomposed = unicodedata.normalize( 'NFKD', text or '' )
+    return ''.join( char for char in decomposed if not unicodedata.combining( char ) ).lower()
+
+
+def _search_terms(query):
+    return re.findall( r'\w+', normalize_search_text( query ) )
+
+
+def build_document(pronostic, match=None):
+    """
+    Colonnes indexées d'un pronostic : (équipes, ligue, analyse), normalisées.
+    """
+    teams = [pronostic.equipe_domicile, pronostic.equipe_exterieur]
+    leagues = [pronostic.ligue]
+    if match is not None:
+        teams += [match.equipe_domicile, match.equipe_exterieur]
+        leagues.append( match.ligue )
+    return (
+        normalize_search_text( ' '.join( dict.fromkeys( value for value in teams if value ) ) ),
+        normalize_search_text( ' '.join( dict.fromkeys( value for value in leagues if value ) ) ),
+        normalize_search_text( pronostic.prediction_details ),
+    )
+
+
+def create_index_table(db_connection):
+    """
+    Crée la table d'index pour le moteur de `db_connection`. Retourne False si le moteur
+    n'est pas pris en charge ou si SQLite n'a pas été compilé avec FTS5.
+    """
+    _available.pop( db_connection.alias, None )
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                    f"equipes, ligue, details, tokenize = 'unicode61 remove_diacritics 2')" )
+            except DatabaseError as e:
+                logger.warning( f"FTS5 indisponible, la recherche utilisera icontains : {e}" )
+                return False
+            return True
+        if db_connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"pronostic_id bigint PRIMARY KEY REFERENCES profoot_pronostic (id) ON DELETE CASCADE "
+                f"DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)" )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)" )
+            return True
+    return False
+
+
+def drop_index_table(db_connection):
+    _available.pop( db_connection.alias, None )
+    if db_connection.vendor in ('sqlite', 'postgresql'):
+        with db_connection.cursor() as cursor:
+            cursor.execute( f"DROP TABLE IF EXISTS {SEARCH_TABLE}" )
+
+
+def is_index_available(db_connection=connection):
+    if db_connection.alias not in _available:
+        _available[db_connection.alias] = (
+                db_connection.vendor in ('sqlite', 'postgresql')
+                and SEARCH_TABLE in db_connection.introspection.table_names()
+        )
+    return _available[db_connection.alias]
+
+
+def write_documents(rows, db_connection=connection):
+    """
+    Remplace dans l'index les documents des lignes (pk, équipes, ligue, analyse).
+    """
+    rows = list( rows )
+    if not rows:
+        return
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'sqlite':
+            cursor.executemany( f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows] )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, equipes, ligue, details) VALUES (%s, %s, %s, %s)", rows )
+        else:
+            document = ' || '.join( f"setweight(to_tsvector('french', %s), '{weight}')" for weight in _TSVECTOR_WEIGHTS )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (pronostic_id, document) VALUES (%s, {document}) "
+                f"ON CONFLICT (pronostic_id) DO UPDATE SET document = EXCLUDED.document", rows )
+
+
+def delete_documents(pks, db_connection=connection):
+    column = 'rowid' if db_connection.vendor == 'sqlite' else 'pronostic_id'
+    with db_connection.cursor() as cursor:
+        cursor.executemany( f"DELETE FROM {SEARCH_TABLE} WHERE {column} = %s", [(pk,) for pk in pks] )
+
+
+def index_pronostics(pronostics):
+    """
+    (Ré)indexe les pronostics donnés (queryset ou liste). Les erreurs d'index sont
+    journalisées sans interrompre l'écriture du pronostic.
+    """
+    if not is_index_available():
+        return
+    try:
+        with transaction.atomic():
+            write_documents( (pronostic.pk, *build_document( pronostic, pronostic.match )) for pronostic in pronostics )
+    except DatabaseError as e:
+        logger.error( f"Erreur lors de la mise à jour de l'index de recherche : {e}" )
+
+
+def reindex_pronostics(pronostics):
+    """
+    Réindexe les pronostics d'un queryset par lots de SEARCH_BATCH_SIZE, après une
+    écriture en lot (bulk_create, bulk_update, update) qui ne déclenche pas les signaux.
+    """
+    if not is_index_available():
+        return
+    batch = []
+    for pronostic in pronostics.select_related( 'match' ).order_by( 'pk' ).iterator( chunk_size=SEARCH_BATCH_SIZE ):
+        batch.append( pronostic )
+        if len( batch ) >= SEARCH_BATCH_SIZE:
+            index_pronostics( batch )
+            batch = []
+    if batch:
+        index_pronostics( batch )
+
+
+def unindex_pronostics(pks):
+    if not is_index_available():
+        return
+    try:
+        with transaction.atomic():
+            delete_documents( pks )
+    except DatabaseError as e:
+        logger.error( f"Erreur lors de la suppression de l'index de recherche : {e}" )
+
+
+def rebuild_search_index(pronostics=None, db_connection=connection):
+    """
+    Reconstruit entièrement l'index à partir des pronostics (par défaut, tous).
+    Retourne le nombre de pronostics indexés, ou None si l'index n'est pas disponible.
+    """
+    from .models import Pronostic
+
+    _available.pop( db_connection.alias, None )
+    if not is_index_available( db_connection ):
+        return None
+    queryset = Pronostic.objects.using( db_connection.alias ).select_related( 'match' ) if pronostics is None \
+        else pronostics.select_related( 'match' )
+    indexed = 0
+    with transaction.atomic( using=db_connection.alias ):
+        with db_connection.cursor() as cursor:
+            cursor.execute( f"DELETE FROM {SEARCH_TABLE}" )
+        batch = []
+        for pronostic in queryset.order_by( 'pk' ).iterator( chunk_size=SEARCH_BATCH_SIZE ):
+            batch.append( (pronostic.pk, *build_document( pronostic, pronostic.match )) )
+            if len( batch ) >= SEARCH_BATCH_SIZE:
+                write_documents( batch, db_connection )
+                indexed += len( batch )
+                batch = []
+        write_documents( batch, db_connection )
+        indexed += len( batch )
+    return indexed
+
+
+def _match_query(terms):
+    """
+    Expression de recherche de l'index pour `terms` : tous les mots doivent apparaître,
+    chacun éventuellement comme préfixe.
+    """
+    if connection.vendor == 'sqlite':
+        return ' '.join( f'"{term}"*' for term in terms )
+    return ' & '.join( f'{term}:*' for term in terms )
+
+
+def search_pronostics(queryset, query):
+    """
+    Restreint `queryset` aux pronostics correspondant à `query`, par une sous-requête
+    sur l'index (sans limite : les filtres et le tri du queryset portent sur tous les
+    résultats). Retourne None si l'index n'est pas disponible.
+    """
+    if not is_index_available():
+        return None
+    terms = _search_terms( query )
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'sqlite':
+        matching = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+    else:
+        matching = f"SELECT pronostic_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('french', %s)"
+    return queryset.filter( pk__in=RawSQL( matching, [_match_query( terms )] ) )
+
+
+def search_rank(query):
+    """
+    Expression de pertinence d'un pronostic pour `query`, à trier par ordre croissant
+    (bm25 sous SQLite, opposé de ts_rank sous PostgreSQL).
+    """
+    from .models import Pronostic
+
+    pk_column = f'{connection.ops.quote_name( Pronostic._meta.db_table )}.{connection.ops.quote_name( "id" )}'
+    if connection.vendor == 'sqlite':
+        weights = ', '.join( str( weight ) for weight in _FTS5_WEIGHTS )
+        rank = (f"SELECT bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {pk_column}")
+    else:
+        rank = (f"SELECT -ts_rank(document, to_tsquery('french', %s)) FROM {SEARCH_TABLE} "
+                f"WHERE pronostic_id = {pk_column}")
+    return RawSQL( f"({rank})", [_match_query( _search_terms( query ) )], output_field=FloatField() )
+
+
+def ranked_pronostic_ids(queryset, query, limit=SEARCH_MAX_RESULTS):
+    """
+    IDs des pronostics de `queryset` (déjà restreint par search_pronostics et les filtres
+    de la vue), du plus pertinent au moins pertinent, bornés à `limit`.
+    """
+    return list( queryset.annotate( search_rank=search_rank( query ) ).order_by( 'search_rank', '-pk' )
+                 .values_list( 'pk', flat=True )[:limit] )
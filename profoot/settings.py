@@ -69,6 +69,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'profoot.templatetags.profoot_context.unread_notifications_count',
+                'profoot.templatetags.profoot_context.live_scores',
             ],
         },
     },
@@ -140,6 +141,66 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Récupère la clé API Sportmonks depuis les variables d'environnement.
 # Assurez-vous d'avoir un fichier .env à la racine de votre projet avec SPORTMONKS_API_TOKEN="votre_cle"
 SPORTMONKS_API_TOKEN = os.environ.get('SPORTMONKS_API_TOKEN')
+# URL de base de l'API ; pointer vers le serveur de rejeu local (run_sportmonks_stub) pour les tests de charge.
+SPORTMONKS_BASE_URL = os.environ.get('SPORTMONKS_BASE_URL', 'https://api.sportmonks.com/v3/football')
+# Si défini, chaque réponse Sportmonks réussie est enregistrée sous ce répertoire, pour être rejouée hors ligne.
+SPORTMONKS_RECORD_DIR = os.environ.get('SPORTMONKS_RECORD_DIR') or None
+
+# Client HTTP Sportmonks partagé (voir profoot/sportmonks_client.py)
+SPORTMONKS_CONNECT_TIMEOUT = 3.05  # secondes pour établir la connexion TCP/TLS
+SPORTMONKS_READ_TIMEOUT = 10  # secondes pour lire la réponse
+SPORTMONKS_MAX_RETRIES = 3  # nouvelles tentatives sur 429/5xx et erreurs de connexion
+SPORTMONKS_BACKOFF_FACTOR = 0.5  # backoff exponentiel : 0.5s, 1s, 2s...
+SPORTMONKS_BACKOFF_JITTER = 0.5  # gigue aléatoire ajoutée à chaque attente
+SPORTMONKS_POOL_SIZE = 10  # connexions keep-alive conservées par processus
+SPORTMONKS_MAX_RPS = 3000 / 3600  # limiteur partagé, un jeton par tentative HTTP : quota Sportmonks de 3000 appels/heure
+SPORTMONKS_RATE_BURST = 30  # rafale autorisée avant que le limiteur ne temporise
+SPORTMONKS_INTERACTIVE_SHARE = 0.2  # part du débit réservée aux vues, dans un seau qui n'attend jamais
+SPORTMONKS_INTERACTIVE_BURST = 5  # rafale du seau des vues
+SPORTMONKS_WORKERS = 4  # threads pour les appels concurrents (détails, références)
+SPORTMONKS_MULTI_FIXTURES_LIMIT = 50  # IDs par appel à fixtures/multi/{ids}
+SPORTMONKS_UPDATED_FIXTURES_ENDPOINT = 'fixtures/latest'  # flux des fixtures récemment modifiées
+SPORTMONKS_UPDATES_HORIZON = 10  # secondes couvertes par ce flux (~10 s) ; un trou plus long impose un parcours complet
+SPORTMONKS_UPDATES_INTERVAL = 5  # secondes entre deux passages de poll_fixture_updates (< horizon ; ~720 appels/h)
+SPORTMONKS_FULL_SYNC_INTERVAL = 6 * 60 * 60  # parcours complet de la fenêtre au moins toutes les 6h
+SPORTMONKS_STREAM_PAGES = False  # décode les pages de liste au fil de la lecture (mémoire constante)
+SPORTMONKS_STREAM_BATCH_SIZE = 50  # fixtures enregistrées par lot en lecture en flux
+SPORTMONKS_STREAM_CHUNK_SIZE = 64 * 1024  # octets lus par morceau en lecture en flux
+SPORTMONKS_PREFETCH_PAGES = True  # pages 2..last_page récupérées en parallèle, enregistrées dans l'ordre
+SPORTMONKS_PAGE_RETRIES = 2  # nouvelles tentatives d'une page de liste en échec (sans reprendre la fenêtre)
+SPORTMONKS_PAGE_RETRY_DELAY = 2  # secondes avant la première nouvelle tentative d'une page, doublées ensuite
+SPORTMONKS_LIVESCORES_ENDPOINT = 'livescores/inplay'  # toutes les fixtures en cours, en un seul appel
+SPORTMONKS_LIVESCORES_INTERVAL = 30  # secondes entre deux cycles de poll_livescores
+SPORTMONKS_POLL_ERROR_BACKOFF = 5  # pause d'un suiveur après un cycle en erreur, doublée à chaque erreur consécutive...
+SPORTMONKS_POLL_ERROR_BACKOFF_MAX = 5 * 60  # ... plafonnée à 5 min
+SPORTMONKS_BREAKER_FAILURES = 5  # échecs consécutifs avant ouverture du disjoncteur des vues
+SPORTMONKS_BREAKER_RESET_TIMEOUT = 30  # secondes avant un appel d'essai une fois le disjoncteur ouvert
+EVENT_DETAILS_CACHE_TTL = 60  # fixture servie telle quelle pendant 60 s...
+EVENT_DETAILS_STALE_TTL = 24 * 60 * 60  # ... puis servie périmée (et rafraîchie en arrière-plan) pendant 24h
+EVENT_DETAILS_WAIT = 3  # attente maximale d'une vue pour une fixture absente du cache
+MATCH_RESOLUTION_MAX_AGE = 60 * 60  # un Match écrit depuis moins d'1h est servi depuis la base, sans appel API
+SEARCH_MAX_RESULTS = 200  # résultats du tri par pertinence (les autres tris ne sont pas bornés)
+LEADERBOARD_MIN_PRONOSTICS = 5  # pronostics réglés nécessaires pour figurer au classement d'une période
+LEADERBOARD_PAGE_SIZE = 50  # tipsters par page du classement
+MATCH_RESOLUTION_CACHE_TTL = 5 * 60  # durée de vie du LRU des Match résolus (par processus)
+
+# --- Scores en direct (Server-Sent Events sous ASGI, vue live_scores_stream ; sinon live_scores_poll) ---
+LIVE_STREAM_INTERVAL = 5  # secondes entre deux lectures de la table Match par le diffuseur
+LIVE_STREAM_KEEPALIVE = 15  # commentaire envoyé aux clients inactifs pour garder la connexion
+LIVE_STREAM_MAX_MATCHES = 50  # matchs suivis au plus par connexion
+LIVE_POLL_INTERVAL = 30  # sous WSGI (pas de flux SSE), secondes entre deux requêtes de chaque page
+
+# --- Démon de règlement (python manage.py run_settlement_daemon) ---
+SETTLEMENT_EXPECTED_DURATION = 2 * 60 * 60  # fin attendue d'un match : coup d'envoi + 2h
+SETTLEMENT_LIVE_INTERVAL = 5 * 60  # vérification toutes les 5 min pendant le match
+SETTLEMENT_FINISH_INTERVAL = 30  # toutes les 30 s juste après la fin attendue...
+SETTLEMENT_EAGER_WINDOW = 45 * 60  # ... pendant 45 min
+SETTLEMENT_BACKOFF_BASE = 5 * 60  # puis backoff exponentiel : 5 min, 10 min, 20 min...
+SETTLEMENT_BACKOFF_MAX = 6 * 60 * 60  # ... plafonné à 6h
+SETTLEMENT_MAX_ATTEMPTS = 10  # au-delà, le match est mis de côté pour règlement manuel
+SETTLEMENT_RESCAN_INTERVAL = 60  # relecture de la base pour les nouveaux pronostics
+SETTLEMENT_ERROR_BACKOFF = 30  # pause du démon après un lot en erreur, doublée à chaque erreur consécutive...
+SETTLEMENT_ERROR_BACKOFF_MAX = 15 * 60  # ... plafonnée à 15 min
 
 # --- NOUVEAU : Configuration de la journalisation (Logging) ---
 # Cela permet de voir les messages de logger.info, logger.warning, logger.error
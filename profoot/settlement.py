@@ -0,0 +1,250 @@
+# profoot/settlement.py
+
+import logging
+import time
+
+from django.db import transaction
+
+from .models import Match, Pronostic
+from .search import reindex_pronostics
+from .stats import record_settlement
+from .bet_spec import (
+    AUTO_SETTLED_TYPES, SELECTION_1N2, CAMP_DOMICILE, CAMP_EXTERIEUR,
+)
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Moteur de règlement en lot : les pronostics en attente des matchs terminés sont
+# chargés sous forme de colonnes (values_list, sans instancier de modèles), les
+# résultats sont calculés type de pari par type de pari sur ces colonnes, puis écrits
+# avec un UPDATE par résultat. Les règles sont celles de bet_spec.settle_bet.
+
+SETTLEMENT_COLUMNS = (
+    'pk', 'type_pari', 'pari_selection', 'pari_ligne', 'pari_camp', 'pari_handicap',
+    'pari_score_domicile', 'pari_score_exterieur',
+    'match__score_final_domicile', 'match__score_final_exterieur', 'match_id',
+)
+
+# États Sportmonks v3 (state_id) qui font foi : terminé (5 FT, 7 AET, 8 FT_PEN) ou
+# définitivement annulé (12 CANCELLED, 15 ABANDONED). Les autres états (mi-temps,
+# prolongation ou tirs au but en cours, reporté, suspendu, interrompu, supprimé...)
+# peuvent encore évoluer : le match est revérifié auprès de l'API.
+FINAL_STATE_IDS = [5, 7, 8]
+CANCELLED_STATE_IDS = [12, 15]
+
+# Valeurs de Match.status_api qui font foi localement : l'ID d'état (quand Sportmonks
+# ne fournit pas de nom), le nom ou le code de l'état Sportmonks, ou le libellé « Terminé »
+# posé par match_resolution. Comparées sans tenir compte de la casse.
+FINAL_STATUSES = frozenset(
+    [str( state_id ) for state_id in FINAL_STATE_IDS]
+    + ['terminé', 'full time', 'ft', 'after extra time', 'aet', 'full time after penalties', 'ft_pen']
+)
+CANCELLED_STATUSES = frozenset(
+    [str( state_id ) for state_id in CANCELLED_STATE_IDS]
+    + ['cancelled', 'abandoned']
+)
+
+# Nombre d'IDs par requête (match_id__in / pk__in), sous la limite de paramètres de SQLite.
+SETTLEMENT_CHUNK_SIZE = 500
+
+
+def _chunks(values, size=SETTLEMENT_CHUNK_SIZE):
+    values = list( values )
+    for start in range( 0, len( values ), size ):
+        yield values[start:start + size]
+
+
+def is_final_status(status_api):
+    return (status_api or '').strip().lower() in FINAL_STATUSES
+
+
+def is_cancelled_status(status_api):
+    return (status_api or '').strip().lower() in CANCELLED_STATUSES
+
+
+def split_locally_final_matches(match_ids):
+    """
+    Sépare les matchs dont le résultat est déjà connu en base, sans appel réseau.
+    Un match fait foi s'il a un statut final et ses deux scores, ou un statut d'annulation.
+    Retourne (IDs terminés, IDs annulés parmi eux, IDs à vérifier auprès de l'API).
+    """
+    finished, cancelled, unresolved = [], [], []
+    for match_ids_chunk in _chunks( match_ids ):
+        for pk, status_api, home, away in Match.objects.filter( pk__in=match_ids_chunk ).values_list(
+                'pk', 'status_api', 'score_final_domicile', 'score_final_exterieur' ):
+            if is_cancelled_status( status_api ):
+                finished.append( pk )
+                cancelled.append( pk )
+            elif is_final_status( status_api ) and home is not None and away is not None:
+                finished.append( pk )
+            else:
+                unresolved.append( pk )
+    return finished, cancelled, unresolved
+
+
+def load_pending_columns(match_ids, pronostics=None):
+    """
+    Charge les pronostics EN_COURS des matchs indiqués sous forme de colonnes :
+    un dictionnaire {nom de colonne: liste de valeurs}, toutes de même longueur.
+    """
+    queryset = Pronostic.objects.all() if pronostics is None else pronostics
+    rows = []
+    for match_ids_chunk in _chunks( match_ids ):
+        rows.extend(
+            queryset.filter( resultat='EN_COURS', match_id__in=match_ids_chunk )
+            .order_by()
+            .values_list( *SETTLEMENT_COLUMNS )
+        )
+    if not rows:
+        return {column: [] for column in SETTLEMENT_COLUMNS}
+    return {column: list( values ) for column, values in zip( SETTLEMENT_COLUMNS, zip( *rows ) )}
+
+
+def _outcomes_1n2(selection, diff):
+    real_outcomes = ['1' if d > 0 else '2' if d < 0 else 'N' for d in diff]
+    return [None if s not in SELECTION_1N2 else s == r for s, r in zip( selection, real_outcomes )]
+
+
+def _outcomes_double_chance(selection, diff):
+    return [d >= 0 if s == '1N' else d != 0 if s == '12' else d <= 0 if s == 'N2' else None
+            for s, d in zip( selection, diff )]
+
+
+def _outcomes_over_under(selection, ligne, total):
+    return [None if l is None else t > l if s == 'OVER' else t < l if s == 'UNDER' else None
+            for s, l, t in zip( selection, ligne, total )]
+
+
+def _outcomes_handicap(camp, handicap, diff):
+    # Domicile : home + h > away  <=>  diff + h > 0 ; extérieur : away + h > home  <=>  h - diff > 0.
+    return [None if h is None else d + h > 0 if c == CAMP_DOMICILE else h - d > 0 if c == CAMP_EXTERIEUR else None
+            for c, h, d in zip( camp, handicap, diff )]
+
+
+def _outcomes_score_exact(score_domicile_predit, score_exterieur_predit, home, away):
+    return [None if pd is None or pe is None else pd == h and pe == a
+            for pd, pe, h, a in zip( score_domicile_predit, score_exterieur_predit, home, away )]
+
+
+def compute_outcomes(columns, cancelled_match_ids=()):
+    """
+    Calcule le résultat de chaque ligne des colonnes chargées par load_pending_columns.
+    Retourne une liste alignée sur les colonnes : 'GAGNANT', 'PERDANT', 'ANNULE',
+    ou None pour les pronostics qui ne peuvent pas être réglés automatiquement.
+    """
+    size = len( columns['pk'] )
+    home = columns['match__score_final_domicile']
+    away = columns['match__score_final_exterieur']
+    diff = [None if h is None or a is None else h - a for h, a in zip( home, away )]
+    total = [None if h is None or a is None else h + a for h, a in zip( home, away )]
+
+    # Indices des lignes par type de pari, pour calculer chaque type sur ses seules colonnes.
+    # Les lignes sans score final (match annulé avant le coup d'envoi) ne sont pas calculées.
+    indices_by_type = {}
+    for index, type_pari in enumerate( columns['type_pari'] ):
+        if diff[index] is not None:
+            indices_by_type.setdefault( type_pari, [] ).append( index )
+
+    def take(column, indices):
+        values = columns[column] if isinstance( column, str ) else column
+        return [values[i] for i in indices]
+
+    won = [None] * size
+    for type_pari, indices in indices_by_type.items():
+        if type_pari == '1N2':
+            type_won = _outcomes_1n2( take( 'pari_selection', indices ), take( diff, indices ) )
+        elif type_pari == 'DOUBLE_CHANCE':
+            type_won = _outcomes_double_chance( take( 'pari_selection', indices ), take( diff, indices ) )
+        elif type_pari == 'OVER_UNDER':
+            type_won = _outcomes_over_under( take( 'pari_selection', indices ), take( 'pari_ligne', indices ),
+                                             take( total, indices ) )
+        elif type_pari == 'HANDICAP':
+            type_won = _outcomes_handicap( take( 'pari_camp', indices ), take( 'pari_handicap', indices ),
+                                           take( diff, indices ) )
+        elif type_pari == 'SCORE_EXACT':
+            type_won = _outcomes_score_exact( take( 'pari_score_domicile', indices ),
+                                              take( 'pari_score_exterieur', indices ),
+                                              take( home, indices ), take( away, indices ) )
+        else:
+            continue
+        for index, value in zip( indices, type_won ):
+            won[index] = value
+
+    outcomes = [None if w is None else 'GAGNANT' if w else 'PERDANT' for w in won]
+    if cancelled_match_ids:
+        cancelled_match_ids = set( cancelled_match_ids )
+        outcomes = ['ANNULE' if match_id in cancelled_match_ids else outcome
+                    for match_id, outcome in zip( columns['match_id'], outcomes )]
+    return outcomes
+
+
+def write_outcomes(pks, outcomes):
+    """
+    Écrit les résultats calculés : un UPDATE par résultat (et par tranche d'IDs).
+    Seuls les pronostics encore EN_COURS sont modifiés, pour ne jamais écraser un
+    règlement concurrent ou manuel. Retourne {résultat: nombre de lignes écrites}.
+    L'UPDATE ne déclenchant pas les signaux, les statistiques des auteurs (UserStats)
+    sont mises à jour ici, dans la même transaction, à partir des lignes verrouillées,
+    et les pronostics écrits sont réindexés pour la recherche.
+    """
+    pks_by_outcome = {}
+    for pk, outcome in zip( pks, outcomes ):
+        if outcome is not None:
+            pks_by_outcome.setdefault( outcome, [] ).append( pk )
+
+    written = {}
+    for outcome, outcome_pks in pks_by_outcome.items():
+        written[outcome] = 0
+        for pks_chunk in _chunks( outcome_pks ):
+            with transaction.atomic():
+                pending = list( Pronostic.objects.select_for_update().filter(
+                    pk__in=pks_chunk, resultat='EN_COURS' ).values_list( 'pk', 'utilisateur_id', 'mise', 'cote' ) )
+                if not pending:
+                    continue
+                pending_pks = [row[0] for row in pending]
+                written[outcome] += Pronostic.objects.filter(
+                    pk__in=pending_pks, resultat='EN_COURS' ).update( resultat=outcome )
+                record_settlement( [row[1:] for row in pending], outcome )
+            reindex_pronostics( Pronostic.objects.filter( pk__in=pending_pks ) )
+    return written
+
+
+def settle_finished_matches(match_ids, cancelled_match_ids=(), pronostics=None):
+    """
+    Règle en lot tous les pronostics EN_COURS des matchs terminés indiqués, à partir
+    des scores finaux enregistrés sur les Match. Les matchs de `cancelled_match_ids`
+    donnent des pronostics ANNULE.
+    `pronostics` permet de restreindre le règlement à un sous-ensemble (queryset).
+
+    Retourne un dictionnaire : 'settled' (pronostics écrits), 'unsettled' (pari non
+    réglable automatiquement) et 'by_outcome' ({résultat: nombre}).
+    """
+    started_at = time.monotonic()
+    columns = load_pending_columns( match_ids, pronostics=pronostics )
+    loaded_at = time.monotonic()
+    outcomes = compute_outcomes( columns, cancelled_match_ids )
+    computed_at = time.monotonic()
+
+    unsettled = {}
+    for pk, type_pari, outcome in zip( columns['pk'], columns['type_pari'], outcomes ):
+        if outcome is None:
+            unsettled.setdefault( type_pari, [] ).append( pk )
+    for type_pari, pks in unsettled.items():
+        if type_pari in AUTO_SETTLED_TYPES:
+            logger.warning(
+                f"Spécification de pari manquante pour {len( pks )} pronostic(s) {type_pari} : règlement manuel nécessaire (IDs : {pks})." )
+        else:
+            logger.info(
+                f"{len( pks )} pronostic(s) de type '{type_pari}' nécessitent une vérification manuelle (IDs : {pks})." )
+
+    written = write_outcomes( columns['pk'], outcomes )
+    logger.info(
+        f"Règlement en lot : {len( outcomes )} pronostics chargés en {loaded_at - started_at:.3f} s, "
+        f"calculés en {computed_at - loaded_at:.3f} s, écrits en {time.monotonic() - computed_at:.3f} s ({written})." )
+
+    return {
+        'settled': sum( written.values() ),
+        'unsettled': sum( len( pks ) for pks in unsettled.values() ),
+        'by_outcome': written,
+    }
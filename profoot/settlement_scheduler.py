@@ -0,0 +1,207 @@
+# profoot/settlement_scheduler.py
+
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Match, Pronostic
+from .api_integrations import settle_pending_pronostics
+from .settlement import split_locally_final_matches
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Planification du règlement par match, utilisée par la commande run_settlement_daemon.
+# Chaque match ayant des pronostics EN_COURS est placé dans un tas trié par date de
+# prochaine vérification, calculée à partir de la fin attendue du match :
+#   - avant le coup d'envoi : première vérification au coup d'envoi ;
+#   - en cours de match : toutes les SETTLEMENT_LIVE_INTERVAL secondes ;
+#   - juste après la fin attendue : toutes les SETTLEMENT_FINISH_INTERVAL secondes,
+#     pendant SETTLEMENT_EAGER_WINDOW secondes ;
+#   - ensuite : backoff exponentiel, puis mise de côté (Match.settlement_parked)
+#     après SETTLEMENT_MAX_ATTEMPTS vérifications infructueuses.
+# Les matchs dus au même moment sont vérifiés ensemble (un appel fixtures/multi pour 50 matchs).
+SETTLEMENT_EXPECTED_DURATION = timedelta( seconds=getattr( settings, 'SETTLEMENT_EXPECTED_DURATION', 2 * 60 * 60 ) )
+SETTLEMENT_LIVE_INTERVAL = timedelta( seconds=getattr( settings, 'SETTLEMENT_LIVE_INTERVAL', 5 * 60 ) )
+SETTLEMENT_FINISH_INTERVAL = timedelta( seconds=getattr( settings, 'SETTLEMENT_FINISH_INTERVAL', 30 ) )
+SETTLEMENT_EAGER_WINDOW = timedelta( seconds=getattr( settings, 'SETTLEMENT_EAGER_WINDOW', 45 * 60 ) )
+SETTLEMENT_BACKOFF_BASE = timedelta( seconds=getattr( settings, 'SETTLEMENT_BACKOFF_BASE', 5 * 60 ) )
+SETTLEMENT_BACKOFF_MAX = timedelta( seconds=getattr( settings, 'SETTLEMENT_BACKOFF_MAX', 6 * 60 * 60 ) )
+SETTLEMENT_MAX_ATTEMPTS = getattr( settings, 'SETTLEMENT_MAX_ATTEMPTS', 10 )
+# Intervalle de relecture de la base pour découvrir les nouveaux pronostics.
+SETTLEMENT_RESCAN_INTERVAL = timedelta( seconds=getattr( settings, 'SETTLEMENT_RESCAN_INTERVAL', 60 ) )
+# Pause du démon après un lot en erreur (base ou API indisponible), doublée à chaque
+# erreur consécutive jusqu'au plafond.
+SETTLEMENT_ERROR_BACKOFF = timedelta( seconds=getattr( settings, 'SETTLEMENT_ERROR_BACKOFF', 30 ) )
+SETTLEMENT_ERROR_BACKOFF_MAX = timedelta( seconds=getattr( settings, 'SETTLEMENT_ERROR_BACKOFF_MAX', 15 * 60 ) )
+
+SCHEDULE_FIELDS = ['settlement_next_check', 'settlement_attempts', 'settlement_parked']
+
+
+class SettlementScheduler:
+    """
+    Tas de priorité des matchs à régler, indexé par date de prochaine vérification.
+    L'état de backoff est persisté sur le Match, le tas est reconstruit au démarrage.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._heap = []
+        self._due = {}  # match_id -> échéance courante (les entrées périmées du tas sont ignorées)
+        self._matches = {}  # match_id -> (date_match, settlement_attempts)
+        self._last_scan = None
+
+    def __len__(self):
+        return len( self._due )
+
+    def _schedule(self, match_id, due):
+        self._due[match_id] = due
+        heapq.heappush( self._heap, (due, match_id) )
+
+    def _next_due(self, date_match, attempts, now):
+        """
+        Calcule la prochaine vérification d'un match encore non réglé.
+        Retourne (échéance, attempts), ou (None, attempts) si le match doit être mis de côté.
+        """
+        expected_end = date_match + SETTLEMENT_EXPECTED_DURATION
+        if now < date_match:
+            return date_match, attempts
+        if now < expected_end:
+            return min( now + SETTLEMENT_LIVE_INTERVAL, expected_end ), attempts
+        if now < expected_end + SETTLEMENT_EAGER_WINDOW:
+            return now + SETTLEMENT_FINISH_INTERVAL, attempts
+
+        attempts += 1
+        if attempts > SETTLEMENT_MAX_ATTEMPTS:
+            return None, attempts
+        return now + min( SETTLEMENT_BACKOFF_BASE * 2 ** (attempts - 1), SETTLEMENT_BACKOFF_MAX ), attempts
+
+    def rescan(self, now=None):
+        """
+        Ajoute au tas les matchs non mis de côté ayant des pronostics EN_COURS.
+        Les matchs déjà planifiés gardent leur échéance. Retourne le nombre de matchs ajoutés.
+        """
+        now = now or timezone.now()
+        added = 0
+        candidates = Match.objects.filter(
+            settlement_parked=False, pronostics__resultat='EN_COURS',
+        ).distinct().order_by().values_list( 'pk', 'date_match', 'settlement_next_check', 'settlement_attempts' )
+        for match_id, date_match, next_check, attempts in candidates:
+            if match_id in self._due:
+                continue
+            self._matches[match_id] = (date_match, attempts)
+            # Échéance persistée (redémarrage) ; sinon première vérification selon la phase du match.
+            due = next_check or (date_match if now < date_match else now)
+            self._schedule( match_id, due )
+            added += 1
+        self._last_scan = now
+        if added:
+            logger.info( f"Planification du règlement : {added} nouveau(x) match(s), {len( self )} au total." )
+        return added
+
+    def pop_due(self, now):
+        """
+        Retire du tas et retourne les matchs dont l'échéance est atteinte.
+        """
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            due, match_id = heapq.heappop( self._heap )
+            if self._due.get( match_id ) != due:
+                continue  # entrée périmée (match replanifié ou retiré)
+            del self._due[match_id]
+            due_ids.append( match_id )
+        return due_ids
+
+    def next_wakeup(self, now):
+        """
+        Date du prochain réveil : la plus proche échéance ou la prochaine relecture de la base.
+        """
+        wakeup = (self._last_scan or now) + SETTLEMENT_RESCAN_INTERVAL
+        while self._heap and self._due.get( self._heap[0][1] ) != self._heap[0][0]:
+            heapq.heappop( self._heap )
+        if self._heap:
+            wakeup = min( wakeup, self._heap[0][0] )
+        return wakeup
+
+    def run_once(self, now=None):
+        """
+        Vérifie en un lot tous les matchs dus, puis replanifie ceux qui restent à régler.
+        Retourne les compteurs de settle_pending_pronostics complétés par la planification.
+        """
+        now = now or timezone.now()
+        if self._last_scan is None or now >= self._last_scan + SETTLEMENT_RESCAN_INTERVAL:
+            self.rescan( now )
+
+        due_ids = self.pop_due( now )
+        if not due_ids:
+            return None
+
+        stats = settle_pending_pronostics(
+            Pronostic.objects.filter( resultat='EN_COURS', match_id__in=due_ids ),
+            workers=self.workers,
+        )
+
+        remaining_ids = set(
+            Pronostic.objects.filter( resultat='EN_COURS', match_id__in=due_ids ).values_list( 'match_id', flat=True )
+        )
+        # Match terminé mais pronostics toujours EN_COURS : pari non réglable automatiquement.
+        finished_ids = set( split_locally_final_matches( remaining_ids )[0] ) if remaining_ids else set()
+
+        to_save = []
+        parked = 0
+        for match_id in due_ids:
+            date_match, attempts = self._matches.pop( match_id )
+            match = Match( pk=match_id, settlement_next_check=None, settlement_attempts=0, settlement_parked=False )
+            if match_id in remaining_ids:
+                due, attempts = (None, attempts) if match_id in finished_ids else self._next_due( date_match,
+                                                                                                   attempts, now )
+                match.settlement_attempts = attempts
+                if due is None:
+                    match.settlement_parked = True
+                    parked += 1
+                    logger.warning( f"Match {match_id} mis de côté : règlement manuel nécessaire." )
+                else:
+                    match.settlement_next_check = due
+                    self._matches[match_id] = (date_match, attempts)
+                    self._schedule( match_id, due )
+            to_save.append( match )
+        Match.objects.bulk_update( to_save, SCHEDULE_FIELDS, batch_size=500 )
+
+        stats['matches_checked'] = len( due_ids )
+        stats['matches_parked'] = parked
+        logger.info(
+            f"Règlement : {len( due_ids )} match(s) vérifié(s), {stats['pronostics_updated']} pronostic(s) réglé(s), "
+            f"{parked} mis de côté, {len( self )} planifié(s)." )
+        return stats
+
+    def run_forever(self, max_sleep=SETTLEMENT_RESCAN_INTERVAL):
+        """
+        Boucle principale du démon : exécute les lots dus puis dort jusqu'à la prochaine échéance.
+        Une erreur pendant un lot est journalisée sans arrêter le démon : les matchs du lot
+        sont replanifiés depuis la base, après une pause croissante avec les erreurs consécutives.
+        """
+        failures = 0
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                failures += 1
+                backoff = min( SETTLEMENT_ERROR_BACKOFF * 2 ** (failures - 1), SETTLEMENT_ERROR_BACKOFF_MAX )
+                logger.error( f"Erreur lors du lot de règlement ({failures} consécutive(s)), nouvel essai dans "
+                              f"{backoff.total_seconds():.0f} s : {e}", exc_info=True )
+                # Les matchs retirés du tas sont relus depuis la base au prochain lot ; une
+                # connexion coupée est rouverte.
+                self._last_scan = None
+                close_old_connections()
+                time.sleep( backoff.total_seconds() )
+                continue
+            failures = 0
+            now = timezone.now()
+            sleep_for = min( (self.next_wakeup( now ) - now).total_seconds(), max_sleep.total_seconds() )
+            if sleep_for > 0:
+                time.sleep( sleep_for )
@@ -1,13 +1,67 @@
 # profoot/signals.py
 
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from .models import UserProfile, Pronostic, Match, Follow
+from .search import index_pronostics, unindex_pronostics
+from .stats import (
+    pronostic_stats_state, record_follow, record_pronostic_change, stored_pronostic_stats_state,
+)
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
     # Si l'utilisateur existait déjà, on pourrait aussi gérer des mises à jour ici si nécessaire
-    # instance.profile.save() # Utile si vous avez des champs qui se mettent à jour avec l'utilisateur
\ No newline at end of file
+    # instance.profile.save() # Utile si vous avez des champs qui se mettent à jour avec l'utilisateur
+
+
+# Index de recherche plein texte (profoot/search.py) : un pronostic est réindexé à chaque
+# enregistrement, ainsi que les pronostics d'un match modifié (équipes, ligue).
+@receiver(post_save, sender=Pronostic)
+def index_pronostic(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_pronostics([instance])
+
+
+@receiver(post_delete, sender=Pronostic)
+def unindex_pronostic(sender, instance, **kwargs):
+    unindex_pronostics([instance.pk])
+
+
+@receiver(post_save, sender=Match)
+def index_match_pronostics(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_pronostics(instance.pronostics.select_related('match'))
+
+
+# Statistiques dénormalisées (UserStats, profoot/stats.py) : l'état enregistré d'un pronostic
+# est relu avant sa sauvegarde, et la différence avec le nouvel état est appliquée par deltas.
+@receiver(pre_save, sender=Pronostic)
+def remember_pronostic_stats_state(sender, instance, raw=False, **kwargs):
+    instance._stats_previous_state = None
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._stats_previous_state = stored_pronostic_stats_state(instance.pk)
+
+
+@receiver(post_save, sender=Pronostic)
+def update_stats_on_pronostic_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_pronostic_change(getattr(instance, '_stats_previous_state', None), pronostic_stats_state(instance))
+
+
+@receiver(post_delete, sender=Pronostic)
+def update_stats_on_pronostic_delete(sender, instance, **kwargs):
+    record_pronostic_change(pronostic_stats_state(instance), None)
+
+
+@receiver(post_save, sender=Follow)
+def update_stats_on_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_follow(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def update_stats_on_unfollow(sender, instance, **kwargs):
+    record_follow(instance.follower_id, instance.following_id, sign=-1)
@@ -0,0 +1,536 @@
+# profoot/sportmonks_client.py
+
+import os
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+from .json_stream import StreamedJSONObject
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# --- Configuration Sportmonks API ---
+SPORTMONKS_API_TOKEN = os.environ.get( 'SPORTMONKS_API_TOKEN' )
+# Surchargeable (réglage ou variable d'environnement) pour viser le serveur de rejeu local
+# (python manage.py run_sportmonks_stub) lors des tests de charge.
+SPORTMONKS_BASE_URL = getattr( settings, 'SPORTMONKS_BASE_URL', "https://api.sportmonks.com/v3/football" ).rstrip( '/' )
+
+# Mode enregistrement : si défini, chaque réponse JSON réussie est écrite sous ce
+# répertoire (voir recording_path), pour être rejouée par le serveur de rejeu.
+SPORTMONKS_RECORD_DIR = getattr( settings, 'SPORTMONKS_RECORD_DIR', None )
+
+# Délais séparés : établissement de la connexion TCP/TLS et lecture de la réponse.
+SPORTMONKS_CONNECT_TIMEOUT = getattr( settings, 'SPORTMONKS_CONNECT_TIMEOUT', 3.05 )
+SPORTMONKS_READ_TIMEOUT = getattr( settings, 'SPORTMONKS_READ_TIMEOUT', 10 )
+
+# Nouvelles tentatives bornées, avec un backoff exponentiel et une gigue aléatoire,
+# uniquement sur les erreurs transitoires (quota dépassé et erreurs serveur).
+SPORTMONKS_MAX_RETRIES = getattr( settings, 'SPORTMONKS_MAX_RETRIES', 3 )
+SPORTMONKS_BACKOFF_FACTOR = getattr( settings, 'SPORTMONKS_BACKOFF_FACTOR', 0.5 )
+SPORTMONKS_BACKOFF_JITTER = getattr( settings, 'SPORTMONKS_BACKOFF_JITTER', 0.5 )
+SPORTMONKS_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Taille du pool de connexions keep-alive vers l'hôte Sportmonks.
+SPORTMONKS_POOL_SIZE = getattr( settings, 'SPORTMONKS_POOL_SIZE', 10 )
+
+# Débit maximal (requêtes/seconde) et rafale autorisée du limiteur partagé.
+# Par défaut : le quota Sportmonks de 3000 appels par heure.
+# Le limiteur prélève un jeton par tentative HTTP, nouvelles tentatives comprises
+# (RateLimitedAdapter, RateLimitedRetry).
+SPORTMONKS_MAX_RPS = getattr( settings, 'SPORTMONKS_MAX_RPS', 3000 / 3600 )
+SPORTMONKS_RATE_BURST = getattr( settings, 'SPORTMONKS_RATE_BURST', 30 )
+
+# Part du débit réservée aux appels interactifs (vues), dans un seau séparé qui n'attend
+# jamais : un appel de vue sans jeton échoue aussitôt (RateLimitExceeded) au lieu de
+# patienter derrière les traitements en lot, qui se partagent le reste du débit.
+SPORTMONKS_INTERACTIVE_SHARE = getattr( settings, 'SPORTMONKS_INTERACTIVE_SHARE', 0.2 )
+SPORTMONKS_INTERACTIVE_BURST = getattr( settings, 'SPORTMONKS_INTERACTIVE_BURST', 5 )
+
+# Nombre de threads utilisés pour les appels concurrents (détails, références).
+SPORTMONKS_WORKERS = getattr( settings, 'SPORTMONKS_WORKERS', 4 )
+
+# Disjoncteur des appels interactifs (vues) : ouvert après N échecs consécutifs,
+# il refuse immédiatement les appels pendant SPORTMONKS_BREAKER_RESET_TIMEOUT secondes.
+SPORTMONKS_BREAKER_FAILURES = getattr( settings, 'SPORTMONKS_BREAKER_FAILURES', 5 )
+SPORTMONKS_BREAKER_RESET_TIMEOUT = getattr( settings, 'SPORTMONKS_BREAKER_RESET_TIMEOUT', 30 )
+
+# Lecture en flux des pages de liste (sportmonks_stream) : taille des morceaux lus sur la socket.
+SPORTMONKS_STREAM_CHUNK_SIZE = getattr( settings, 'SPORTMONKS_STREAM_CHUNK_SIZE', 64 * 1024 )
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_workers = SPORTMONKS_WORKERS
+
+# Compteur d'appels HTTP émis par ce processus (pour les rapports d'ingestion).
+_request_count = 0
+_request_count_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons, partagé entre threads.
+    Le seau se remplit de `rate` jetons par seconde, jusqu'à `capacity` jetons ;
+    chaque requête consomme un jeton et attend s'il n'y en a plus.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True):
+        """
+        Prélève un jeton. Sans `blocking`, retourne False au lieu d'attendre s'il n'y en a pas.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min( self.capacity, self._tokens + (now - self._updated_at) * self.rate )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                if not blocking:
+                    return False
+                wait = (1 - self._tokens) / self.rate
+            time.sleep( wait )
+
+
+class CircuitOpenError( Exception ):
+    """
+    Appel refusé sans requête réseau : le disjoncteur est ouvert.
+    """
+
+
+class RateLimitExceeded( CircuitOpenError ):
+    """
+    Appel interactif refusé : le budget de débit des vues est épuisé. Comme un
+    disjoncteur ouvert, la vue échoue vite ; ce n'est pas une panne du service.
+    """
+
+
+class SportmonksClientError( Exception ):
+    """
+    Réponse 4xx de Sportmonks (hors 429) : la requête est en cause (ID inconnu,
+    ressource hors abonnement...), pas la disponibilité du service.
+    """
+
+    def __init__(self, status_code, message):
+        super().__init__( message )
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états, partagé entre threads :
+      - fermé : les appels passent, les échecs consécutifs sont comptés ;
+      - ouvert (après `failure_threshold` échecs) : les appels échouent immédiatement ;
+      - semi-ouvert (après `reset_timeout` secondes) : un seul appel d'essai passe,
+        son succès referme le disjoncteur, son échec le rouvre.
+    Un appel est un échec quand la fonction renvoie None (convention de sportmonks_get) ;
+    une SportmonksClientError n'en est pas un : le service a répondu.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=SPORTMONKS_BREAKER_FAILURES,
+                 reset_timeout=SPORTMONKS_BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _allow(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def _record(self, success):
+        with self._lock:
+            self._trial_in_flight = False
+            if success:
+                if self._state != self.CLOSED:
+                    logger.info( f"Disjoncteur Sportmonks '{self.name}' refermé." )
+                self._state = self.CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Disjoncteur Sportmonks '{self.name}' ouvert après {self._failures} échec(s) : appels suspendus {self.reset_timeout} s." )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Appelle `func` si le disjoncteur le permet, sinon lève CircuitOpenError.
+        """
+        if not self._allow():
+            raise CircuitOpenError( f"Disjoncteur Sportmonks '{self.name}' ouvert." )
+        try:
+            result = func( *args, **kwargs )
+        except RateLimitExceeded:
+            # Ni succès ni échec : le service n'a pas été (entièrement) interrogé.
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        except SportmonksClientError:
+            self._record( True )
+            raise
+        except Exception:
+            self._record( False )
+            raise
+        self._record( result is not None )
+        return result
+
+    def snapshot(self):
+        """
+        État courant, pour la supervision.
+        """
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max( 0.0, round( self.reset_timeout - (time.monotonic() - self._opened_at), 1 ) )
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in': retry_in,
+                'rejected_calls': self._rejected,
+            }
+
+
+def _build_limiters(max_rps, burst):
+    """
+    Seaux (lots, vues) se partageant `max_rps` selon SPORTMONKS_INTERACTIVE_SHARE.
+    """
+    if not max_rps:
+        return None, None
+    interactive_rps = max_rps * SPORTMONKS_INTERACTIVE_SHARE
+    interactive = TokenBucket( interactive_rps, SPORTMONKS_INTERACTIVE_BURST ) if interactive_rps else None
+    return TokenBucket( max_rps - interactive_rps, burst ), interactive
+
+
+_rate_limiter, _interactive_limiter = _build_limiters( SPORTMONKS_MAX_RPS, SPORTMONKS_RATE_BURST )
+
+# Budget de la requête en cours dans ce thread (interactif ou lot), lu à chaque tentative.
+_attempt_context = threading.local()
+
+
+def configure(workers=None, max_rps=None, base_url=None, api_token=None, record_dir=None):
+    """
+    Ajuste le client pour ce processus (options des commandes de gestion) : nombre de
+    threads, débit maximal, URL de base et clé API (serveur de rejeu), et répertoire
+    d'enregistrement des réponses.
+    """
+    global _workers, _rate_limiter, _interactive_limiter, _session
+    global SPORTMONKS_BASE_URL, SPORTMONKS_API_TOKEN, SPORTMONKS_RECORD_DIR
+    if base_url:
+        SPORTMONKS_BASE_URL = base_url.rstrip( '/' )
+    if api_token:
+        SPORTMONKS_API_TOKEN = api_token
+    if record_dir:
+        SPORTMONKS_RECORD_DIR = record_dir
+    if workers:
+        _workers = workers
+        with _session_lock:
+            # Le pool de connexions doit pouvoir servir tous les threads.
+            _session = None
+    if max_rps:
+        _rate_limiter, _interactive_limiter = _build_limiters( max_rps, max( 1, min( SPORTMONKS_RATE_BURST, max_rps ) ) )
+
+
+def map_concurrently(func, items, workers=None):
+    """
+    Applique `func` à chaque élément sur un pool de threads borné et produit les
+    couples (élément, résultat) dans l'ordre d'entrée.
+    Le nombre de requêtes en vol est limité à deux fois le nombre de threads ;
+    les résultats sont consommés par le thread appelant (écritures en base comprises).
+    """
+    workers = workers or _workers
+    if workers <= 1:
+        for item in items:
+            yield item, func( item )
+        return
+
+    max_in_flight = workers * 2
+    with ThreadPoolExecutor( max_workers=workers, thread_name_prefix='sportmonks' ) as executor:
+        pending = deque()
+        for item in items:
+            pending.append( (item, executor.submit( func, item )) )
+            if len( pending ) >= max_in_flight:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        while pending:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+
+
+def _acquire_attempt():
+    """
+    Prélève le jeton d'une tentative HTTP sur le budget de la requête en cours et la
+    compte. Un appel interactif sans jeton lève RateLimitExceeded au lieu d'attendre.
+    """
+    if getattr( _attempt_context, 'interactive', False ):
+        if _interactive_limiter is not None and not _interactive_limiter.acquire( blocking=False ):
+            raise RateLimitExceeded( "Budget Sportmonks des vues épuisé." )
+    elif _rate_limiter is not None:
+        _rate_limiter.acquire()
+    _count_request()
+
+
+class RateLimitedAdapter( HTTPAdapter ):
+    """
+    Adaptateur HTTP qui prélève un jeton du limiteur avant l'envoi d'une requête.
+    """
+
+    def send(self, request, **kwargs):
+        _acquire_attempt()
+        return super().send( request, **kwargs )
+
+
+class RateLimitedRetry( Retry ):
+    """
+    Politique de nouvelles tentatives de urllib3 qui prélève un jeton du limiteur après
+    chaque attente de backoff : les tentatives sont rejouées sous urllib3, sans repasser
+    par RateLimitedAdapter.send.
+    """
+
+    def sleep(self, response=None):
+        super().sleep( response )
+        _acquire_attempt()
+
+
+def _build_session():
+    """
+    Construit une session requests avec un pool de connexions persistantes
+    et une politique de nouvelles tentatives sur les erreurs transitoires,
+    chaque tentative passant par le limiteur de débit.
+    """
+    retry = RateLimitedRetry(
+        total=SPORTMONKS_MAX_RETRIES,
+        connect=SPORTMONKS_MAX_RETRIES,
+        read=SPORTMONKS_MAX_RETRIES,
+        status=SPORTMONKS_MAX_RETRIES,
+        backoff_factor=SPORTMONKS_BACKOFF_FACTOR,
+        backoff_jitter=SPORTMONKS_BACKOFF_JITTER,
+        status_forcelist=SPORTMONKS_RETRY_STATUSES,
+        allowed_methods=frozenset( ['GET'] ),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = RateLimitedAdapter(
+        pool_connections=1,
+        pool_maxsize=max( SPORTMONKS_POOL_SIZE, _workers ),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount( 'https://', adapter )
+    session.mount( 'http://', adapter )
+    session.headers.update( {'Accept': 'application/json'} )
+    return session
+
+
+def get_session():
+    """
+    Retourne la session partagée du processus courant.
+    La session est recréée après un fork (workers gunicorn) pour ne jamais
+    partager de sockets entre processus.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def recording_path(record_dir, endpoint, params=None):
+    """
+    Chemin du fichier d'enregistrement d'une réponse : un répertoire par segment
+    d'endpoint, un fichier par jeu de paramètres (la clé API n'est jamais écrite).
+    """
+    query = '&'.join( f'{key}={value}' for key, value in sorted( (params or {}).items() ) if key != 'api_token' )
+    file_name = re.sub( r'[^\w.,=&-]', '_', query ) or 'index'
+    return os.path.join( record_dir, *endpoint.strip( '/' ).split( '/' ), f'{file_name}.json' )
+
+
+def _record_response(endpoint, params, data):
+    path = recording_path( SPORTMONKS_RECORD_DIR, endpoint, params )
+    try:
+        os.makedirs( os.path.dirname( path ), exist_ok=True )
+        with open( path, 'w', encoding='utf-8' ) as record_file:
+            json.dump( data, record_file, ensure_ascii=False )
+    except OSError as e:
+        logger.error( f"Impossible d'enregistrer la réponse Sportmonks de {endpoint} dans {path} : {e}" )
+
+
+def get_request_count():
+    """
+    Retourne le nombre d'appels émis vers Sportmonks depuis le démarrage du processus,
+    nouvelles tentatives comprises (ce que décompte le quota).
+    Les écarts entre deux lectures donnent le nombre d'appels d'une étape.
+    """
+    return _request_count
+
+
+def _count_request():
+    global _request_count
+    with _request_count_lock:
+        _request_count += 1
+
+
+def _send_request(endpoint, params=None, stream=False, interactive=False):
+    """
+    GET authentifié sur l'API Sportmonks via la session partagée, sous le limiteur de débit
+    (budget des vues si `interactive`). Retourne (URL, réponse) ; lève les exceptions de
+    requests et RateLimitExceeded, traitées par l'appelant.
+    """
+    full_url = f"{SPORTMONKS_BASE_URL}/{endpoint}"
+
+    all_params = {'api_token': SPORTMONKS_API_TOKEN}
+    if params:
+        all_params.update( params )
+
+    _attempt_context.interactive = interactive
+    try:
+        response = get_session().get(
+            full_url,
+            params=all_params,
+            timeout=(SPORTMONKS_CONNECT_TIMEOUT, SPORTMONKS_READ_TIMEOUT),
+            stream=stream,
+        )
+    finally:
+        _attempt_context.interactive = False
+    return full_url, response
+
+
+def sportmonks_get(endpoint, params=None, raise_client_errors=False, interactive=False):
+    """
+    Effectue un GET authentifié sur l'API Sportmonks via la session partagée.
+    Retourne la réponse JSON complète ou None en cas d'erreur.
+    Avec raise_client_errors=True, une réponse 4xx (hors 429) lève SportmonksClientError
+    au lieu de renvoyer None : un disjoncteur ne la compte pas comme une panne.
+    Avec interactive=True (appels des vues), la requête puise dans le budget des vues et
+    lève RateLimitExceeded s'il est épuisé, sans attendre.
+    """
+    if not SPORTMONKS_API_TOKEN:
+        logger.error( f"Requête API Sportmonks échouée pour l'endpoint {endpoint}: Clé API manquante." )
+        return None
+
+    full_url = f"{SPORTMONKS_BASE_URL}/{endpoint}"
+    try:
+        full_url, response = _send_request( endpoint, params=params, interactive=interactive )
+        response.raise_for_status()
+        data = response.json()  # Retourne la réponse JSON complète
+        if SPORTMONKS_RECORD_DIR:
+            _record_response( endpoint, params, data )
+        return data
+    except RateLimitExceeded:
+        raise
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code
+        if raise_client_errors and 400 <= status_code < 500 and status_code != 429:
+            raise SportmonksClientError(
+                status_code, f"Requête Sportmonks refusée ({full_url}) : {status_code} - {e.response.text}" )
+        logger.error(
+            f"Erreur HTTP lors de l'appel à Sportmonks ({full_url}) : {status_code} - {e.response.text}" )
+        return None
+    except requests.exceptions.ConnectionError as e:
+        logger.error( f"Erreur de connexion à Sportmonks ({full_url}) : {e}" )
+        return None
+    except requests.exceptions.Timeout as e:
+        logger.error( f"Délai d'attente expiré lors de l'appel à Sportmonks ({full_url}) : {e}" )
+        return None
+    except requests.exceptions.RequestException as e:
+        logger.error( f"Erreur inattendue lors de l'appel à Sportmonks ({full_url}) : {e}" )
+        return None
+    except Exception as e:
+        logger.error( f"Erreur générale lors du traitement de la requête Sportmonks ({full_url}) : {e}" )
+        return None
+
+
+class StreamedResponse:
+    """
+    Réponse de liste Sportmonks décodée au fil de l'eau (voir json_stream) : l'itération
+    produit les éléments de 'data' un par un, `meta` est disponible une fois l'itération
+    terminée. Une erreur réseau ou un JSON invalide en cours de lecture arrête
+    l'itération et renseigne `error`.
+    """
+
+    def __init__(self, response, full_url):
+        self.full_url = full_url
+        self.error = None
+        self._response = response
+        self._json = StreamedJSONObject( response.iter_content( chunk_size=SPORTMONKS_STREAM_CHUNK_SIZE ) )
+
+    def __iter__(self):
+        try:
+            yield from self._json
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.error = e
+            logger.error( f"Lecture interrompue de la réponse Sportmonks ({self.full_url}) : {e}" )
+        finally:
+            self._response.close()
+
+    @property
+    def meta(self):
+        return self._json.envelope.get( 'meta' ) or {}
+
+
+def sportmonks_stream(endpoint, params=None):
+    """
+    Variante de sportmonks_get pour les pages de liste : le corps est lu par morceaux
+    et décodé élément par élément, sans jamais être chargé en entier.
+    Retourne une StreamedResponse, ou None si la requête échoue avant la lecture du corps.
+    Les réponses lues ainsi ne sont pas enregistrées (SPORTMONKS_RECORD_DIR).
+    """
+    if not SPORTMONKS_API_TOKEN:
+        logger.error( f"Requête API Sportmonks échouée pour l'endpoint {endpoint}: Clé API manquante." )
+        return None
+
+    full_url = f"{SPORTMONKS_BASE_URL}/{endpoint}"
+    try:
+        full_url, response = _send_request( endpoint, params=params, stream=True )
+    except requests.exceptions.RequestException as e:
+        logger.error( f"Erreur lors de l'appel à Sportmonks ({full_url}) : {e}" )
+        return None
+    if response.status_code >= 400:
+        logger.error(
+            f"Erreur HTTP lors de l'appel à Sportmonks ({full_url}) : {response.status_code} - {response.text}" )
+        response.close()
+        return None
+    return StreamedResponse( response, full_url )
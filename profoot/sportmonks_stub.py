@@ -0,0 +1,257 @@
+# profoot/sportmonks_stub.py
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from .sportmonks_client import recording_path
+
+# Initialisation du logger
+logger = logging.getLogger( __name__ )
+
+# Serveur Sportmonks local pour les tests de charge hors ligne (commande run_sportmonks_stub).
+# Il rejoue les réponses enregistrées par le client (SPORTMONKS_RECORD_DIR) et, si demandé,
+# complète avec des fixtures synthétiques. Les listes sont repaginées à la taille demandée,
+# et une latence et un taux d'erreur configurables simulent l'API réelle.
+# Le client y est branché avec SPORTMONKS_BASE_URL=http://127.0.0.1:<port>/v3/football.
+STUB_BASE_PATH = '/v3/football/'
+STUB_DEFAULT_PER_PAGE = 50
+STUB_STATUS_FINISHED = 5
+
+_FIXTURE_ENDPOINT_RE = re.compile( r'^fixtures/(\d+)$' )
+_FIXTURES_MULTI_RE = re.compile( r'^fixtures/multi/([\d,]+)$' )
+_REFERENCE_ENDPOINT_RE = re.compile( r'^(leagues|venues)/(\d+)$' )
+_LIST_ENDPOINT_RE = re.compile( r'^(fixtures/between/.+|fixtures/latest|livescores.*|leagues|venues)$' )
+
+
+def _synthetic_fixtures(count, start_id=1000, leagues=20, venues=200):
+    """
+    Génère `count` fixtures au format Sportmonks, étalées sur les prochains jours.
+    Une fixture sur deux est déjà terminée (scores 'fulltime'), pour le règlement.
+    """
+    now = datetime.now().replace( minute=0, second=0, microsecond=0 )
+    fixtures = []
+    for index in range( count ):
+        finished = index % 2 == 1
+        fixture = {
+            'id': start_id + index,
+            'name': f'Équipe {index} vs Adversaire {index}',
+            'starting_at': (now + timedelta( hours=index % 168 )).strftime( '%Y-%m-%d %H:%M:%S' ),
+            'league_id': 1 + index % leagues,
+            'venue_id': 1 + index % venues,
+            'state_id': STUB_STATUS_FINISHED if finished else 1,
+            'result_info': None,
+        }
+        if finished:
+            fixture['scores'] = {'fulltime': {'home': index % 4, 'away': (index // 4) % 3}}
+        fixtures.append( fixture )
+    return fixtures
+
+
+class RecordedResponses:
+    """
+    Réponses Sportmonks enregistrées sur disque, chargées en mémoire au démarrage.
+    Les fixtures vues dans toutes les réponses sont indexées par ID pour servir
+    'fixtures/{id}' et 'fixtures/multi/...' même sans enregistrement exact.
+    """
+
+    def __init__(self, record_dir=None, synthetic_fixtures=0):
+        self.record_dir = record_dir
+        self.responses = {}  # chemin d'enregistrement -> réponse JSON
+        self.list_items = {}  # endpoint de liste -> éléments de toutes les pages, dans l'ordre
+        self.fixtures = {}  # ID -> fixture
+        self.references = {}  # (leagues|venues, ID) -> élément
+        self.synthetic_fixtures = None
+        if record_dir:
+            self._load( record_dir )
+        if synthetic_fixtures:
+            self._add_synthetic( synthetic_fixtures )
+
+    def _load(self, record_dir):
+        for root, dirs, files in os.walk( record_dir ):
+            dirs.sort()
+            for file_name in sorted( files ):
+                if not file_name.endswith( '.json' ):
+                    continue
+                path = os.path.join( root, file_name )
+                try:
+                    with open( path, encoding='utf-8' ) as record_file:
+                        payload = json.load( record_file )
+                except (OSError, ValueError) as e:
+                    logger.warning( f"Enregistrement illisible ignoré ({path}) : {e}" )
+                    continue
+                self.responses[path] = payload
+                endpoint = os.path.relpath( root, record_dir ).replace( os.sep, '/' )
+                self._index( endpoint, payload )
+        logger.info( f"{len( self.responses )} réponse(s) enregistrée(s) chargée(s) depuis {record_dir}, "
+                     f"{len( self.fixtures )} fixture(s) indexée(s)." )
+
+    def _index(self, endpoint, payload):
+        data = payload.get( 'data' ) if isinstance( payload, dict ) else None
+        items = data if isinstance( data, list ) else [data] if isinstance( data, dict ) else []
+        if _LIST_ENDPOINT_RE.match( endpoint ) and isinstance( data, list ):
+            known_ids = {item.get( 'id' ) for item in self.list_items.get( endpoint, [] )}
+            self.list_items.setdefault( endpoint, [] ).extend(
+                item for item in items if item.get( 'id' ) not in known_ids )
+        reference = _REFERENCE_ENDPOINT_RE.match( endpoint )
+        for item in items:
+            if not isinstance( item, dict ) or item.get( 'id' ) is None:
+                continue
+            if reference:
+                self.references[(reference.group( 1 ), item['id'])] = item
+            elif endpoint in ('leagues', 'venues'):
+                self.references[(endpoint, item['id'])] = item
+            elif endpoint.startswith( ('fixtures', 'livescores') ):
+                self.fixtures[item['id']] = item
+
+    def _add_synthetic(self, count):
+        fixtures = _synthetic_fixtures( count )
+        for fixture in fixtures:
+            self.fixtures.setdefault( fixture['id'], fixture )
+            for kind, key in (('leagues', 'league_id'), ('venues', 'venue_id')):
+                self.references.setdefault(
+                    (kind, fixture[key]), {'id': fixture[key], 'name': f'{kind[:-1].capitalize()} {fixture[key]}'} )
+        self.synthetic_fixtures = fixtures
+        logger.info( f"{count} fixture(s) synthétique(s) générée(s)." )
+
+    def _list_for(self, endpoint):
+        if endpoint in self.list_items:
+            return self.list_items[endpoint]
+        synthetic = self.synthetic_fixtures
+        if synthetic is None:
+            return None
+        if endpoint.startswith( ('fixtures/between/', 'fixtures/latest') ):
+            return synthetic
+        if endpoint.startswith( 'livescores' ):
+            return []
+        if endpoint in ('leagues', 'venues'):
+            return [item for (kind, item_id), item in sorted( self.references.items() ) if kind == endpoint]
+        return None
+
+    def lookup(self, endpoint, params, per_page):
+        """
+        Retourne (code HTTP, réponse JSON) pour un GET sur `endpoint`.
+        Ordre de résolution : enregistrement exact, liste repaginée, fixture ou référence indexée.
+        Avec `per_page`, les listes enregistrées sont toujours repaginées à cette taille.
+        """
+        if self.record_dir and not (per_page and endpoint in self.list_items):
+            exact = self.responses.get( recording_path( self.record_dir, endpoint, params ) )
+            if exact is not None:
+                return 200, exact
+
+        items = self._list_for( endpoint )
+        if items is not None:
+            return 200, paginate( items, params, per_page or STUB_DEFAULT_PER_PAGE )
+
+        match = _FIXTURE_ENDPOINT_RE.match( endpoint )
+        if match and int( match.group( 1 ) ) in self.fixtures:
+            return 200, {'data': self.fixtures[int( match.group( 1 ) )]}
+
+        match = _FIXTURES_MULTI_RE.match( endpoint )
+        if match:
+            ids = [int( fixture_id ) for fixture_id in match.group( 1 ).split( ',' ) if fixture_id]
+            return 200, {'data': [self.fixtures[fixture_id] for fixture_id in ids if fixture_id in self.fixtures]}
+
+        match = _REFERENCE_ENDPOINT_RE.match( endpoint )
+        if match and (match.group( 1 ), int( match.group( 2 ) )) in self.references:
+            return 200, {'data': self.references[(match.group( 1 ), int( match.group( 2 ) ))]}
+
+        return 404, {'message': f'No result(s) found matching your request ({endpoint}).'}
+
+
+def paginate(items, params, per_page):
+    """
+    Découpe `items` comme l'API Sportmonks : paramètres 'page' et 'per_page',
+    métadonnées 'meta.pagination'.
+    """
+    try:
+        page = max( 1, int( params.get( 'page', 1 ) ) )
+        per_page = max( 1, int( params.get( 'per_page', per_page ) ) )
+    except ValueError:
+        page = 1
+    last_page = max( 1, -(-len( items ) // per_page) )
+    data = items[(page - 1) * per_page:page * per_page]
+    return {
+        'data': data,
+        'meta': {
+            'pagination': {
+                'count': len( data ),
+                'per_page': per_page,
+                'current_page': page,
+                'last_page': last_page,
+                'has_more': page < last_page,
+            },
+        },
+    }
+
+
+class StubStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.not_found = 0
+
+    def record(self, status):
+        with self._lock:
+            self.requests += 1
+            if status >= 500:
+                self.errors += 1
+            elif status == 404:
+                self.not_found += 1
+
+
+def make_handler(responses, latency=0.0, jitter=0.0, error_rate=0.0, per_page=None, stats=None):
+    """
+    Construit la classe de gestionnaire HTTP du serveur de rejeu.
+    `latency` et `jitter` en secondes ; `error_rate` entre 0 et 1 (réponses 503) ;
+    `per_page` force la taille des pages des listes (défaut : pages enregistrées, ou STUB_DEFAULT_PER_PAGE).
+    """
+
+    class SportmonksStubHandler( BaseHTTPRequestHandler ):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlsplit( self.path )
+            params = dict( parse_qsl( url.query ) )
+            params.pop( 'api_token', None )
+
+            delay = latency + random.uniform( 0, jitter ) if jitter else latency
+            if delay:
+                time.sleep( delay )
+
+            if not url.path.startswith( STUB_BASE_PATH ):
+                status, payload = 404, {'message': f'Unknown path {url.path}.'}
+            elif error_rate and random.random() < error_rate:
+                status, payload = 503, {'message': 'Service temporarily unavailable (stub).'}
+            else:
+                status, payload = responses.lookup( url.path[len( STUB_BASE_PATH ):].strip( '/' ), params, per_page )
+
+            if stats is not None:
+                stats.record( status )
+            body = json.dumps( payload ).encode( 'utf-8' )
+            self.send_response( status )
+            self.send_header( 'Content-Type', 'application/json' )
+            self.send_header( 'Content-Length', str( len( body ) ) )
+            self.end_headers()
+            self.wfile.write( body )
+
+        def log_message(self, format, *args):
+            logger.debug( format % args )
+
+    return SportmonksStubHandler
+
+
+def make_server(responses, host='127.0.0.1', port=8765, **handler_options):
+    """
+    Crée le serveur HTTP multithreadé de rejeu (à démarrer avec serve_forever()).
+    """
+    return ThreadingHTTPServer( (host, port), make_handler( responses, **handler_options ) )
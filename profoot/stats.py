@@ -0,0 +1,261 @@
+# profoot/stats.py
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Follow, Pronostic, UserStats
+
+# Statistiques de tipster (profil, profil public, classements) calculées en une seule
+# requête : agrégats conditionnels sur les pronostics de l'utilisateur (COUNT ... FILTER,
+# ou CASE WHEN selon la base), et sous-requêtes scalaires pour les abonnés / abonnements,
+# qui ne multiplient pas les lignes jointes.
+# Le profit suit Pronostic.gain_ou_perte : mise * (cote - 1) si gagnant, -mise si perdant,
+# 0 sinon ou si la mise (ou la cote d'un gagnant) manque.
+#
+# Les mêmes chiffres sont tenus à jour dans UserStats par deltas (UPDATE ... SET champ =
+# champ + delta) : signaux de Pronostic et Follow (profoot/signals.py) et règlement en lot
+# (settlement.write_outcomes). Une ligne absente est calculée par agrégat à sa première
+# lecture ; rebuild_user_stats recalcule toutes les lignes.
+# Agrégat et deltas se coordonnent par un verrou sur la ligne User (select_for_update) :
+# chaque delta est appliqué dans la transaction de l'écriture qui l'a produit, sous ce
+# verrou, et la création ou le recalcul d'une ligne prend le même verrou avant de lire
+# l'agrégat. Un delta concurrent attend donc la ligne créée (et s'y applique), ou a été
+# validé avant la lecture (et figure dans l'agrégat) : aucun n'est perdu ni compté deux fois.
+COMPLETED_RESULTS = ('GAGNANT', 'PERDANT')
+RESULT_COUNT_FIELDS = {
+    'GAGNANT': 'total_gagnants',
+    'PERDANT': 'total_perdants',
+    'EN_COURS': 'total_en_cours',
+    'ANNULE': 'total_annules',
+}
+USER_STATS_FIELDS = (
+    'total_pronostics', 'total_gagnants', 'total_perdants', 'total_en_cours', 'total_annules',
+    'mise_totale', 'profit_total', 'followers_count', 'following_count',
+)
+# Colonnes d'un pronostic dont dépendent les statistiques de son auteur.
+STATS_SOURCE_FIELDS = ('utilisateur_id', 'resultat', 'mise', 'cote')
+
+_MONEY = DecimalField( max_digits=12, decimal_places=2 )
+_PROFIT = DecimalField( max_digits=14, decimal_places=4 )
+
+
+def _follow_count(field):
+    counts = Follow.objects.filter( **{field: OuterRef( 'pk' )} ).values( field ).annotate(
+        total=Count( 'pk' ) ).values( 'total' )
+    return Coalesce( Subquery( counts, output_field=IntegerField() ), 0 )
+
+
+def pronostic_stats_annotations(prefix='pronostics__'):
+    """
+    Agrégats conditionnels sur les pronostics : comptes par résultat, mise et profit des
+    pronostics réglés. `prefix` est le chemin des pronostics depuis le modèle annoté
+    ('' pour agréger directement un queryset de Pronostic).
+    """
+    resultat, mise, cote = f'{prefix}resultat', f'{prefix}mise', f'{prefix}cote'
+
+    def with_result(*results):
+        return Q( **{f'{resultat}__in': results} )
+
+    return {
+        'total_pronostics': Count( f'{prefix}pk' ),
+        'total_gagnants': Count( f'{prefix}pk', filter=with_result( 'GAGNANT' ) ),
+        'total_perdants': Count( f'{prefix}pk', filter=with_result( 'PERDANT' ) ),
+        'total_en_cours': Count( f'{prefix}pk', filter=with_result( 'EN_COURS' ) ),
+        'total_annules': Count( f'{prefix}pk', filter=with_result( 'ANNULE' ) ),
+        'total_completes': Count( f'{prefix}pk', filter=with_result( *COMPLETED_RESULTS ) ),
+        'mise_totale': Coalesce(
+            Sum( mise, filter=with_result( *COMPLETED_RESULTS ), output_field=_MONEY ),
+            Value( Decimal( 0 ) ), output_field=_MONEY ),
+        'profit_total': Coalesce(
+            Sum( F( mise ) * (F( cote ) - 1), filter=with_result( 'GAGNANT' ), output_field=_PROFIT ),
+            Value( Decimal( 0 ) ), output_field=_PROFIT ) - Coalesce(
+            Sum( mise, filter=with_result( 'PERDANT' ), output_field=_PROFIT ),
+            Value( Decimal( 0 ) ), output_field=_PROFIT ),
+    }
+
+
+def tipster_stats_annotations(prefix='pronostics__'):
+    """
+    Expressions d'annotation des statistiques sur un queryset d'utilisateurs.
+    `prefix` est le chemin des pronostics depuis le modèle annoté.
+    """
+    return {
+        **pronostic_stats_annotations( prefix ),
+        'followers_count': _follow_count( 'following' ),
+        'following_count': _follow_count( 'follower' ),
+    }
+
+
+def with_tipster_stats(users=None):
+    """
+    Queryset d'utilisateurs annoté des statistiques (toutes en une requête).
+    """
+    users = User.objects.all() if users is None else users
+    return users.annotate( **tipster_stats_annotations() )
+
+
+def _aggregate_user_stats(users):
+    """
+    Valeurs des champs de UserStats calculées par agrégat, par utilisateur (dictionnaires avec 'pk').
+    """
+    annotations = tipster_stats_annotations()
+    return users.values( 'pk' ).annotate( **annotations ).values( 'pk', *USER_STATS_FIELDS )
+
+
+def _stats_context(values):
+    """
+    Statistiques prêtes pour le contexte des templates de profil : comptes par résultat,
+    taux de réussite (%), mise totale et profit (arrondis à 2 décimales), abonnés et abonnements.
+    """
+    stats = {field: values[field] for field in USER_STATS_FIELDS}
+    stats['total_completes'] = completes = stats['total_gagnants'] + stats['total_perdants']
+    stats['taux_reussite'] = round( stats['total_gagnants'] / completes * 100, 2 ) if completes else 0
+    stats['mise_totale'] = round( Decimal( stats['mise_totale'] ), 2 )
+    stats['profit_total'] = round( Decimal( stats['profit_total'] ), 2 )
+    return stats
+
+
+def get_tipster_stats(user):
+    """
+    Statistiques d'un tipster calculées en direct, en une requête agrégée.
+    """
+    return _stats_context( _aggregate_user_stats( User.objects.filter( pk=user.pk ) ).get() )
+
+
+def _lock_users(user_ids):
+    """
+    Verrouille les lignes User indiquées jusqu'à la fin de la transaction, dans un ordre stable.
+    """
+    return list( User.objects.select_for_update().filter( pk__in=user_ids ).order_by( 'pk' ).values_list(
+        'pk', flat=True ) )
+
+
+def get_user_stats(user):
+    """
+    Statistiques d'un tipster lues dans sa ligne UserStats (créée par agrégat si absente,
+    sous le verrou de l'utilisateur).
+    """
+    row = UserStats.objects.filter( user=user ).first()
+    if row is None:
+        with transaction.atomic():
+            _lock_users( [user.pk] )
+            values = _aggregate_user_stats( User.objects.filter( pk=user.pk ) ).get()
+            row, _ = UserStats.objects.get_or_create(
+                user=user, defaults={field: values[field] for field in USER_STATS_FIELDS} )
+    return _stats_context( {field: getattr( row, field ) for field in USER_STATS_FIELDS} )
+
+
+def rebuild_user_stats():
+    """
+    Recalcule les lignes UserStats de tous les utilisateurs en une passe (une requête agrégée,
+    puis réécriture en lot), dans une seule transaction qui verrouille les utilisateurs :
+    les deltas concurrents attendent la fin du recalcul. Retourne le nombre de lignes écrites.
+    """
+    with transaction.atomic():
+        _lock_users( User.objects.values( 'pk' ) )
+        rows = [
+            UserStats( user_id=values['pk'], **{field: values[field] for field in USER_STATS_FIELDS} )
+            for values in _aggregate_user_stats( User.objects.all() ).iterator()
+        ]
+        UserStats.objects.all().delete()
+        UserStats.objects.bulk_create( rows, batch_size=500 )
+    return len( rows )
+
+
+def _to_decimal(value):
+    return value if value is None or isinstance( value, Decimal ) else Decimal( str( value ) )
+
+
+def pronostic_contribution(resultat, mise, cote):
+    """
+    Part d'un pronostic dans les statistiques de son auteur ({champ de UserStats: valeur}).
+    """
+    contribution = {'total_pronostics': 1}
+    if resultat in RESULT_COUNT_FIELDS:
+        contribution[RESULT_COUNT_FIELDS[resultat]] = 1
+    mise, cote = _to_decimal( mise ), _to_decimal( cote )
+    if resultat in COMPLETED_RESULTS and mise is not None:
+        contribution['mise_totale'] = mise
+        if resultat == 'PERDANT':
+            contribution['profit_total'] = -mise
+        elif cote is not None:
+            contribution['profit_total'] = mise * (cote - 1)
+    return contribution
+
+
+def add_contribution(deltas, user_id, contribution, sign=1):
+    if user_id is None:
+        return
+    user_delta = deltas.setdefault( user_id, {} )
+    for field, value in contribution.items():
+        user_delta[field] = user_delta.get( field, 0 ) + sign * value
+
+
+def apply_stats_deltas(deltas):
+    """
+    Applique {user_id: {champ: delta}} par UPDATE ... SET champ = champ + delta, sous le
+    verrou des utilisateurs concernés. À appeler dans la transaction de l'écriture qui
+    produit les deltas. Les utilisateurs sans ligne sont ignorés : leur ligne sera
+    calculée, changement compris, à sa première lecture.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Ordre stable des verrous entre transactions concurrentes.
+        _lock_users( [user_id for user_id in deltas if user_id is not None] )
+        for user_id, delta in sorted( deltas.items() ):
+            changes = {field: F( field ) + value for field, value in delta.items() if value}
+            if changes:
+                UserStats.objects.filter( user_id=user_id ).update( date_mise_a_jour=now, **changes )
+
+
+def pronostic_stats_state(pronostic):
+    """
+    Tuple STATS_SOURCE_FIELDS d'un pronostic en mémoire.
+    """
+    return tuple( getattr( pronostic, field ) for field in STATS_SOURCE_FIELDS )
+
+
+def stored_pronostic_stats_state(pk):
+    """
+    Tuple STATS_SOURCE_FIELDS du pronostic tel qu'enregistré en base (None s'il n'existe pas).
+    """
+    return Pronostic.objects.filter( pk=pk ).values_list( *STATS_SOURCE_FIELDS ).first()
+
+
+def record_pronostic_change(previous, current):
+    """
+    Met à jour les statistiques pour un pronostic passé de l'état `previous` à `current`
+    (tuples STATS_SOURCE_FIELDS ; None pour une création ou une suppression).
+    """
+    if previous == current:
+        return
+    deltas = {}
+    if previous is not None:
+        add_contribution( deltas, previous[0], pronostic_contribution( *previous[1:] ), sign=-1 )
+    if current is not None:
+        add_contribution( deltas, current[0], pronostic_contribution( *current[1:] ) )
+    apply_stats_deltas( deltas )
+
+
+def record_settlement(rows, outcome):
+    """
+    Met à jour les statistiques pour des pronostics EN_COURS réglés en lot à `outcome`.
+    `rows` : tuples (utilisateur_id, mise, cote).
+    """
+    deltas = {}
+    for user_id, mise, cote in rows:
+        add_contribution( deltas, user_id, pronostic_contribution( 'EN_COURS', mise, cote ), sign=-1 )
+        add_contribution( deltas, user_id, pronostic_contribution( outcome, mise, cote ) )
+    apply_stats_deltas( deltas )
+
+
+def record_follow(follower_id, following_id, sign=1):
+    apply_stats_deltas( {
+        following_id: {'followers_count': sign},
+        follower_id: {'following_count': sign},
+    } )
@@ -1,5 +1,6 @@
 # profoot/templatetags/profoot_context.py
 from ..models import Notification # N'oubliez pas l'import relatif
+from ..live_updates import LIVE_POLL_INTERVAL, streaming_supported
 from django.contrib.auth.models import User
 from django.db.models import Count
 
@@ -7,4 +8,11 @@ def unread_notifications_count(request):
     if request.user.is_authenticated:
         count = Notification.objects.filter(recipient=request.user, is_read=False).count()
         return {'unread_notifications_count': count}
-    return {'unread_notifications_count': 0}
\ No newline at end of file
+    return {'unread_notifications_count': 0}
+
+def live_scores(request):
+    # Flux SSE seulement sous ASGI ; sinon, interrogation périodique (templates/_live_scores.html).
+    return {
+        'live_scores_streaming': streaming_supported(request),
+        'live_scores_poll_interval': LIVE_POLL_INTERVAL,
+    }
@@ -0,0 +1,387 @@
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .api_integrations import (
+    _store_fixtures_page, poll_fixture_updates, poll_livescores, settle_pending_pronostics, sync_upcoming_matches,
+)
+from .bet_spec import BetSpecError, parse_bet_spec
+from .forms import PronosticForm
+from . import sportmonks_client
+from .models import Match, Pronostic, UserStats
+from .search import is_index_available, search_pronostics
+from .stats import get_tipster_stats, get_user_stats, rebuild_user_stats
+from .settlement import split_locally_final_matches
+
+
+def _v3_fixture(api_event_id, state_id, home=None, away=None, state_name=None):
+    """
+    Fixture au format Sportmonks v3 : pas de booléen 'finished', la finalité se lit sur state_id.
+    """
+    fixture = {
+        'id': api_event_id,
+        'name': 'Lens vs Lille',
+        'starting_at': '2026-10-10 20:00:00',
+        'league_id': 301,
+        'venue_id': 12,
+        'state_id': state_id,
+        'state': {'id': state_id, 'name': state_name} if state_name else None,
+        'scores': None,
+    }
+    if home is not None:
+        fixture['scores'] = {'fulltime': {'home': home, 'away': away}}
+    return fixture
+
+
+class RemoteSettlementTests( TestCase ):
+
+    def setUp(self):
+        self.user = User.objects.create_user( 'tipster', password='secret' )
+        self.match = Match.objects.create(
+            api_event_id=19000001, equipe_domicile='Lens', equipe_exterieur='Lille',
+            date_match=timezone.now() - timedelta( hours=3 ), status_api='2',
+        )
+        self.pronostic = Pronostic.objects.create(
+            utilisateur=self.user, match=self.match, type_pari='1N2', prediction_details='Pari : 1',
+            pari_selection='1', cote='2.00', mise='10.00',
+        )
+
+    def _settle(self, fixture, **kwargs):
+        with mock.patch( 'profoot.api_integrations.fetch_matches_data_from_api',
+                         return_value={self.match.api_event_id: fixture} ):
+            return settle_pending_pronostics( Pronostic.objects.filter( resultat='EN_COURS' ), **kwargs )
+
+    def test_full_time_state_settles_without_finished_key(self):
+        stats = self._settle( _v3_fixture( self.match.api_event_id, 5, 2, 1, 'Full Time' ) )
+
+        self.assertEqual( stats['matches_settled'], 1 )
+        self.assertEqual( stats['matches_pending'], 0 )
+        self.pronostic.refresh_from_db()
+        self.assertEqual( self.pronostic.resultat, 'GAGNANT' )
+        self.match.refresh_from_db()
+        self.assertEqual( (self.match.score_final_domicile, self.match.score_final_exterieur), (2, 1) )
+
+    def test_refresh_finished_settles_from_api(self):
+        stats = self._settle( _v3_fixture( self.match.api_event_id, 8, 0, 1 ), refresh_finished=True )
+
+        self.assertEqual( stats['matches_settled'], 1 )
+        self.pronostic.refresh_from_db()
+        self.assertEqual( self.pronostic.resultat, 'PERDANT' )
+
+    def test_half_time_state_is_not_final(self):
+        stats = self._settle( _v3_fixture( self.match.api_event_id, 3, 1, 0, 'Half Time' ) )
+
+        self.assertEqual( stats['matches_pending'], 1 )
+        self.pronostic.refresh_from_db()
+        self.assertEqual( self.pronostic.resultat, 'EN_COURS' )
+
+    def test_cancelled_state_cancels_without_score(self):
+        stats = self._settle( _v3_fixture( self.match.api_event_id, 12, state_name='Cancelled' ) )
+
+        self.assertEqual( stats['matches_settled'], 1 )
+        self.pronostic.refresh_from_db()
+        self.assertEqual( self.pronostic.resultat, 'ANNULE' )
+
+
+class BetSpecTests( TestCase ):
+
+    def test_free_text_is_never_read_as_selection(self):
+        with self.assertRaises( BetSpecError ):
+            parse_bet_spec( '1N2', '2 victoires de suite pour le PSG', equipe_domicile='PSG', equipe_exterieur='Lyon' )
+        with self.assertRaises( BetSpecError ):
+            parse_bet_spec( '1N2', "Analyse du match.\nje pense que 1 gagne" )
+
+    def test_explicit_marker(self):
+        spec = parse_bet_spec( '1N2', "Analyse du match.\nPari : 2", equipe_domicile='PSG', equipe_exterieur='Lyon' )
+        self.assertEqual( spec['pari_selection'], '2' )
+        spec = parse_bet_spec( 'HANDICAP', 'Choix : Lyon +1.5', equipe_domicile='PSG', equipe_exterieur='Lyon' )
+        self.assertEqual( (spec['pari_camp'], str( spec['pari_handicap'] )), ('EXTERIEUR', '1.5') )
+
+    def test_team_name_must_match_exactly(self):
+        with self.assertRaises( BetSpecError ):
+            parse_bet_spec( '1N2', 'Pari : Paris', equipe_domicile='Paris Saint-Germain', equipe_exterieur='Lyon' )
+
+    def test_manual_types_need_no_selection(self):
+        self.assertFalse( any( parse_bet_spec( 'BUTEUR', 'Mbappé marque' ).values() ) )
+
+
+class PronosticFormTests( TestCase ):
+
+    def setUp(self):
+        self.match = Match.objects.create(
+            api_event_id=19000002, equipe_domicile='Lens', equipe_exterieur='Lille',
+            date_match=timezone.now() + timedelta( days=2 ),
+        )
+
+    def _form(self, details, type_pari='1N2'):
+        return PronosticForm( data={
+            'match': self.match.pk, 'discipline': 'FOOTBALL', 'type_pari': type_pari,
+            'prediction_details': details, 'resultat': 'EN_COURS',
+        } )
+
+    def test_auto_settled_type_without_selection_is_rejected(self):
+        form = self._form( "Analyse du match.\nje pense que 1 gagne" )
+        self.assertFalse( form.is_valid() )
+        self.assertIn( 'prediction_details', form.errors )
+
+    def test_explicit_selection_is_stored_on_instance(self):
+        form = self._form( "Analyse du match.\nPari : Lille" )
+        self.assertTrue( form.is_valid(), form.errors )
+        self.assertEqual( form.instance.pari_selection, '2' )
+
+
+class FixtureHashTests( TestCase ):
+
+    def _store(self, league_name):
+        fixture = _v3_fixture( 19000003, 1 )
+        with mock.patch( 'profoot.api_integrations.prefetch_references' ), \
+                mock.patch( 'profoot.api_integrations.get_league_name', return_value=league_name ), \
+                mock.patch( 'profoot.api_integrations.get_venue_name', return_value='Stade Bollaert' ):
+            return _store_fixtures_page( [fixture] )
+
+    def test_unresolved_league_is_rewritten_on_next_sync(self):
+        self._store( 'N/A' )
+        self.assertEqual( Match.objects.get( api_event_id=19000003 ).payload_hash, '' )
+
+        added, updated, unchanged, details = self._store( 'Ligue 1' )
+        self.assertEqual( (updated, unchanged), (1, 0) )
+        match = Match.objects.get( api_event_id=19000003 )
+        self.assertEqual( match.ligue, 'Ligue 1' )
+        self.assertNotEqual( match.payload_hash, '' )
+
+        self.assertEqual( self._store( 'Ligue 1' )[2], 1 )
+
+
+class SyncCadenceTests( TestCase ):
+    """
+    Synchronisation planifiée toutes les 5 minutes, avec ou sans suiveur du flux
+    'fixtures/latest' (~10 s de modifications par appel) toutes les 5 secondes.
+    """
+
+    def setUp(self):
+        self.now = timezone.now()
+        patcher = mock.patch( 'profoot.api_integrations.timezone.now', side_effect=lambda: self.now )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+        self.full_scans = mock.patch( 'profoot.api_integrations._fetch_upcoming_window',
+                                      return_value=(0, 0, 0, True) ).start()
+        self.feed_calls = mock.patch( 'profoot.api_integrations._ingest_fixtures_endpoint',
+                                      return_value=(0, 0, 0, True) ).start()
+        self.addCleanup( mock.patch.stopall )
+
+    def _scheduled_syncs(self, count, poll_every=None, period=timedelta( minutes=5 )):
+        modes = []
+        for _ in range( count ):
+            modes.append( sync_upcoming_matches()[3] )
+            if poll_every is None:
+                self.now += period
+                continue
+            elapsed = timedelta()
+            while elapsed < period:
+                self.now += poll_every
+                elapsed += poll_every
+                poll_fixture_updates()
+        return modes
+
+    def test_scheduled_sync_alone_is_always_full(self):
+        self.assertEqual( self._scheduled_syncs( 4 ), [True] * 4 )
+        self.assertEqual( self.feed_calls.call_count, 0 )
+
+    def test_follower_within_horizon_keeps_scheduled_sync_incremental(self):
+        self.assertEqual( self._scheduled_syncs( 4, poll_every=timedelta( seconds=5 ) ), [True, False, False, False] )
+        self.assertEqual( self.full_scans.call_count, 1 )
+
+    def test_follower_slower_than_horizon_falls_back_to_full(self):
+        self.assertEqual( self._scheduled_syncs( 3, poll_every=timedelta( seconds=30 ) ), [True] * 3 )
+
+    def test_gap_in_follower_forces_next_full_scan(self):
+        self._scheduled_syncs( 2, poll_every=timedelta( seconds=5 ) )
+        # Suiveur arrêté une minute : des modifications ont pu sortir du flux.
+        self.now += timedelta( minutes=1 )
+        poll_fixture_updates()
+        self.assertTrue( sync_upcoming_matches()[3] )
+        self.now += timedelta( seconds=5 )
+        poll_fixture_updates()
+        self.assertFalse( sync_upcoming_matches()[3] )
+
+
+class LiveScoreTests( TestCase ):
+
+    def setUp(self):
+        self.match = Match.objects.create(
+            api_event_id=19000004, equipe_domicile='Lens', equipe_exterieur='Lille',
+            date_match=timezone.now() - timedelta( minutes=50 ), status_api='1',
+        )
+
+    def _poll(self, fixture):
+        with mock.patch( 'profoot.api_integrations._make_sportmonks_request', return_value={'data': [fixture]} ):
+            return poll_livescores()
+
+    def test_in_play_score_is_not_a_final_score(self):
+        fixture = _v3_fixture( self.match.api_event_id, 2, state_name='1st Half' )
+        fixture['scores'] = {'current': {'home': 1, 'away': 0}}
+        self.assertEqual( self._poll( fixture ), (1, 1, 0) )
+
+        self.match.refresh_from_db()
+        self.assertEqual( (self.match.score_live_domicile, self.match.score_live_exterieur), (1, 0) )
+        self.assertIsNone( self.match.score_final_domicile )
+        self.assertEqual( split_locally_final_matches( [self.match.pk] )[2], [self.match.pk] )
+
+    def test_final_state_fills_final_score(self):
+        self._poll( _v3_fixture( self.match.api_event_id, 5, 2, 1, 'Full Time' ) )
+
+        self.match.refresh_from_db()
+        self.assertEqual( (self.match.score_final_domicile, self.match.score_final_exterieur), (2, 1) )
+        self.assertEqual( split_locally_final_matches( [self.match.pk] )[0], [self.match.pk] )
+
+    def test_command_survives_a_failed_cycle(self):
+        with mock.patch( 'profoot.management.commands.poll_livescores.poll_livescores',
+                         side_effect=[RuntimeError( 'base indisponible' ), (0, 0, 0)] ) as poll, \
+                mock.patch( 'profoot.management.commands.poll_livescores.time.sleep',
+                            side_effect=[None, KeyboardInterrupt] ) as sleep:
+            call_command( 'poll_livescores', stdout=StringIO() )
+
+        self.assertEqual( poll.call_count, 2 )
+        self.assertEqual( sleep.call_args_list[0], mock.call( 5 ) )
+
+
+class SearchIndexTests( TestCase ):
+
+    def test_bulk_upsert_reindexes_match_pronostics(self):
+        if not is_index_available():
+            self.skipTest( "Index de recherche indisponible sur cette base." )
+        user = User.objects.create_user( 'tipster', password='secret' )
+        fixture = _v3_fixture( 19000005, 1 )
+        with mock.patch( 'profoot.api_integrations.prefetch_references' ), \
+                mock.patch( 'profoot.api_integrations.get_league_name', return_value='Ligue 1' ), \
+                mock.patch( 'profoot.api_integrations.get_venue_name', return_value='Stade Bollaert' ):
+            _store_fixtures_page( [fixture] )
+            pronostic = Pronostic.objects.create(
+                utilisateur=user, match=Match.objects.get( api_event_id=19000005 ), type_pari='BUTEUR',
+                prediction_details='Analyse', cote='2.00', mise='10.00',
+            )
+            fixture['name'] = 'Lens vs Valenciennes'
+            _store_fixtures_page( [fixture] )
+
+        self.assertEqual( list( search_pronostics( Pronostic.objects.all(), 'valenciennes' ) ), [pronostic] )
+
+
+class BenchmarkIngestionTests( TestCase ):
+
+    @override_settings( DEBUG=False )
+    def test_in_place_requires_confirmation_outside_debug(self):
+        with mock.patch( 'profoot.management.commands.benchmark_ingestion.fetch_and_store_upcoming_matches' ) as ingest:
+            with self.assertRaises( CommandError ):
+                call_command( 'benchmark_ingestion', '--in-place', stdout=StringIO() )
+        ingest.assert_not_called()
+
+
+class UserStatsTests( TestCase ):
+
+    def setUp(self):
+        self.user = User.objects.create_user( 'tipster', password='secret' )
+        self.match = Match.objects.create(
+            api_event_id=19000006, equipe_domicile='Lens', equipe_exterieur='Lille',
+            date_match=timezone.now() - timedelta( hours=3 ),
+        )
+
+    def _pronostic(self, resultat='EN_COURS'):
+        return Pronostic.objects.create(
+            utilisateur=self.user, match=self.match, type_pari='1N2', prediction_details='Pari : 1',
+            pari_selection='1', cote='2.50', mise='10.00', resultat=resultat,
+        )
+
+    def _assert_consistent(self):
+        self.assertEqual( get_user_stats( self.user ), get_tipster_stats( self.user ) )
+
+    def test_row_created_on_first_read_then_kept_by_deltas(self):
+        self._pronostic( 'GAGNANT' )
+        self.assertFalse( UserStats.objects.filter( user=self.user ).exists() )
+        self._assert_consistent()
+
+        pronostic = self._pronostic()
+        pronostic.resultat = 'PERDANT'
+        pronostic.save()
+        self._assert_consistent()
+        self.assertEqual( get_user_stats( self.user )['total_perdants'], 1 )
+
+    def test_write_and_delta_share_a_transaction(self):
+        get_user_stats( self.user )
+        with mock.patch( 'profoot.signals.record_pronostic_change', side_effect=RuntimeError ):
+            with self.assertRaises( RuntimeError ):
+                self._pronostic()
+        self.assertFalse( Pronostic.objects.exists() )
+        self._assert_consistent()
+
+    def test_rebuild_matches_aggregate(self):
+        get_user_stats( self.user )
+        self._pronostic( 'GAGNANT' )
+        UserStats.objects.filter( user=self.user ).update( total_pronostics=42 )
+
+        self.assertEqual( rebuild_user_stats(), User.objects.count() )
+        self._assert_consistent()
+
+
+class _FlakyHandler( BaseHTTPRequestHandler ):
+    """
+    Répond 503 à la première requête de chaque chemin, puis 200.
+    """
+    seen = set()
+
+    def do_GET(self):
+        path = self.path.split( '?' )[0]
+        status = 200 if path in self.seen else 503
+        self.seen.add( path )
+        body = b'{"data": {"name": "Stade"}}'
+        self.send_response( status )
+        self.send_header( 'Content-Type', 'application/json' )
+        self.send_header( 'Content-Length', str( len( body ) ) )
+        self.end_headers()
+        self.wfile.write( body )
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RateLimiterTests( TestCase ):
+
+    def setUp(self):
+        _FlakyHandler.seen = set()
+        server = ThreadingHTTPServer( ('127.0.0.1', 0), _FlakyHandler )
+        threading.Thread( target=server.serve_forever, daemon=True ).start()
+        self.addCleanup( server.server_close )
+        self.addCleanup( server.shutdown )
+        self.batch = mock.Mock( wraps=sportmonks_client.TokenBucket( 1000, 1000 ) )
+        self.interactive = sportmonks_client.TokenBucket( 0.001, 1 )
+        for name, value in (('SPORTMONKS_BASE_URL', f'http://127.0.0.1:{server.server_port}'),
+                            ('SPORTMONKS_API_TOKEN', 'stub'),
+                            ('_rate_limiter', self.batch),
+                            ('_interactive_limiter', self.interactive)):
+            patcher = mock.patch.object( sportmonks_client, name, value )
+            patcher.start()
+            self.addCleanup( patcher.stop )
+
+    def test_each_retry_takes_a_token(self):
+        calls_before = sportmonks_client.get_request_count()
+        self.assertIsNotNone( sportmonks_client.sportmonks_get( 'venues/1' ) )
+        self.assertEqual( self.batch.acquire.call_count, 2 )
+        self.assertEqual( sportmonks_client.get_request_count() - calls_before, 2 )
+
+    def test_interactive_calls_fail_fast_on_their_own_budget(self):
+        _FlakyHandler.seen = {'/venues/1'}
+        breaker = sportmonks_client.CircuitBreaker( 'test', failure_threshold=1 )
+        self.assertIsNotNone( breaker.call( sportmonks_client.sportmonks_get, 'venues/1', interactive=True ) )
+        with self.assertRaises( sportmonks_client.RateLimitExceeded ):
+            breaker.call( sportmonks_client.sportmonks_get, 'venues/1', interactive=True )
+
+        self.assertEqual( breaker.snapshot()['state'], breaker.CLOSED )
+        self.batch.acquire.assert_not_called()
+        self.assertIsNotNone( sportmonks_client.sportmonks_get( 'venues/1' ) )
@@ -20,6 +20,12 @@ urlpatterns = [
     # Il ne doit PAS y avoir de 'path('', include('profoot.urls'))' ici car ce fichier EST 'profoot.urls'.
     path('', views.liste_pronostics, name='liste_pronostics'),
     path('pronostic/<int:pk>/', views.detail_pronostic, name='detail_pronostic'),
+    # Flux Server-Sent Events des scores en direct (servi via profoot/asgi.py)
+    path('live/scores/', views.live_scores_stream, name='live_scores_stream'),
+    # Repli par interrogation périodique lorsque le site est servi en WSGI
+    path('live/scores/poll/', views.live_scores_poll, name='live_scores_poll'),
+    # Supervision : état du disjoncteur et du cache Sportmonks (JSON, réservé au staff)
+    path('monitoring/sportmonks/', views.sportmonks_health, name='sportmonks_health'),
 
     # Ces URLs pour l'authentification sont incluses ici, ce qui est correct.
     path('accounts/', include('django.contrib.auth.urls')),
@@ -36,6 +42,8 @@ urlpatterns = [
     path('profile/<str:username>/unfollow/', views.unfollow_user, name='unfollow_user'),
     path('notifications/', views.notification_list, name='notification_list'),
     path('followed-feed/', views.followed_pronostics_feed, name='followed_pronostics_feed'),
+    # Classement des tipsters (précalculé par la commande refresh_leaderboard)
+    path('classement/', views.leaderboard, name='leaderboard'),
 
     # L'URL de votre nouvelle page promo
     path('promo-codes/', views.promo_codes_view, name='promo_codes'),
@@ -1,126 +1,38 @@
-import requests
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q, Sum, Count
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
-from django.http import Http404
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
-from datetime import datetime, time  # Ensure datetime is imported
 from django.contrib.auth import authenticate, login, logout
-import os
 import logging
 from django.utils import timezone  # Importez timezone ici aussi
 
 # Importez les fonctions d'intégration API nécessaires
-from .api_integrations import _make_sportmonks_request, fetch_league_name_from_api, fetch_venue_name_from_api
+# Résolution d'un ID Sportmonks en Match (base d'abord, API si inconnu ou périmé)
+from .match_resolution import resolve_match, initial_from_match
+# Supervision du disjoncteur et du cache des fixtures Sportmonks
+from .fixture_cache import get_sportmonks_health
+# Diffusion des scores en direct (Server-Sent Events)
+from .live_updates import current_scores, parse_match_ids, stream_events, streaming_supported
+# Pagination par curseur de la liste des pronostics
+from .pagination import paginate_pronostics, paginate_ranked, PAGINATION_PARAMS
+from .search import ranked_pronostic_ids, search_pronostics
+from .stats import get_user_stats
+# Classement des tipsters précalculé
+from .leaderboard import LEADERBOARD_DEFAULT_WINDOW, RANKING_CRITERIA, leaderboard_page
 
 # Import all necessary models and forms
-from .models import Pronostic, Follow, Notification, Comment, UserProfile, BookmakerOffer, Match
+from .models import Pronostic, Follow, Notification, Comment, UserProfile, BookmakerOffer, Match, TipsterRanking
 from .forms import CustomUserCreationForm, PronosticForm, CommentForm
 
-# --- Configuration Sportmonks API ---
-SPORTMONKS_API_TOKEN = os.environ.get( 'SPORTMONKS_API_TOKEN' )
-SPORTMONKS_BASE_URL = "https://api.sportmonks.com/v3/football"
-
 # Initialisation du logger pour les vues
 logger = logging.getLogger( __name__ )
 
 
-def get_event_details_from_sportmonks(event_id):
-    """
-    Récupère les détails d'un match spécifique depuis l'API Sportmonks.
-    Cette fonction ne passe AUCUN include, car l'API semble les rejeter.
-    Retourne un dictionnaire avec les données du match formatées pour le formulaire ou None en cas d'erreur.
-    """
-    if not SPORTMONKS_API_TOKEN:
-        logger.error( "Impossible de récupérer les détails de l'événement Sportmonks : Clé API manquante." )
-        return None
-
-    # Utilisation de _make_sportmonks_request sans paramètres 'include'
-    full_response = _make_sportmonks_request( f'fixtures/{event_id}' )
-
-    if not full_response or not full_response.get( 'data' ):
-        logger.warning( f"API Sportmonks: Aucun résultat trouvé pour l'ID {event_id}. Réponse: {full_response}" )
-        return None
-
-    fixture = full_response['data']
-
-    # Extraction des noms d'équipes à partir du champ 'name'
-    home_team_name = "N/A"
-    away_team_name = "N/A"
-    fixture_name = fixture.get( 'name', '' )
-    if ' vs ' in fixture_name:
-        parts = fixture_name.split( ' vs ' )
-        if len( parts ) == 2:
-            home_team_name = parts[0].strip()
-            away_team_name = parts[1].strip()
-    else:
-        home_team_name = fixture_name  # Fallback si pas de 'vs'
-        logger.warning( f"Format de nom de fixture inattendu pour ID {fixture.get( 'id' )}: {fixture_name}" )
-
-    # Récupération du nom de la ligue via un appel séparé
-    league_id = fixture.get( 'league_id' )
-    league_name = fetch_league_name_from_api( league_id )
-
-    # Récupération du nom du stade via un appel séparé
-    venue_id = fixture.get( 'venue_id' )
-    stadium_name = fetch_venue_name_from_api( venue_id )
-
-    event_datetime_str = fixture.get( 'starting_at' )
-    event_datetime_obj = None
-    if event_datetime_str:
-        try:
-            # Tente de parser avec le format exact de votre exemple "YYYY-MM-DD HH:MM:SS"
-            naive_datetime = datetime.strptime( event_datetime_str, "%Y-%m-%d %H:%M:%S" )
-            # CORRECTION ICI : Rendre la date et l'heure timezone-aware
-            event_datetime_obj = timezone.make_aware( naive_datetime, timezone.get_current_timezone() )
-        except ValueError:
-            # Si le format n'est pas le même (ex: contient 'Z' ou décalage), tente fromisoformat
-            try:
-                # CORRECTION ICI : Rendre la date et l'heure timezone-aware
-                event_datetime_obj = timezone.make_aware(
-                    datetime.fromisoformat( event_datetime_str.replace( 'Z', '+00:00' ) ) )
-            except ValueError:
-                logger.warning( f"Erreur de format de date Sportmonks pour {event_datetime_str} (ID: {event_id})" )
-                pass
-
-    # Scores finaux (si le match est terminé) - souvent directement sur l'objet fixture
-    scores_data = fixture.get( 'scores', {} )
-    fulltime_scores = scores_data.get( 'fulltime', {} )
-    score_final_domicile = fulltime_scores.get( 'home' )
-    score_final_exterieur = fulltime_scores.get( 'away' )
-
-    # Statut du match (Sportmonks utilise 'state_id' ou 'finished' booléen)
-    status_event = "N/A"
-    if fixture.get( 'finished' ):
-        status_event = "Terminé"
-    elif fixture.get( 'state_id' ) == 1:
-        status_event = "À venir"
-    elif fixture.get( 'state_id' ) == 2:
-        status_event = "En direct"
-    elif fixture.get( 'state', {} ).get( 'name' ):  # Tente d'obtenir le nom de l'état
-        status_event = fixture.get( 'state', {} ).get( 'name' )
-    elif fixture.get( 'state_id' ):  # Fallback à l'ID si pas de nom
-        status_event = str( fixture.get( 'state_id' ) )
-
-    return {
-        'api_event_id': fixture.get( 'id' ),  # L'ID Sportmonks
-        'discipline': 'FOOTBALL',  # Assumé, à modifier si l'API le fournit
-        'equipe_domicile': home_team_name,
-        'equipe_exterieur': away_team_name,
-        'ligue': league_name,
-        'date_match': event_datetime_obj.date() if event_datetime_obj else None,
-        'heure_match': event_datetime_obj.time() if event_datetime_obj else None,
-        'score_final_domicile': score_final_domicile,
-        'score_final_exterieur': score_final_exterieur,
-        'status_event': status_event,
-        'event_name': f"{home_team_name} vs {away_team_name}",
-        'stade': stadium_name,
-    }
-
-
 def get_base_context(request):
     unread_notifications_count = 0
     if request.user.is_authenticated:
@@ -132,13 +44,10 @@ def get_base_context(request):
 
 
 def liste_pronostics(request):
-    pronostics = Pronostic.objects.all()
+    # Tout ce qu'affiche une carte (auteur, bookmaker) est chargé dans la même requête.
+    pronostics = Pronostic.objects.select_related( 'utilisateur', 'bookmaker_recommande' )
 
     sort_by = request.GET.get( 'sort', '-date_match' )
-    if sort_by == 'date_asc':
-        pronostics = pronostics.order_by( 'date_match' )
-    else:
-        pronostics = pronostics.order_by( '-date_match' )
 
     filter_status = request.GET.get( 'status' )
     if filter_status and filter_status in [choice[0] for choice in Pronostic.STATUT_CHOICES]:
@@ -149,17 +58,27 @@ def liste_pronostics(request):
         pronostics = pronostics.filter( discipline=filter_discipline )
 
     query = request.GET.get( 'q' )
-    if query:
+    # Recherche via l'index plein texte (classé, sans accents) ; icontains s'il est indisponible.
+    searched = search_pronostics( pronostics, query ) if query else None
+    if searched is not None:
+        pronostics = searched
+    elif query:
         pronostics = pronostics.filter(
             Q( equipe_domicile__icontains=query ) |
             Q( equipe_exterieur__icontains=query ) |
             Q( ligue__icontains=query ) |
             Q( prediction_details__icontains=query )
-        ).distinct()
+        )
 
-    paginator = Paginator( pronostics, 5 )
-    page_number = request.GET.get( 'page' )
-    page_obj = paginator.get_page( page_number )
+    if searched is not None and sort_by == 'pertinence':
+        # Classement par pertinence, filtres compris, borné à SEARCH_MAX_RESULTS.
+        page_obj = paginate_ranked( pronostics, ranked_pronostic_ids( pronostics, query ), request.GET )
+    else:
+        # Pagination par curseur sur (date_match, id), sans COUNT(*) ; les URL ?page=N restent valides.
+        page_obj = paginate_pronostics( pronostics, request.GET, descending=sort_by != 'date_asc' )
+    filter_query = request.GET.copy()
+    for param in PAGINATION_PARAMS:
+        filter_query.pop( param, None )
 
     if not request.session.get( 'welcome_message_shown' ):
         messages.info( request, "Bienvenue sur ProFoot Pronos ! Découvrez nos dernières analyses de matchs." )
@@ -168,6 +87,7 @@ def liste_pronostics(request):
     context = get_base_context( request )
     context.update( {
         'page_obj': page_obj,
+        'filter_query': filter_query.urlencode(),
         'current_sort': sort_by,
         'current_status': filter_status,
         'search_query': query,
@@ -211,6 +131,45 @@ def detail_pronostic(request, pk):
     return render( request, 'profoot/detail_pronostic.html', context )
 
 
+async def live_scores_stream(request):
+    """
+    Flux Server-Sent Events des changements de score et de statut des matchs
+    demandés (?matches=1,2,3). Les données viennent du diffuseur partagé du
+    processus : aucune requête en base par client. Nécessite un serveur ASGI :
+    sous WSGI, la réponse 204 indique au navigateur de ne pas se reconnecter
+    (les pages utilisent alors live_scores_poll).
+    """
+    if not streaming_supported( request ):
+        return HttpResponse( status=204 )
+    match_ids = parse_match_ids( request.GET.get( 'matches' ) )
+    if not match_ids:
+        return HttpResponseBadRequest( "Paramètre 'matches' manquant ou invalide." )
+
+    response = StreamingHttpResponse( stream_events( match_ids ), content_type='text/event-stream' )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # désactive la mise en tampon des proxys (nginx)
+    return response
+
+
+def live_scores_poll(request):
+    """
+    Scores et statuts courants des matchs demandés (?matches=1,2,3), en JSON :
+    repli par interrogation périodique du flux SSE lorsque le site est servi en WSGI.
+    """
+    match_ids = parse_match_ids( request.GET.get( 'matches' ) )
+    if not match_ids:
+        return HttpResponseBadRequest( "Paramètre 'matches' manquant ou invalide." )
+    return JsonResponse( {'matches': current_scores( match_ids )} )
+
+
+@staff_member_required
+def sportmonks_health(request):
+    """
+    État du disjoncteur Sportmonks et du cache des fixtures (supervision), en JSON.
+    """
+    return JsonResponse( get_sportmonks_health() )
+
+
 def register(request):
     if request.method == 'POST':
         form = CustomUserCreationForm( request.POST )
@@ -237,42 +196,14 @@ def register(request):
 def profile(request):
     user_pronostics = Pronostic.objects.filter( utilisateur=request.user ).order_by( '-date_match' )
 
-    total_pronostics = user_pronostics.count()
-    pronostics_gagnants = user_pronostics.filter( resultat='GAGNANT' )
-    pronostics_perdants = user_pronostics.filter( resultat='PERDANT' )
-    pronostics_en_cours = user_pronostics.filter( resultat='EN_COURS' )
-    pronostics_annules = user_pronostics.filter( resultat='ANNULE' )
-
-    total_gagnants = pronostics_gagnants.count()
-    total_perdants = pronostics_perdants.count()
-    total_en_cours = pronostics_en_cours.count()
-    total_annules = pronostics_annules.count()
-
-    pronostics_completes = user_pronostics.exclude( resultat__in=['EN_COURS', 'ANNULE'] )
-    total_pronostics_completes = pronostics_completes.count()
-
-    taux_reussite = 0
-    if total_pronostics_completes > 0:
-        taux_reussite = (total_gagnants / total_pronostics_completes) * 100
-
-    profit_total = sum( p.gain_ou_perte for p in pronostics_completes )
-
-    followers_count = request.user.follower_relations.count()
-    following_count = request.user.following_relations.count()
+    # Statistiques lues dans la ligne UserStats de l'utilisateur (tenue à jour par deltas).
+    stats = get_user_stats( request.user )
 
     context = get_base_context( request )
     context.update( {
         'user': request.user,
         'user_pronostics': user_pronostics,
-        'total_pronostics': total_pronostics,
-        'total_gagnants': total_gagnants,
-        'total_perdants': total_perdants,
-        'total_en_cours': total_en_cours,
-        'total_annules': total_annules,
-        'taux_reussite': round( taux_reussite, 2 ),
-        'profit_total': round( profit_total, 2 ),
-        'followers_count': followers_count,
-        'following_count': following_count,
+        **stats,
     } )
     return render( request, 'registration/profile.html', context )
 
@@ -284,48 +215,11 @@ def add_pronostic(request):
     api_event_id_from_get = request.GET.get( 'api_event_id' )
 
     if api_event_id_from_get:
-        event_details = get_event_details_from_sportmonks( api_event_id_from_get )
-        if event_details:
+        match_obj, from_api = resolve_match( api_event_id_from_get )
+        if match_obj:
             messages.success( request,
-                              f"Détails du match pour '{event_details.get( 'event_name' )}' chargés avec succès depuis Sportmonks !" )
-
-            # Note: date_match de event_details est un objet datetime.date
-            # et heure_match est un objet datetime.time.
-            # Nous combinons date et heure ici avant de passer au modèle.
-            combined_datetime = None
-            if event_details.get( 'date_match' ) and event_details.get( 'heure_match' ):
-                # event_details['date_match'] est déjà un objet date (depuis event_datetime_obj.date())
-                # event_details['heure_match'] est déjà un objet time (depuis event_datetime_obj.time())
-                # combined_datetime doit être un datetime aware pour le modèle Match
-                naive_combined = datetime.combine( event_details['date_match'], event_details['heure_match'] )
-                combined_datetime = timezone.make_aware( naive_combined, timezone.get_current_timezone() )
-            elif event_details.get( 'date_match' ):  # Si seule la date est dispo (ex: API ne donne pas l'heure)
-                naive_combined = datetime.combine( event_details['date_match'], time( 0, 0 ) )  # Utilise minuit
-                combined_datetime = timezone.make_aware( naive_combined, timezone.get_current_timezone() )
-
-            match_obj, created_match = Match.objects.update_or_create(
-                api_event_id=event_details['api_event_id'],
-                defaults={
-                    'discipline': event_details.get( 'discipline' ),
-                    'equipe_domicile': event_details.get( 'equipe_domicile' ),
-                    'equipe_exterieur': event_details.get( 'equipe_exterieur' ),
-                    'date_match': combined_datetime,  # Utilise le datetime combiné
-                    'ligue': event_details.get( 'ligue' ),
-                    'stade': event_details.get( 'stade' ),
-                    'score_final_domicile': event_details.get( 'score_final_domicile' ),
-                    'score_final_exterieur': event_details.get( 'score_final_exterieur' ),
-                    'status_api': event_details.get( 'status_event' ),
-                }
-            )
-
-            initial_data['match'] = match_obj.pk
-
-            initial_data['discipline'] = event_details.get( 'discipline' )
-            initial_data['equipe_domicile'] = event_details.get( 'equipe_domicile' )
-            initial_data['equipe_exterieur'] = event_details.get( 'equipe_exterieur' )
-            initial_data['ligue'] = event_details.get( 'ligue' )
-            initial_data['date_match'] = event_details.get( 'date_match' )
-            initial_data['heure_match'] = event_details.get( 'heure_match' )
+                              f"Détails du match pour '{match_obj.equipe_domicile} vs {match_obj.equipe_exterieur}' chargés avec succès{' depuis Sportmonks' if from_api else ''} !" )
+            initial_data = initial_from_match( match_obj )
         else:
             messages.warning( request,
                               f"Aucun détail de match trouvé pour l'ID '{api_event_id_from_get}' fourni par Sportmonks ou erreur API. Veuillez vérifier l'ID et votre clé API." )
@@ -388,42 +282,11 @@ def edit_pronostic(request, pk):
     api_event_id_from_get = request.GET.get( 'api_event_id' )
 
     if api_event_id_from_get:
-        event_details = get_event_details_from_sportmonks( api_event_id_from_get )
-        if event_details:
+        match_obj, from_api = resolve_match( api_event_id_from_get )
+        if match_obj:
             messages.success( request,
-                              f"Détails du match pour '{event_details.get( 'event_name' )}' chargés avec succès depuis Sportmonks !" )
-
-            combined_datetime = None
-            if event_details.get( 'date_match' ) and event_details.get( 'heure_match' ):
-                naive_combined = datetime.combine( event_details['date_match'], event_details['heure_match'] )
-                combined_datetime = timezone.make_aware( naive_combined, timezone.get_current_timezone() )
-            elif event_details.get( 'date_match' ):
-                naive_combined = datetime.combine( event_details['date_match'], time( 0, 0 ) )
-                combined_datetime = timezone.make_aware( naive_combined, timezone.get_current_timezone() )
-
-            match_obj, created_match = Match.objects.update_or_create(
-                api_event_id=event_details['api_event_id'],
-                defaults={
-                    'discipline': event_details.get( 'discipline' ),
-                    'equipe_domicile': event_details.get( 'equipe_domicile' ),
-                    'equipe_exterieur': event_details.get( 'equipe_exterieur' ),
-                    'date_match': combined_datetime,
-                    'ligue': event_details.get( 'ligue' ),
-                    'stade': event_details.get( 'stade' ),
-                    'score_final_domicile': event_details.get( 'score_final_domicile' ),
-                    'score_final_exterieur': event_details.get( 'score_final_exterieur' ),
-                    'status_api': event_details.get( 'status_event' ),
-                }
-            )
-
-            initial_data['match'] = match_obj.pk
-
-            initial_data['discipline'] = event_details.get( 'discipline' )
-            initial_data['equipe_domicile'] = event_details.get( 'equipe_domicile' )
-            initial_data['equipe_exterieur'] = event_details.get( 'equipe_exterieur' )
-            initial_data['ligue'] = event_details.get( 'ligue' )
-            initial_data['date_match'] = event_details.get( 'date_match' )
-            initial_data['heure_match'] = event_details.get( 'heure_match' )
+                              f"Détails du match pour '{match_obj.equipe_domicile} vs {match_obj.equipe_exterieur}' chargés avec succès{' depuis Sportmonks' if from_api else ''} !" )
+            initial_data = initial_from_match( match_obj )
         else:
             messages.warning( request,
                               f"Aucun détail de match trouvé pour l'ID '{api_event_id_from_get}' Sportmonks fourni ou erreur API. Veuillez vérifier l'ID." )
@@ -451,14 +314,9 @@ def edit_pronostic(request, pk):
                     field_name = form.fields[field].label if form.fields[field].label else field
                     messages.error( request, f"Erreur dans le champ '{field_name}': {error}" )
     else:
-        if pronostic.match:
-            initial_data['match'] = pronostic.match.pk
-            initial_data['discipline'] = pronostic.match.discipline
-            initial_data['equipe_domicile'] = pronostic.match.equipe_domicile
-            initial_data['equipe_exterieur'] = pronostic.match.equipe_exterieur
-            initial_data['ligue'] = pronostic.match.ligue
-            initial_data['date_match'] = pronostic.match.date_match.date()
-            initial_data['heure_match'] = pronostic.match.date_match.time()
+        # Le match demandé via ?api_event_id= prime sur celui du pronostic.
+        if pronostic.match and not initial_data:
+            initial_data = initial_from_match( pronostic.match )
 
         form = PronosticForm( instance=pronostic, initial=initial_data )
 
@@ -493,28 +351,8 @@ def public_profile(request, username):
     other_user = get_object_or_404( User, username=username )
     other_user_pronostics = Pronostic.objects.filter( utilisateur=other_user ).order_by( '-date_match' )
 
-    total_pronostics = other_user_pronostics.count()
-    pronostics_gagnants = other_user_pronostics.filter( resultat='GAGNANT' )
-    pronostics_perdants = other_user_pronostics.filter( resultat='PERDANT' )
-    pronostics_en_cours = other_user_pronostics.filter( resultat='EN_COURS' )
-    pronostics_annules = other_user_pronostics.filter( resultat='ANNULE' )
-
-    total_gagnants = pronostics_gagnants.count()
-    total_perdants = pronostics_perdants.count()
-    total_en_cours = pronostics_en_cours.count()
-    total_annules = pronostics_annules.count()
-
-    pronostics_completes = other_user_pronostics.exclude( resultat__in=['EN_COURS', 'ANNULE'] )
-    total_pronostics_completes = pronostics_completes.count()
-
-    taux_reussite = 0
-    if total_pronostics_completes > 0:
-        taux_reussite = (total_gagnants / total_pronostics_completes) * 100
-
-    profit_total = sum( p.gain_ou_perte for p in pronostics_completes )
-
-    followers_count = other_user.follower_relations.count()
-    following_count = other_user.following_relations.count()
+    # Statistiques lues dans la ligne UserStats de l'utilisateur (tenue à jour par deltas).
+    stats = get_user_stats( other_user )
 
     is_following = False
     if request.user.is_authenticated:
@@ -524,20 +362,50 @@ def public_profile(request, username):
     context.update( {
         'user_being_viewed': other_user,
         'user_pronostics': other_user_pronostics,
-        'total_pronostics': total_pronostics,
-        'total_gagnants': total_gagnants,
-        'total_perdants': total_perdants,
-        'total_en_cours': total_en_cours,
-        'total_annules': total_annules,
-        'taux_reussite': round( taux_reussite, 2 ),
-        'profit_total': round( profit_total, 2 ),
-        'followers_count': followers_count,
-        'following_count': following_count,
+        **stats,
         'is_following': is_following,
     } )
     return render( request, 'registration/public_profile.html', context )
 
 
+def leaderboard(request):
+    window = request.GET.get( 'window', LEADERBOARD_DEFAULT_WINDOW )
+    if window not in [choice[0] for choice in TipsterRanking.WINDOW_CHOICES]:
+        window = LEADERBOARD_DEFAULT_WINDOW
+
+    discipline = request.GET.get( 'discipline', '' )
+    if discipline not in [choice[0] for choice in Pronostic.DISCIPLINE_CHOICES]:
+        discipline = ''
+
+    type_pari = request.GET.get( 'type_pari', '' )
+    if type_pari not in [choice[0] for choice in Pronostic.TYPE_PARI_CHOICES]:
+        type_pari = ''
+
+    criterion = request.GET.get( 'sort', 'roi' )
+    if criterion not in RANKING_CRITERIA:
+        criterion = 'roi'
+
+    # Classement précalculé par refresh_leaderboard : une lecture d'intervalle de rangs.
+    page_obj = leaderboard_page( request.GET, window, discipline, type_pari, criterion )
+    filter_query = request.GET.copy()
+    filter_query.pop( 'page', None )
+
+    context = get_base_context( request )
+    context.update( {
+        'page_obj': page_obj,
+        'filter_query': filter_query.urlencode(),
+        'computed_at': page_obj.object_list[0].computed_at if page_obj.object_list else None,
+        'current_window': window,
+        'current_discipline': discipline,
+        'current_type_pari': type_pari,
+        'current_sort': criterion,
+        'window_choices': TipsterRanking.WINDOW_CHOICES,
+        'discipline_choices': Pronostic.DISCIPLINE_CHOICES,
+        'type_pari_choices': Pronostic.TYPE_PARI_CHOICES,
+    } )
+    return render( request, 'profoot/leaderboard.html', context )
+
+
 @login_required
 def follow_user(request, username):
     user_to_follow = get_object_or_404( User, username=username )